@@ -1,7 +1,76 @@
-import collections
-import statsmodels.formula.api as smf
+import numpy as np
+import pandas as pd
 
+# Refit the OLS models with statsmodels and check them against the closed-form
+# estimates (slow, only useful to validate changes to this module)
+VALIDATE_OLS = False
 
+
+def uses(*columns):
+    # Declare the sheet columns an aggregate function reads, so that only
+    # those are loaded from the participant files (see ingest.py)
+    def declare(function):
+        function.columns = list(columns)
+        return function
+
+    return declare
+
+
+def mask(condition):
+    # Plain boolean mask of a comparison, with missing values as False, so
+    # that filters also work on nullable and pyarrow-backed columns
+    return condition.to_numpy(dtype=bool, na_value=False)
+
+
+def condition_stats(df, factor, levels):
+    # Mean/SD/CoV of RT and number correct per level of a factor, in one pass.
+    # Levels missing from the data get NaN
+    stats = df.groupby(factor, observed=True).agg(
+        rt=("RT", "mean"), rtsd=("RT", "std"), correct=("correct", "sum")
+    )
+    stats = stats.reindex(levels)
+    stats["rtcov"] = stats["rtsd"] / stats["rt"]
+    return stats
+
+
+def mean_difference(stats, reference, level):
+    # Intercept and slope of RT ~ C(factor, Treatment(reference)) fitted on the
+    # trials of two levels. With a single binary predictor the OLS estimates
+    # are the reference mean and the difference between the two means
+    intercept = stats.loc[reference, "rt"]
+    slope = stats.loc[level, "rt"] - intercept
+    return intercept, slope, slope / intercept
+
+
+def validate_ols(df, factor, reference, level, intercept, slope):
+    import statsmodels.formula.api as smf
+
+    subset = df[df[factor].isin([reference, level])]
+    formula = f"RT ~ C({factor}, Treatment(reference={reference!r}))"
+    ols_intercept, ols_slope = smf.ols(formula, subset).fit().params
+    if not np.allclose([intercept, slope], [ols_intercept, ols_slope]):
+        raise ValueError(
+            f"Closed-form estimates for {factor} ({intercept}, {slope}) differ "
+            f"from OLS ({ols_intercept}, {ols_slope})"
+        )
+
+
+def split_responses(data, response_type):
+    # Times following errors and correct responses, and the trials to aggregate
+    follow_error_rt = data.loc[mask(data["correct"].shift() == 0), "RT"].mean()
+    follow_correct_rt = data.loc[mask(data["correct"].shift() == 1), "RT"].mean()
+
+    if response_type == "correct":
+        df = data[mask(data["correct"] == 1)]
+    elif response_type == "incorrect":
+        df = data[mask(data["correct"] == 0)]
+    else:
+        df = data
+
+    return follow_error_rt, follow_correct_rt, df
+
+
+@uses("correct")
 def aggregate_digit_span(data, sub_num):
     digit_correct_count = data["correct"].sum()
     digit_correct_num_items = data.shape[0]
@@ -10,6 +79,7 @@ def aggregate_digit_span(data, sub_num):
     return [sub_num, digit_correct_count, digit_correct_prop, digit_correct_num_items]
 
 
+@uses("correct")
 def aggregate_mrt(data, sub_num):
     mrt_count = data["correct"].sum()
     mrt_num_items = data.shape[0]
@@ -18,6 +88,7 @@ def aggregate_mrt(data, sub_num):
     return [sub_num, mrt_count, mrt_prop, mrt_num_items]
 
 
+@uses("RT", "correct")
 def aggregate_ravens(data, sub_num):
     ravens_rt = data["RT"].mean()
     ravens_count = data["correct"].sum()
@@ -27,26 +98,42 @@ def aggregate_ravens(data, sub_num):
     return [sub_num, ravens_rt, ravens_count, ravens_prop, ravens_num_items]
 
 
+@uses("RT", "accuracy", "stimulus", "key press")
 def aggregate_sart(data, sub_num):
     # Calculate times following errors and correct responses
-    follow_error_rt = data.loc[data.accuracy.shift() == 0, "RT"].mean()
-    follow_correct_rt = data.loc[data.accuracy.shift() == 1, "RT"].mean()
+    follow_error_rt = data.loc[mask(data["accuracy"].shift() == 0), "RT"].mean()
+    follow_correct_rt = data.loc[mask(data["accuracy"].shift() == 1), "RT"].mean()
 
     total_rt = data["RT"].mean()
     total_rtsd = data["RT"].std()
     total_rtcov = total_rtsd / total_rt
 
-    frequent_rt = data[data["stimulus"] != 3]["RT"].mean()
-    frequent_rtsd = data[data["stimulus"] != 3]["RT"].std()
+    # Frequent / infrequent (the digit 3) stimuli in one pass
+    frequency = np.where(mask(data["stimulus"] == 3), "infrequent", "frequent")
+    grouped = data.groupby(frequency).agg(
+        rt=("RT", "mean"),
+        rtsd=("RT", "std"),
+        presses=("key press", "sum"),
+        items=("stimulus", "size"),
+    )
+    grouped = grouped.reindex(["frequent", "infrequent"])
+
+    frequent_rt = grouped.loc["frequent", "rt"]
+    frequent_rtsd = grouped.loc["frequent", "rtsd"]
     frequent_rtcov = frequent_rtsd / frequent_rt
 
-    infrequent_rt = data[data["stimulus"] == 3]["RT"].mean()
-    infrequent_rtsd = data[data["stimulus"] == 3]["RT"].std()
+    infrequent_rt = grouped.loc["infrequent", "rt"]
+    infrequent_rtsd = grouped.loc["infrequent", "rtsd"]
     infrequent_rtcov = infrequent_rtsd / infrequent_rt
 
-    sart_error_count = data[data["stimulus"] == 3]["key press"].sum()
-    sart_errors_num_items = collections.Counter(data["stimulus"])[3]
-    sart_errors_prop = sart_error_count / sart_errors_num_items
+    if pd.isna(grouped.loc["infrequent", "items"]):
+        sart_error_count, sart_errors_num_items = 0, 0
+    else:
+        sart_error_count = grouped.loc["infrequent", "presses"]
+        sart_errors_num_items = grouped.loc["infrequent", "items"]
+    sart_errors_prop = (
+        sart_error_count / sart_errors_num_items if sart_errors_num_items else np.nan
+    )
 
     return [
         sub_num,
@@ -67,235 +154,283 @@ def aggregate_sart(data, sub_num):
     ]
 
 
+@uses("RT", "correct", "congruency", "cue")
 def aggregate_ant(data, sub_num, response_type="full"):
+    follow_error_rt, follow_correct_rt, df = split_responses(data, response_type)
+
+    # Aggregated descriptives, one groupby pass per factor
+    congruency = condition_stats(
+        df, "congruency", ["neutral", "congruent", "incongruent"]
+    )
+    cue = condition_stats(df, "cue", ["nocue", "center", "spatial", "double"])
+
+    # Network effects (equivalent to OLS with a two-level factor)
+    conflict_intercept, conflict_slope, conflict_slope_norm = mean_difference(
+        congruency, "congruent", "incongruent"
+    )
+    alerting_intercept, alerting_slope, alerting_slope_norm = mean_difference(
+        cue, "double", "nocue"
+    )
+    orienting_intercept, orienting_slope, orienting_slope_norm = mean_difference(
+        cue, "spatial", "center"
+    )
+
+    if VALIDATE_OLS:
+        validate_ols(
+            df, "congruency", "congruent", "incongruent",
+            conflict_intercept, conflict_slope,
+        )
+        validate_ols(df, "cue", "double", "nocue", alerting_intercept, alerting_slope)
+        validate_ols(
+            df, "cue", "spatial", "center", orienting_intercept, orienting_slope
+        )
 
-    # Calculate times following errors and correct responses
-    df = data
-    follow_error_rt = df.loc[df.correct.shift() == 0, "RT"].mean()
-    follow_correct_rt = df.loc[df.correct.shift() == 1, "RT"].mean()
+    return (
+        [sub_num, follow_error_rt, follow_correct_rt]
+        + list(congruency["rt"])
+        + list(congruency["rtsd"])
+        + list(congruency["rtcov"])
+        + list(congruency["correct"])
+        + list(cue["rt"])
+        + list(cue["rtsd"])
+        + list(cue["rtcov"])
+        + list(cue["correct"])
+        + [
+            conflict_intercept,
+            conflict_slope,
+            conflict_slope_norm,
+            alerting_intercept,
+            alerting_slope,
+            alerting_slope_norm,
+            orienting_intercept,
+            orienting_slope,
+            orienting_slope_norm,
+        ]
+    )
 
-    if response_type == "correct":
-        df = data[data["correct"] == 1]
-    elif response_type == "incorrect":
-        df = data[data["correct"] == 0]
-    elif response_type == "full":
-        df = data
+
+@uses("RT", "correct", "setSize")
+def aggregate_sternberg(data, sub_num, response_type="full"):
+    follow_error_rt, follow_correct_rt, df = split_responses(data, response_type)
 
     # Aggregated descriptives
+    set_size = condition_stats(df, "setSize", [2, 6])
 
-    ## congruency conditions
-    grouped_congruency = df.groupby("congruency")
-    neutral_rt = grouped_congruency.mean().get_value("neutral", "RT")
-    congruent_rt = grouped_congruency.mean().get_value("congruent", "RT")
-    incongruent_rt = grouped_congruency.mean().get_value("incongruent", "RT")
-
-    neutral_rtsd = grouped_congruency.std().get_value("neutral", "RT")
-    congruent_rtsd = grouped_congruency.std().get_value("congruent", "RT")
-    incongruent_rtsd = grouped_congruency.std().get_value("incongruent", "RT")
-
-    neutral_rtcov = neutral_rtsd / neutral_rt
-    congruent_rtcov = congruent_rtsd / congruent_rt
-    incongruent_rtcov = incongruent_rtsd / incongruent_rt
-
-    neutral_correct = grouped_congruency.sum().get_value("neutral", "correct")
-    congruent_correct = grouped_congruency.sum().get_value("congruent", "correct")
-    incongruent_correct = grouped_congruency.sum().get_value("incongruent", "correct")
-
-    ## cue conditions
-    grouped_cue = df.groupby("cue")
-    nocue_rt = grouped_cue.mean().get_value("nocue", "RT")
-    center_rt = grouped_cue.mean().get_value("center", "RT")
-    spatial_rt = grouped_cue.mean().get_value("spatial", "RT")
-    double_rt = grouped_cue.mean().get_value("double", "RT")
-
-    nocue_rtsd = grouped_cue.std().get_value("nocue", "RT")
-    center_rtsd = grouped_cue.std().get_value("center", "RT")
-    spatial_rtsd = grouped_cue.std().get_value("spatial", "RT")
-    double_rtsd = grouped_cue.std().get_value("double", "RT")
-
-    nocue_rtcov = nocue_rtsd / nocue_rt
-    center_rtcov = center_rtsd / center_rt
-    spatial_rtcov = spatial_rtsd / spatial_rt
-    double_rtcov = double_rtsd / double_rt
-
-    nocue_correct = grouped_cue.sum().get_value("nocue", "correct")
-    center_correct = grouped_cue.sum().get_value("center", "correct")
-    spatial_correct = grouped_cue.sum().get_value("spatial", "correct")
-    double_correct = grouped_cue.sum().get_value("double", "correct")
-
-    # OLS regression
-    conflict_df = df[
-        (df["congruency"] == "congruent") | (df["congruency"] == "incongruent")
-    ]
-    formula_conflict = "RT ~ C(congruency, Treatment(reference='congruent'))"
-    ols_results = smf.ols(formula_conflict, conflict_df).fit()
-    conflict_intercept, conflict_slope = ols_results.params
-    conflict_slope_norm = conflict_slope / congruent_rt
-
-    alerting_df = df[(df["cue"] == "double") | (df["cue"] == "nocue")]
-    formula_alerting = "RT ~ C(cue, Treatment(reference='double'))"
-    ols_results = smf.ols(formula_alerting, alerting_df).fit()
-    alerting_intercept, alerting_slope = ols_results.params
-    alerting_slope_norm = alerting_slope / double_rt
-
-    orienting_df = df[(df["cue"] == "spatial") | (df["cue"] == "center")]
-    formula_orienting = "RT ~ C(cue, Treatment(reference='spatial'))"
-    ols_results = smf.ols(formula_orienting, orienting_df).fit()
-    orienting_intercept, orienting_slope = ols_results.params
-    orienting_slope_norm = orienting_slope / spatial_rt
+    # Set size effect (equivalent to OLS with a two-level factor)
+    intercept, slope, slope_norm = mean_difference(set_size, 2, 6)
 
-    return [
-        sub_num,
-        follow_error_rt,
-        follow_correct_rt,
-        neutral_rt,
-        congruent_rt,
-        incongruent_rt,
-        neutral_rtsd,
-        congruent_rtsd,
-        incongruent_rtsd,
-        neutral_rtcov,
-        congruent_rtcov,
-        incongruent_rtcov,
-        neutral_correct,
-        congruent_correct,
-        incongruent_correct,
-        nocue_rt,
-        center_rt,
-        spatial_rt,
-        double_rt,
-        nocue_rtsd,
-        center_rtsd,
-        spatial_rtsd,
-        double_rtsd,
-        nocue_rtcov,
-        center_rtcov,
-        spatial_rtcov,
-        double_rtcov,
-        nocue_correct,
-        center_correct,
-        spatial_correct,
-        double_correct,
-        conflict_intercept,
-        conflict_slope,
-        conflict_slope_norm,
-        alerting_intercept,
-        alerting_slope,
-        alerting_slope_norm,
-        orienting_intercept,
-        orienting_slope,
-        orienting_slope_norm,
-    ]
+    if VALIDATE_OLS:
+        validate_ols(df, "setSize", 2, 6, intercept, slope)
 
+    return (
+        [sub_num, follow_error_rt, follow_correct_rt]
+        + list(set_size["rt"])
+        + list(set_size["rtsd"])
+        + list(set_size["rtcov"])
+        + list(set_size["correct"])
+        + [intercept, slope, slope_norm]
+    )
 
-def aggregate_sternberg(data, sub_num, response_type="full"):
 
-    # Calculate times following errors and correct responses
-    df = data
-    follow_error_rt = df.loc[df.correct.shift() == 0, "RT"].mean()
-    follow_correct_rt = df.loc[df.correct.shift() == 1, "RT"].mean()
+@uses("RT", "correct", "congruency", "compatibility")
+def aggregate_flanker(data, sub_num, response_type="full"):
 
-    if response_type == "correct":
-        df = data[data["correct"] == 1]
-    elif response_type == "incorrect":
-        df = data[data["correct"] == 0]
-    elif response_type == "full":
-        df = data
+    columns = [sub_num]
 
-    # Aggregated descriptives
-    grouped_set_size = df.groupby("setSize")
-    set_2_rt = grouped_set_size.mean().get_value(2, "RT")
-    set_2_rtsd = grouped_set_size.std().get_value(2, "RT")
-    set_2_rtcov = set_2_rtsd / set_2_rt
-    set_2_correct = grouped_set_size.sum().get_value(2, "correct")
-
-    set_6_rt = grouped_set_size.mean().get_value(6, "RT")
-    set_6_rtsd = grouped_set_size.std().get_value(6, "RT")
-    set_6_rtcov = set_6_rtsd / set_6_rt
-    set_6_correct = grouped_set_size.sum().get_value(6, "correct")
-
-    # OLS regression
-    formula = "RT ~ C(setSize, Treatment(reference=2))"
-    ols_results = smf.ols(formula, df).fit()
-    intercept, slope = ols_results.params
-    slope_norm = slope / set_2_rt
+    # split compatibility conditions
+    for comp_type, df_cur in data.groupby("compatibility", sort=True, observed=True):
+        follow_error_rt, follow_correct_rt, df = split_responses(
+            df_cur, response_type
+        )
 
-    return [
-        sub_num,
-        follow_error_rt,
-        follow_correct_rt,
-        set_2_rt,
-        set_6_rt,
-        set_2_rtsd,
-        set_6_rtsd,
-        set_2_rtcov,
-        set_6_rtcov,
-        set_2_correct,
-        set_6_correct,
-        intercept,
-        slope,
-        slope_norm,
-    ]
+        congruency = condition_stats(df, "congruency", ["congruent", "incongruent"])
+
+        # Conflict effect (equivalent to OLS with a two-level factor)
+        conflict_intercept, conflict_slope, conflict_slope_norm = mean_difference(
+            congruency, "congruent", "incongruent"
+        )
 
+        if VALIDATE_OLS:
+            validate_ols(
+                df, "congruency", "congruent", "incongruent",
+                conflict_intercept, conflict_slope,
+            )
+
+        columns += (
+            [follow_error_rt, follow_correct_rt]
+            + list(congruency["rt"])
+            + list(congruency["rtsd"])
+            + list(congruency["rtcov"])
+            + list(congruency["correct"])
+            + [conflict_intercept, conflict_slope, conflict_slope_norm]
+        )
 
-def aggregate_flanker(data, sub_num, response_type="full"):
+    return columns
 
-    columns = [sub_num]
 
-    # split compatibility conditions
-    for comp_type in sorted(list(data["compatibility"].unique()), reverse=False):
-        df_cur = data[data["compatibility"] == comp_type]
+# D2 sheet: rows x letters per row
+D2_ROWS = 14
+D2_ROW_LETTERS = 47
 
-        # Calculate times following errors and correct responses
-        follow_error_rt = df_cur.loc[df_cur.correct.shift() == 0, "RT"].mean()
-        follow_correct_rt = df_cur.loc[df_cur.correct.shift() == 1, "RT"].mean()
 
-        if response_type == "correct":
-            df = df_cur[df_cur["correct"] == 1]
-        elif response_type == "incorrect":
-            df = df_cur[df_cur["correct"] == 0]
-        elif response_type == "full":
-            df = df_cur
+@uses("row", "letter_num", "selected", "target")
+def aggregate_d2(data, sub_num):
+    # Selection and target grids (rows x letters)
+    rows = data["row"].astype(int).to_numpy() - 1
+    letters = data["letter_num"].astype(int).to_numpy() - 1
+    selected = np.zeros((D2_ROWS, D2_ROW_LETTERS), dtype=bool)
+    target = np.zeros((D2_ROWS, D2_ROW_LETTERS), dtype=bool)
+    selected[rows, letters] = data["selected"].isin([True, "True"]).to_numpy()
+    target[rows, letters] = mask(data["target"] == "si")
 
-        grouped_congruency = df.groupby(["congruency"])
+    # Letters processed in each row: up to the last one selected
+    processed = np.where(
+        selected.any(axis=1), D2_ROW_LETTERS - np.argmax(selected[:, ::-1], axis=1), 0
+    )
+    in_range = np.arange(D2_ROW_LETTERS) < processed[:, None]
 
-        congruent_rt = grouped_congruency.mean().get_value("congruent", "RT")
-        incongruent_rt = grouped_congruency.mean().get_value("incongruent", "RT")
+    d2_tn = processed.sum()
+    d2_e1 = (target & ~selected & in_range).sum()  # omissions
+    d2_e2 = (~target & selected).sum()  # commissions
+    d2_e = d2_e1 + d2_e2
+    d2_tn_e = d2_tn - d2_e
+    d2_e_pct = d2_e / d2_tn * 100 if d2_tn else np.nan
+    d2_cp = (target & selected).sum() - d2_e2
+    d2_fr = processed.max() - processed.min()
 
-        congruent_rtsd = grouped_congruency.std().get_value("congruent", "RT")
-        incongruent_rtsd = grouped_congruency.std().get_value("incongruent", "RT")
+    return [sub_num, d2_tn, d2_e1, d2_e2, d2_e, d2_tn_e, d2_e_pct, d2_cp, d2_fr]
 
-        congruent_rtcov = congruent_rtsd / congruent_rt
-        incongruent_rtcov = incongruent_rtsd / incongruent_rt
 
-        congruent_correct = grouped_congruency.sum().get_value("congruent", "correct")
-        incongruent_correct = grouped_congruency.sum().get_value(
-            "incongruent", "correct"
-        )
+# Tracking measurement phases of the Dual Task, relative to each stimulus
+DUAL_TASK_PHASES = ["concurrent", "after", "unrelated"]
+
+
+@uses("measurement_phase", "distance_px")
+def aggregate_dual_task_tracking(data, sub_num):
+    distance = data["distance_px"].astype(float)
+    phases = (
+        distance.groupby(data["measurement_phase"], observed=True)
+        .agg(["mean", "std"])
+        .reindex(DUAL_TASK_PHASES)
+    )
+
+    return (
+        [sub_num, distance.mean(), distance.std()]
+        + list(phases["mean"])
+        + list(phases["std"])
+    )
+
 
-        # OLS regression
-        conflict_df = df[
-            (df["congruency"] == "congruent") | (df["congruency"] == "incongruent")
+@uses("stimulus_type", "latency_s", "responded")
+def aggregate_dual_task_responses(data, sub_num):
+    # Presses to red targets are hits, presses to blue distractors false alarms
+    responded = data["responded"].isin([True, "True"]).to_numpy()
+    targets = mask(data["stimulus_type"] == "target_red")
+
+    dual_hits = (responded & targets).sum()
+    dual_false_alarms = (responded & ~targets).sum()
+    dual_hit_rate = dual_hits / targets.sum()
+    dual_false_alarm_rate = dual_false_alarms / (~targets).sum()
+    dual_hit_latency = data.loc[responded & targets, "latency_s"].astype(float).mean()
+
+    return [
+        sub_num,
+        dual_hits,
+        dual_hit_rate,
+        dual_false_alarms,
+        dual_false_alarm_rate,
+        dual_hit_latency,
+    ]
+
+
+@uses("final_angle_deg", "rotation_time_ms")
+def aggregate_pvr(data, sub_num):
+    # Deviation of the line from vertical (90 degrees) in [-90, 90), positive
+    # when it was left tilted counter-clockwise. 270 degrees is vertical too
+    deviation = data["final_angle_deg"].astype(float) % 180 - 90
+
+    pvr_deviation = deviation.mean()
+    pvr_abs_deviation = deviation.abs().mean()
+    pvr_rotation_time = data["rotation_time_ms"].astype(float).mean()
+
+    return [sub_num, pvr_deviation, pvr_abs_deviation, pvr_rotation_time]
+
+
+FOURFIGURES_PARTS = [1, 2, 3, 4]
+
+
+@uses("part", "trial_type", "correct", "switch", "RT")
+def aggregate_fourfigures(data, sub_num):
+    # Files recorded before RT and switch were saved only get accuracies
+    df = data[mask(data["trial_type"] == "experimental")]
+    df = df.assign(
+        correct=mask(df["correct"] == "yes").astype(int),
+        RT=df["RT"].astype(float) if "RT" in df else np.nan,
+        switch=mask(df["switch"] == "yes") if "switch" in df else False,
+    )
+
+    parts = (
+        df.groupby("part")
+        .agg(rt=("RT", "mean"), correct=("correct", "mean"))
+        .reindex(FOURFIGURES_PARTS)
+    )
+    part4 = df[mask(df["part"] == 4)]
+    switch = (
+        part4.groupby("switch")
+        .agg(rt=("RT", "mean"), correct=("correct", "mean"))
+        .reindex([True, False])
+    )
+
+    # Interference: discrepant (part 2) vs matching figures (part 1), same rule.
+    # Mixing: repeat trials of the mixed part 4 vs the single-rule parts 2-3.
+    # Switch: switch vs repeat trials of part 4
+    interference = parts.loc[2] - parts.loc[1]
+    mixing = switch.loc[False] - parts.loc[[2, 3]].mean()
+    switch_cost = switch.loc[True] - switch.loc[False]
+
+    return (
+        [sub_num]
+        + list(parts["rt"])
+        + list(parts["correct"])
+        + [
+            interference["rt"],
+            interference["correct"],
+            mixing["rt"],
+            mixing["correct"],
+            switch_cost["rt"],
+            switch_cost["correct"],
         ]
-        formula_conflict = "RT ~ C(congruency, Treatment(reference='congruent'))"
-        ols_results = smf.ols(formula_conflict, conflict_df).fit()
-        conflict_intercept, conflict_slope = ols_results.params
-        conflict_slope_norm = conflict_slope / congruent_rt
-
-        columns += [
-            follow_error_rt,
-            follow_correct_rt,
-            congruent_rt,
-            incongruent_rt,
-            congruent_rtsd,
-            incongruent_rtsd,
-            congruent_rtcov,
-            incongruent_rtcov,
-            congruent_correct,
-            incongruent_correct,
-            conflict_intercept,
-            conflict_slope,
-            conflict_slope_norm,
+    )
+
+
+@uses("forward_span", "backward_span", "ascending_span")
+def aggregate_digits_memorization(data, sub_num):
+    return [
+        sub_num,
+        data.loc[0, "forward_span"],
+        data.loc[0, "backward_span"],
+        data.loc[0, "ascending_span"],
+    ]
+
+
+# Ikigai pages and maximum number of options chosen on each
+IKIGAI_PAGES = ["Ikigai_WorldNeed", "Ikigai_PaidFor"]
+IKIGAI_SELECTIONS = 4
+
+
+@uses("pagina", "numero_del_enunciado", "respuesta", "orden_seleccion")
+def aggregate_ikigai(data, sub_num):
+    # Number of options chosen on each page, and the chosen options in the
+    # order they were selected
+    chosen = data[mask(data["respuesta"] == 1)].sort_values("orden_seleccion")
+
+    columns = [sub_num]
+    for page in IKIGAI_PAGES:
+        options = list(
+            chosen.loc[mask(chosen["pagina"] == page), "numero_del_enunciado"]
+        )
+        columns += [len(options)] + (options + [np.nan] * IKIGAI_SELECTIONS)[
+            :IKIGAI_SELECTIONS
         ]
 
     return columns
@@ -0,0 +1,361 @@
+"""Benchmark the aggregation functions on synthetic participants.
+
+Each summarised sheet is generated with a realistic number of trials and
+aggregated repeatedly, and the throughput of every aggregate function is
+reported in participants per second. Results can be saved as a baseline and
+later runs compared against it, so regressions show up as numbers.
+
+Usage:
+    python benchmark.py [--number N] [--repeat R] [--save FILE]
+        [--compare FILE] [--tolerance T]
+"""
+import sys
+import timeit
+import argparse
+import numpy as np
+import pandas as pd
+import analysis
+import ingest
+import questionnaires
+import summarise
+
+# Number of participants scored at once by the questionnaire benchmarks
+COHORT_SIZE = 200
+
+# Slowdown (relative to the baseline) reported as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def _frame(data):
+    # Same dtypes as the sheets read from participant files
+    return ingest.set_dtypes(pd.DataFrame(data))
+
+
+def _choice(rng, values, size):
+    return rng.choice(np.array(values, dtype=object), size)
+
+
+def make_ant(rng, n=288):
+    return _frame(
+        {
+            "RT": rng.normal(550, 90, n),
+            "correct": (rng.random(n) < 0.95).astype(int),
+            "congruency": _choice(rng, ["neutral", "congruent", "incongruent"], n),
+            "cue": _choice(rng, ["nocue", "center", "spatial", "double"], n),
+        }
+    )
+
+
+def make_d2(rng):
+    rows, letters = analysis.D2_ROWS, analysis.D2_ROW_LETTERS
+    row, letter_num = np.divmod(np.arange(rows * letters), letters)
+    target = rng.random(row.size) < 0.45
+
+    # Each row is processed up to a random letter
+    processed = letter_num < rng.integers(30, letters + 1, rows)[row]
+    hit = rng.random(row.size) < np.where(target, 0.9, 0.02)
+    selected = processed & hit
+    return _frame(
+        {
+            "row": row + 1,
+            "letter_num": letter_num + 1,
+            "selected": selected,
+            "target": np.where(target, "si", "no"),
+        }
+    )
+
+
+def make_digit_span(rng, n=14):
+    return _frame({"correct": (rng.random(n) < 0.7).astype(int)})
+
+
+def make_digits_memorization(rng):
+    return _frame(
+        {
+            "forward_span": [rng.integers(4, 9)],
+            "backward_span": [rng.integers(3, 8)],
+            "ascending_span": [rng.integers(3, 8)],
+        }
+    )
+
+
+def make_dual_task_tracking(rng, n=96):
+    return _frame(
+        {
+            "measurement_phase": _choice(rng, analysis.DUAL_TASK_PHASES, n),
+            "distance_px": rng.gamma(2.0, 40.0, n),
+        }
+    )
+
+
+def make_dual_task_responses(rng, n=24):
+    responded = rng.random(n) < 0.6
+    return _frame(
+        {
+            "stimulus_type": np.tile(["target_red", "distractor_blue"], n // 2),
+            "latency_s": np.where(responded, rng.normal(0.6, 0.15, n), np.nan),
+            "responded": responded,
+        }
+    )
+
+
+def make_flanker(rng, n=288):
+    return _frame(
+        {
+            "RT": rng.normal(480, 80, n),
+            "correct": (rng.random(n) < 0.95).astype(int),
+            "congruency": _choice(rng, ["congruent", "incongruent"], n),
+            "compatibility": np.repeat(["compatible", "incompatible"], n // 2),
+        }
+    )
+
+
+def make_fourfigures(rng, trials_per_part=16):
+    n = 4 * trials_per_part
+    return _frame(
+        {
+            "part": np.repeat(analysis.FOURFIGURES_PARTS, trials_per_part),
+            "trial_type": "experimental",
+            "correct": np.where(rng.random(n) < 0.9, "yes", "no"),
+            "switch": np.where(rng.random(n) < 0.2, "yes", "no"),
+            "RT": rng.normal(900, 200, n),
+        }
+    )
+
+
+def make_ikigai(rng, options=20):
+    rows = []
+    for page in analysis.IKIGAI_PAGES:
+        chosen = list(rng.choice(options, analysis.IKIGAI_SELECTIONS, replace=False))
+        for option in range(options):
+            rows.append(
+                {
+                    "pagina": page,
+                    "numero_del_enunciado": option + 1,
+                    "respuesta": int(option in chosen),
+                    "orden_seleccion": (
+                        chosen.index(option) + 1 if option in chosen else np.nan
+                    ),
+                }
+            )
+    return _frame(rows)
+
+
+def make_mrt(rng, n=24):
+    return _frame({"correct": (rng.random(n) < 0.6).astype(int)})
+
+
+def make_pvr(rng):
+    return _frame(
+        {
+            "final_angle_deg": [90 + rng.normal(0, 3)],
+            "rotation_time_ms": [rng.normal(6000, 1500)],
+        }
+    )
+
+
+def make_ravens(rng, n=36):
+    return _frame(
+        {
+            "RT": rng.normal(20000, 6000, n),
+            "correct": (rng.random(n) < 0.6).astype(int),
+        }
+    )
+
+
+def make_sart(rng, n=225):
+    stimulus = rng.integers(1, 10, n)
+    key_press = np.where(stimulus == 3, rng.random(n) < 0.3, rng.random(n) < 0.98)
+    return _frame(
+        {
+            "RT": rng.normal(350, 70, n),
+            "accuracy": (key_press != (stimulus == 3)).astype(int),
+            "stimulus": stimulus,
+            "key press": key_press.astype(int),
+        }
+    )
+
+
+def make_sternberg(rng, n=96):
+    return _frame(
+        {
+            "RT": rng.normal(700, 120, n),
+            "correct": (rng.random(n) < 0.93).astype(int),
+            "setSize": rng.choice([2, 6], n),
+        }
+    )
+
+
+# Synthetic data generator of each summarised sheet
+SHEET_GENERATORS = {
+    "ANT": make_ant,
+    "D2": make_d2,
+    "Digit span (backwards)": make_digit_span,
+    "Digits Memorization": make_digits_memorization,
+    "Dual Task - Responses": make_dual_task_responses,
+    "Dual Task - Tracking": make_dual_task_tracking,
+    "Eriksen Flanker": make_flanker,
+    "FourFigures": make_fourfigures,
+    "Ikigai": make_ikigai,
+    "MRT": make_mrt,
+    "PVR": make_pvr,
+    "Ravens Matrices": make_ravens,
+    "SART": make_sart,
+    "Sternberg": make_sternberg,
+}
+
+
+def make_questionnaire(rng, questionnaire):
+    """Return a synthetic questionnaire sheet (numero_del_enunciado, respuesta)."""
+    responses = rng.integers(
+        questionnaire.min_value, questionnaire.max_value + 1, questionnaire.num_items
+    )
+    if questionnaire.values is not None:
+        labels = {value: label for label, value in questionnaire.values.items()}
+        responses = [labels[response] for response in responses]
+    return _frame(
+        {
+            "numero_del_enunciado": np.arange(1, questionnaire.num_items + 1),
+            "respuesta": responses,
+        }
+    )
+
+
+def make_subject(rng, sub_num="001"):
+    """Return the sheets of one synthetic participant (see SHEET_COLUMNS)."""
+    sheets = {
+        "info": _frame(
+            {
+                "sub_num": [sub_num],
+                "datetime": ["2024-01-01 10:00:00"],
+                "condition": [1],
+                "age": [int(rng.integers(18, 65))],
+                "sex": [str(rng.choice(["male", "female"]))],
+                "RA": ["RA"],
+            }
+        )
+    }
+    for sheet, generate in SHEET_GENERATORS.items():
+        sheets[sheet] = generate(rng)
+    for sheet, questionnaire in questionnaires.QUESTIONNAIRES.items():
+        sheets[sheet] = make_questionnaire(rng, questionnaire)
+    return sheets
+
+
+def _time(function, number, repeat):
+    # Best of `repeat` runs, in seconds per call
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def benchmark(number=200, repeat=5, seed=0):
+    """Time every aggregate function on one synthetic participant.
+
+    Returns a DataFrame with the time per participant and the throughput of
+    each benchmark.
+
+    Parameters:
+    number -- calls per timing run
+    repeat -- timing runs (the fastest is kept)
+    seed -- seed of the synthetic data
+    """
+    rng = np.random.default_rng(seed)
+    sub = make_subject(rng)
+
+    results = []
+    for sheet, aggregate in summarise.SHEET_AGGREGATES.items():
+        data = sub[sheet]
+        seconds = _time(lambda: aggregate(data, "001"), number, repeat)
+        results.append((aggregate.__name__, seconds))
+
+    seconds = _time(lambda: summarise.summarise_sheets(sub), number, repeat)
+    results.append(("summarise_sheets", seconds))
+
+    # Questionnaires are scored for a whole cohort at once
+    for sheet, questionnaire in questionnaires.QUESTIONNAIRES.items():
+        rows = [
+            [i] + questionnaire.item_responses(make_questionnaire(rng, questionnaire))
+            for i in range(COHORT_SIZE)
+        ]
+        seconds = _time(
+            lambda: questionnaires.score_cohort(sheet, rows),
+            max(1, number // 10),
+            repeat,
+        )
+        results.append((f"score_cohort[{sheet}]", seconds / COHORT_SIZE))
+
+    return pd.DataFrame(
+        [(name, seconds * 1000, 1 / seconds) for name, seconds in results],
+        columns=["benchmark", "ms_per_subject", "subjects_per_s"],
+    )
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare a run with a baseline.
+
+    Returns the results with the baseline throughput and the relative change,
+    and the names of the benchmarks that slowed down by more than tolerance.
+
+    Parameters:
+    results -- DataFrame returned by benchmark()
+    baseline -- DataFrame of a saved run
+    tolerance -- allowed relative slowdown, e.g. 0.2 for 20%
+    """
+    merged = results.merge(
+        baseline[["benchmark", "subjects_per_s"]],
+        on="benchmark",
+        how="left",
+        suffixes=("", "_baseline"),
+    )
+    merged["change"] = merged["subjects_per_s"] / merged["subjects_per_s_baseline"] - 1
+    regressions = list(
+        merged.loc[analysis.mask(merged["change"] < -tolerance), "benchmark"]
+    )
+    return merged, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the aggregation functions on synthetic participants."
+    )
+    parser.add_argument("--number", type=int, default=200, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs")
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed of the synthetic data"
+    )
+    parser.add_argument(
+        "--save", default=None, help="save the results as a csv baseline"
+    )
+    parser.add_argument("--compare", default=None, help="baseline csv to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="relative slowdown reported as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    summarise.configure_pandas()
+    print(f"pandas {pd.__version__}, numpy {np.__version__}")
+
+    results = benchmark(args.number, args.repeat, args.seed)
+    regressions = []
+    if args.compare is not None:
+        results, regressions = compare(
+            results, pd.read_csv(args.compare), args.tolerance
+        )
+
+    print(results.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    if args.save is not None:
+        results[["benchmark", "ms_per_subject", "subjects_per_s"]].to_csv(
+            args.save, index=False
+        )
+
+    if regressions:
+        print(f"Slower than the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""On-disk cache of the summary rows of each participant file.
+
+Entries are keyed by file path and are valid while the file size and
+modification time (or, if those changed, the SHA-256 of its content) and the
+version of the analysis code are unchanged. Re-running the summariser then
+only re-scores new or modified files.
+
+Sessions saved in a directory format (csv, parquet, feather) are treated as
+one file: their size is the total of their files, their modification time
+the latest, and their digest covers every file.
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import collections
+
+# Bump to invalidate all entries when the format of the cached rows changes
+CACHE_FORMAT = 1
+
+# Read files in blocks of this size when hashing them
+HASH_BLOCK_SIZE = 1 << 20
+
+
+# Size and modification time of a session (see session_stat)
+SessionStat = collections.namedtuple("SessionStat", ["st_mtime_ns", "st_size"])
+
+
+def _session_files(path):
+    # Files of a directory session, sorted by their path relative to it
+    files = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            files.append(os.path.join(root, name))
+    return sorted(files, key=lambda f: os.path.relpath(f, path))
+
+
+def session_stat(path):
+    """Return the os.stat() of a file, or the SessionStat of a directory."""
+    if not os.path.isdir(path):
+        return os.stat(path)
+    stats = [os.stat(f) for f in _session_files(path)]
+    return SessionStat(
+        max([os.stat(path).st_mtime_ns] + [stat.st_mtime_ns for stat in stats]),
+        sum(stat.st_size for stat in stats),
+    )
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's (or directory's) content."""
+    digest = hashlib.sha256()
+    files = _session_files(path) if os.path.isdir(path) else [path]
+    for file_path in files:
+        if file_path != path:
+            digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version(*modules):
+    """Return a version string for the code of some modules.
+
+    It changes whenever the source of one of the modules changes, so edits
+    to the aggregation functions invalidate the cache.
+
+    Parameters:
+    modules -- modules whose source is hashed
+    """
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _to_builtin(value):
+    # numpy scalars are not json serialisable
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class SummaryCache(object):
+    """SQLite cache of summary rows (see summarise.summarise_sheets).
+
+    Parameters:
+    path -- path of the SQLite database. It is created if needed
+    version -- code version the cached rows must match (see code_version())
+    """
+
+    def __init__(self, path, version):
+        self.version = version
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+            "sha256 TEXT, version TEXT, rows TEXT)"
+        )
+        self.connection.commit()
+
+    def get(self, path, stat):
+        """Return the cached rows of a file, or None if they are out of date.
+
+        Parameters:
+        path -- path of the participant file
+        stat -- session_stat() of the file
+        """
+        entry = self.connection.execute(
+            "SELECT mtime_ns, size, sha256, rows FROM summaries "
+            "WHERE path = ? AND version = ?",
+            (path, self.version),
+        ).fetchone()
+        if entry is None:
+            return None
+
+        mtime_ns, size, sha256, rows = entry
+        if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+            # Touched (e.g. copied) but possibly unchanged: compare content
+            if size != stat.st_size or file_hash(path) != sha256:
+                return None
+            self.connection.execute(
+                "UPDATE summaries SET mtime_ns = ? WHERE path = ?",
+                (stat.st_mtime_ns, path),
+            )
+
+        return json.loads(rows)
+
+    def put(self, path, stat, sha256, rows):
+        """Store the rows of a file.
+
+        Parameters:
+        path -- path of the participant file
+        stat -- session_stat() of the file when it was read
+        sha256 -- hex digest of the file content
+        rows -- dict of summary table name -> row
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                stat.st_mtime_ns,
+                stat.st_size,
+                sha256,
+                self.version,
+                json.dumps(rows, default=_to_builtin),
+            ),
+        )
+
+    def prune(self, paths):
+        """Remove the entries of files that are not in paths."""
+        cached = [
+            path for (path,) in self.connection.execute("SELECT path FROM summaries")
+        ]
+        keep = set(paths)
+        self.connection.executemany(
+            "DELETE FROM summaries WHERE path = ?",
+            [(path,) for path in cached if path not in keep],
+        )
+
+    def close(self):
+        """Commit the changes and close the database."""
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,108 @@
+"""Read only the sheets and columns of participant files that are summarised.
+
+Workbooks are opened with openpyxl in read-only mode, which streams the rows
+of a sheet instead of loading the whole workbook, and sheets that are not
+requested are never parsed. Condition label columns are returned as
+categoricals.
+"""
+import os
+import pandas as pd
+
+# Columns holding condition labels, stored as categoricals
+CATEGORICAL_COLUMNS = {"congruency", "cue", "compatibility", "sex"}
+
+# Columns kept as strings (e.g. subject numbers with leading zeros)
+STRING_COLUMNS = {"sub_num"}
+
+
+def _frame(header, rows, columns):
+    """Build a DataFrame with the requested columns of a sheet.
+
+    Parameters:
+    header -- column names of the sheet
+    rows -- iterable of row tuples
+    columns -- columns to keep (None keeps all). Missing columns are skipped
+    """
+    header = [str(name) if name is not None else "" for name in header]
+    if columns is None:
+        indices = [i for i, name in enumerate(header) if name]
+    else:
+        indices = [header.index(name) for name in columns if name in header]
+
+    data = {header[i]: [] for i in indices}
+    for row in rows:
+        # Skip the empty trailing rows some workbooks contain
+        if row is None or all(value is None for value in row):
+            continue
+        for i in indices:
+            data[header[i]].append(row[i] if i < len(row) else None)
+
+    return set_dtypes(pd.DataFrame(data, columns=[header[i] for i in indices]))
+
+
+def set_dtypes(df):
+    """Convert label columns to categoricals and id columns to strings."""
+    for column in df.columns:
+        if column in STRING_COLUMNS:
+            df[column] = df[column].map(lambda v: None if v is None else str(v))
+        elif column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_xlsx(source, sheets):
+    """Read sheets of an .xlsx workbook in read-only (streaming) mode.
+
+    Returns a dict of sheet name -> DataFrame, for the requested sheets that
+    exist in the workbook.
+
+    Parameters:
+    source -- path or file-like object of the workbook
+    sheets -- dict of sheet name -> list of columns to read (None for all)
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        data = {}
+        for sheet_name, columns in sheets.items():
+            if sheet_name not in workbook.sheetnames:
+                continue
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            data[sheet_name] = _frame(header, rows, columns)
+        return data
+    finally:
+        workbook.close()
+
+
+def read_xls(source, sheets):
+    """Read sheets of a legacy .xls workbook (see read_xlsx)."""
+    with pd.ExcelFile(source) as workbook:
+        data = {}
+        for sheet_name, columns in sheets.items():
+            if sheet_name not in workbook.sheet_names:
+                continue
+            usecols = None if columns is None else (lambda name: name in columns)
+            df = workbook.parse(
+                sheet_name, usecols=usecols, converters={"sub_num": str}
+            )
+            data[sheet_name] = set_dtypes(df)
+        return data
+
+
+def read_sheets(source, sheets, file_name=None):
+    """Read the requested sheets and columns of a participant file.
+
+    Parameters:
+    source -- path or file-like object of the workbook
+    sheets -- dict of sheet name -> list of columns to read (None for all)
+    file_name -- name of the file, used to pick the reader when source is a
+        file-like object. Defaults to source
+    """
+    extension = os.path.splitext(file_name or source)[1].lower()
+    if extension == ".xls":
+        return read_xls(source, sheets)
+    return read_xlsx(source, sheets)
@@ -0,0 +1,165 @@
+"""Scoring of the questionnaire tasks.
+
+The item keys of each questionnaire are read from a csv file in
+enunciados/claves/, with one row per item and scale it counts towards
+(columns item, scale, reverse). A key is turned into an items x scales weight
+matrix, with -1 for reverse-keyed items, so that the scale scores of a whole
+cohort are one matrix product over a subjects x items response array:
+
+    scores = responses @ weights + (min + max) * reversed items per scale
+
+Scales with a missing item are left empty.
+
+The item count and response range of each questionnaire are set by the
+`scoring` of its task in tasks/registry.py. A questionnaire is scored when its
+key file is present, so licensed keys (e.g. NEOPIR.csv or ACS.csv, see the
+README) are turned on by copying them to enunciados/claves/.
+"""
+import os
+import sys
+import collections
+import numpy as np
+import pandas as pd
+
+# The questionnaires are listed in the battery's task registry
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from tasks import registry
+
+KEYS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "enunciados", "claves"
+)
+
+
+class Questionnaire(object):
+    """Scoring settings of a questionnaire.
+
+    Parameters:
+    prefix -- prefix of the score columns in the summary
+    key_file -- name of the key file in KEYS_DIR
+    num_items -- number of items
+    min_value -- lowest response value
+    max_value -- highest response value
+    values -- optional dict mapping recorded responses to numbers
+    """
+
+    def __init__(self, prefix, key_file, num_items, min_value, max_value, values=None):
+        self.prefix = prefix
+        self.key_file = key_file
+        self.num_items = num_items
+        self.min_value = min_value
+        self.max_value = max_value
+        self.values = values
+        self._weights = None
+
+    def load_key(self):
+        """Return the item key as a DataFrame (item, scale, reverse).
+
+        Raises ValueError if the key file does not have these columns or
+        refers to items the questionnaire does not have.
+        """
+        path = os.path.join(KEYS_DIR, self.key_file)
+        key = pd.read_csv(path, comment="#")
+        missing = [c for c in ("item", "scale", "reverse") if c not in key]
+        if missing:
+            raise ValueError(f"{path}: missing columns {missing}")
+        if not key["item"].between(1, self.num_items).all():
+            raise ValueError(f"{path}: items must be 1 to {self.num_items}")
+        return key
+
+    def weights(self):
+        """Return the scale names, the items x scales weights and the offsets."""
+        if self._weights is None:
+            key = self.load_key()
+            scales = list(pd.unique(key["scale"]))
+            reverse = key["reverse"].astype(bool).to_numpy()
+
+            weights = np.zeros((self.num_items, len(scales)))
+            weights[
+                key["item"].to_numpy() - 1, [scales.index(s) for s in key["scale"]]
+            ] = np.where(reverse, -1.0, 1.0)
+
+            # Reverse-keyed items score min + max - x
+            offsets = (self.min_value + self.max_value) * (weights < 0).sum(axis=0)
+            self._weights = scales, weights, offsets
+        return self._weights
+
+    @property
+    def columns(self):
+        """Names of the score columns."""
+        return [f"{self.prefix}_{scale}" for scale in self.weights()[0]]
+
+    def item_responses(self, data):
+        """Return the responses of one subject in item order (NaN if missing).
+
+        Parameters:
+        data -- questionnaire sheet (numero_del_enunciado, respuesta)
+        """
+        responses = data["respuesta"]
+        if self.values is not None:
+            responses = responses.map(self.values)
+        responses = pd.to_numeric(responses, errors="coerce")
+        responses.index = data["numero_del_enunciado"].astype(int)
+        responses = responses[~responses.index.duplicated(keep="last")]
+        return responses.reindex(range(1, self.num_items + 1)).tolist()
+
+    def score(self, responses):
+        """Score a subjects x items response array.
+
+        Returns a subjects x scales array.
+
+        Parameters:
+        responses -- array of item responses, one row per subject
+        """
+        scales, weights, offsets = self.weights()
+        responses = np.asarray(responses, dtype=float).reshape(-1, self.num_items)
+
+        missing = np.isnan(responses)
+        scores = np.where(missing, 0.0, responses) @ weights + offsets
+
+        # Leave scales with missing items empty
+        incomplete = missing.astype(float) @ (weights != 0) > 0
+        scores[incomplete] = np.nan
+        return scores
+
+
+def find_questionnaires():
+    """Return the questionnaires that can be scored, by output sheet name.
+
+    These are the registered tasks with scoring settings whose key file is in
+    KEYS_DIR.
+    """
+    questionnaires = collections.OrderedDict()
+    for spec in registry.get_tasks():
+        if spec.scoring is None:
+            continue
+        if not os.path.exists(os.path.join(KEYS_DIR, spec.scoring["key_file"])):
+            continue
+        questionnaires[spec.sheets[0]] = Questionnaire(**spec.scoring)
+    return questionnaires
+
+
+# Scored questionnaires, by output sheet name. NEO-PI-R and ACS are only
+# scored once verified keys from their published manuals are added
+QUESTIONNAIRES = find_questionnaires()
+
+
+def score_cohort(sheet_name, rows):
+    """Score the responses of many subjects to a questionnaire at once.
+
+    Returns a DataFrame with sub_num and the score columns.
+
+    Parameters:
+    sheet_name -- questionnaire sheet name (see QUESTIONNAIRES)
+    rows -- list of [sub_num] + item responses rows (see item_responses)
+    """
+    questionnaire = QUESTIONNAIRES[sheet_name]
+    columns = ["sub_num"] + questionnaire.columns
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    sub_nums = [row[0] for row in rows]
+    scores = questionnaire.score([row[1:] for row in rows])
+    summary = pd.DataFrame(scores, columns=questionnaire.columns)
+    summary.insert(0, "sub_num", sub_nums)
+    return summary
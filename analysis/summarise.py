@@ -0,0 +1,557 @@
+"""Summarise the data of every participant into one battery_data.csv file.
+
+Sessions are read in any output format of the battery: Excel workbooks
+(streamed, see ingest.py) and the csv, parquet and feather directories (see
+utils/output.py).
+
+Participant files are read and aggregated in parallel, one file per worker
+task. Each worker returns plain rows, and the summary table of each task is
+built once all files have been processed. The rows of each file are cached
+(see cache.py), so later runs only re-score new or modified files.
+
+Usage:
+    python summarise.py <data directory> <output directory> [--workers N]
+        [--cache FILE | --no-cache]
+"""
+import io
+import os
+import sys
+import hashlib
+import argparse
+import concurrent.futures
+import pandas as pd
+
+# The output formats are defined by the battery's utils package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from utils import output, warehouse
+import analysis
+import cache
+import ingest
+import questionnaires
+
+# Default name of the cache database, saved next to battery_data.csv
+CACHE_FILE_NAME = "battery_cache.sqlite"
+
+# Legacy workbooks that are summarised besides the battery's output formats
+LEGACY_EXTENSIONS = (".xls",)
+
+# Columns of each summary table, in merge order
+TABLES = {
+    "info": [
+        "sub_num",
+        "datetime",
+        "condition",
+        "age",
+        "sex",
+        "RA",
+    ],
+    "ant": [
+        "sub_num",
+        "ant_follow_error_rt",
+        "ant_follow_correct_rt",
+        "ant_neutral_rt",
+        "ant_congruent_rt",
+        "ant_incongruent_rt",
+        "ant_neutral_rtsd",
+        "ant_congruent_rtsd",
+        "ant_incongruent_rtsd",
+        "ant_neutral_rtcov",
+        "ant_congruent_rtcov",
+        "ant_incongruent_rtcov",
+        "ant_neutral_correct",
+        "ant_congruent_correct",
+        "ant_incongruent_correct",
+        "ant_nocue_rt",
+        "ant_center_rt",
+        "ant_spatial_rt",
+        "ant_double_rt",
+        "ant_nocue_rtsd",
+        "ant_center_rtsd",
+        "ant_spatial_rtsd",
+        "ant_double_rtsd",
+        "ant_nocue_rtcov",
+        "ant_center_rtcov",
+        "ant_spatial_rtcov",
+        "ant_double_rtcov",
+        "ant_nocue_correct",
+        "ant_center_correct",
+        "ant_spatial_correct",
+        "ant_double_correct",
+        "ant_conflict_intercept",
+        "ant_conflict_slope",
+        "ant_conflict_slope_norm",
+        "ant_alerting_intercept",
+        "ant_alerting_slope",
+        "ant_alerting_slope_norm",
+        "ant_orienting_intercept",
+        "ant_orienting_slope",
+        "ant_orienting_slope_norm",
+    ],
+    "d2": [
+        "sub_num",
+        "d2_tn",
+        "d2_e1",
+        "d2_e2",
+        "d2_e",
+        "d2_tn_e",
+        "d2_e_pct",
+        "d2_cp",
+        "d2_fr",
+    ],
+    "digit": [
+        "sub_num",
+        "digit_correct_count",
+        "digit_correct_prop",
+        "digit_num_items",
+    ],
+    "digits_memorization": [
+        "sub_num",
+        "digits_forward_span",
+        "digits_backward_span",
+        "digits_ascending_span",
+    ],
+    "dual_tracking": [
+        "sub_num",
+        "dual_tracking_distance",
+        "dual_tracking_distancesd",
+        "dual_tracking_concurrent_distance",
+        "dual_tracking_after_distance",
+        "dual_tracking_unrelated_distance",
+        "dual_tracking_concurrent_distancesd",
+        "dual_tracking_after_distancesd",
+        "dual_tracking_unrelated_distancesd",
+    ],
+    "dual_responses": [
+        "sub_num",
+        "dual_hits",
+        "dual_hit_rate",
+        "dual_false_alarms",
+        "dual_false_alarm_rate",
+        "dual_hit_latency",
+    ],
+    "flanker_compat": [
+        "sub_num",
+        "flanker_compat_follow_error_rt",
+        "flanker_compat_follow_correct_rt",
+        "flanker_compat_congruent_rt",
+        "flanker_compat_incongruent_rt",
+        "flanker_compat_congruent_rtsd",
+        "flanker_compat_incongruent_rtsd",
+        "flanker_compat_congruent_rtcov",
+        "flanker_compat_incongruent_rtcov",
+        "flanker_compat_congruent_correct",
+        "flanker_compat_incongruent_correct",
+        "flanker_compat_conflict_intercept",
+        "flanker_compat_conflict_slope",
+        "flanker_compat_conflict_slope_norm",
+    ],
+    "flanker_incompat": [
+        "sub_num",
+        "flanker_incompat_follow_error_rt",
+        "flanker_incompat_follow_correct_rt",
+        "flanker_incompat_congruent_rt",
+        "flanker_incompat_incongruent_rt",
+        "flanker_incompat_congruent_rtsd",
+        "flanker_incompat_incongruent_rtsd",
+        "flanker_incompat_congruent_rtcov",
+        "flanker_incompat_incongruent_rtcov",
+        "flanker_incompat_congruent_correct",
+        "flanker_incompat_incongruent_correct",
+        "flanker_incompat_conflict_intercept",
+        "flanker_incompat_conflict_slope",
+        "flanker_incompat_conflict_slope_norm",
+    ],
+    "flanker_both": None,  # flanker_compat + flanker_incompat
+    "fourfigures": [
+        "sub_num",
+        "fourfigures_part1_rt",
+        "fourfigures_part2_rt",
+        "fourfigures_part3_rt",
+        "fourfigures_part4_rt",
+        "fourfigures_part1_correct",
+        "fourfigures_part2_correct",
+        "fourfigures_part3_correct",
+        "fourfigures_part4_correct",
+        "fourfigures_interference_rt",
+        "fourfigures_interference_correct",
+        "fourfigures_mixing_rt",
+        "fourfigures_mixing_correct",
+        "fourfigures_switch_rt",
+        "fourfigures_switch_correct",
+    ],
+    "ikigai": [
+        "sub_num",
+        "ikigai_worldneed_count",
+        "ikigai_worldneed_1",
+        "ikigai_worldneed_2",
+        "ikigai_worldneed_3",
+        "ikigai_worldneed_4",
+        "ikigai_paidfor_count",
+        "ikigai_paidfor_1",
+        "ikigai_paidfor_2",
+        "ikigai_paidfor_3",
+        "ikigai_paidfor_4",
+    ],
+    "mrt": [
+        "sub_num",
+        "mrt_count",
+        "mrt_prop",
+        "mrt_num_items",
+    ],
+    "pvr": [
+        "sub_num",
+        "pvr_deviation",
+        "pvr_abs_deviation",
+        "pvr_rotation_time",
+    ],
+    "ravens": [
+        "sub_num",
+        "ravens_rt",
+        "ravens_count",
+        "ravens_prop",
+        "ravens_num_items",
+    ],
+    "sart": [
+        "sub_num",
+        "sart_follow_error_rt",
+        "sart_follow_correct_rt",
+        "sart_total_rt",
+        "sart_total_rtsd",
+        "sart_total_rtcov",
+        "sart_frequent_rt",
+        "sart_frequent_rtsd",
+        "sart_frequent_rtcov",
+        "sart_infrequent_rt",
+        "sart_infrequent_rtsd",
+        "sart_infrequent_rtcov",
+        "sart_error_count",
+        " sart_errors_prop",
+        "sart_errors_num_items",
+    ],
+    "sternberg": [
+        "sub_num",
+        "stern_follow_error_rt",
+        "stern_follow_correct_rt",
+        "stern_set_2_rt",
+        "stern_set_6_rt",
+        "stern_set_2_rtsd",
+        "stern_set_6_rtsd",
+        "stern_set_2_rtcov",
+        "stern_set_6_rtcov",
+        "stern_set_2_correct",
+        "stern_set_6_correct",
+        "stern_intercept",
+        "stern_slope",
+        "stern_slope_norm",
+    ],
+}
+TABLES["flanker_both"] = (
+    ["sub_num"] + TABLES["flanker_compat"][1:] + TABLES["flanker_incompat"][1:]
+)
+
+# Aggregate function of each summarised sheet
+SHEET_AGGREGATES = {
+    "ANT": analysis.aggregate_ant,
+    "D2": analysis.aggregate_d2,
+    "Digit span (backwards)": analysis.aggregate_digit_span,
+    "Digits Memorization": analysis.aggregate_digits_memorization,
+    "Dual Task - Responses": analysis.aggregate_dual_task_responses,
+    "Dual Task - Tracking": analysis.aggregate_dual_task_tracking,
+    "Eriksen Flanker": analysis.aggregate_flanker,
+    "FourFigures": analysis.aggregate_fourfigures,
+    "Ikigai": analysis.aggregate_ikigai,
+    "MRT": analysis.aggregate_mrt,
+    "PVR": analysis.aggregate_pvr,
+    "Ravens Matrices": analysis.aggregate_ravens,
+    "SART": analysis.aggregate_sart,
+    "Sternberg": analysis.aggregate_sternberg,
+}
+
+# Summary table of each summarised sheet. The Flanker table depends on the
+# compatibility conditions that were run (see sheet_table)
+SHEET_TABLES = {
+    "ANT": "ant",
+    "D2": "d2",
+    "Digit span (backwards)": "digit",
+    "Digits Memorization": "digits_memorization",
+    "Dual Task - Responses": "dual_responses",
+    "Dual Task - Tracking": "dual_tracking",
+    "Eriksen Flanker": None,
+    "FourFigures": "fourfigures",
+    "Ikigai": "ikigai",
+    "MRT": "mrt",
+    "PVR": "pvr",
+    "Ravens Matrices": "ravens",
+    "SART": "sart",
+    "Sternberg": "sternberg",
+}
+
+# Sheets and columns read from each participant file
+SHEET_COLUMNS = {"info": TABLES["info"]}
+SHEET_COLUMNS.update(
+    (sheet, aggregate.columns) for sheet, aggregate in SHEET_AGGREGATES.items()
+)
+SHEET_COLUMNS.update(
+    (sheet, ["numero_del_enunciado", "respuesta"])
+    for sheet in questionnaires.QUESTIONNAIRES
+)
+
+# Prefix of the rows holding the item responses of a questionnaire, which are
+# scored for all subjects at once in build_summary()
+QUESTIONNAIRE_ROWS = "items:"
+
+
+def configure_pandas():
+    """Enable Copy-on-Write on the pandas versions where it is optional.
+
+    Column selections, filters and assign() then share memory with the
+    source frame instead of copying it. It is always on from pandas 3.0.
+    """
+    version = tuple(int(v) for v in pd.__version__.split(".")[:2])
+    if (1, 5) <= version < (3, 0):
+        pd.set_option("mode.copy_on_write", True)
+
+
+def sheet_table(sheet, data):
+    """Return the summary table a sheet is aggregated into.
+
+    Parameters:
+    sheet -- sheet name (see SHEET_AGGREGATES)
+    data -- the sheet
+    """
+    if sheet != "Eriksen Flanker":
+        return SHEET_TABLES[sheet]
+
+    compat_conditions = data["compatibility"].unique()
+    if len(compat_conditions) == 1 and compat_conditions[0] == "compatible":
+        return "flanker_compat"
+    elif len(compat_conditions) == 1 and compat_conditions[0] == "incompatible":
+        return "flanker_incompat"
+    return "flanker_both"
+
+
+def summarise_sheets(sub):
+    """Aggregate the sheets of one participant.
+
+    Returns a dict of summary table name -> row (list of values).
+
+    Parameters:
+    sub -- dict of sheet name -> DataFrame
+    """
+    info = sub["info"]
+    sub_num = info.loc[0, "sub_num"]
+    try:
+        condition = int(info.loc[0, "condition"])
+    except (TypeError, ValueError):
+        condition = info.loc[0, "condition"]
+
+    rows = {
+        "info": [
+            sub_num,
+            info.loc[0, "datetime"],
+            condition,
+            int(info.loc[0, "age"]),
+            info.loc[0, "sex"],
+            info.loc[0, "RA"],
+        ]
+    }
+
+    for task, data in sub.items():
+        if task in SHEET_AGGREGATES:
+            # ANT, Flanker and Sternberg are summarised over all responses
+            rows[sheet_table(task, data)] = SHEET_AGGREGATES[task](data, sub_num)
+        elif task in questionnaires.QUESTIONNAIRES:
+            questionnaire = questionnaires.QUESTIONNAIRES[task]
+            rows[QUESTIONNAIRE_ROWS + task] = [sub_num] + questionnaire.item_responses(
+                data
+            )
+
+    return rows
+
+
+def read_file(path):
+    """Read the summarised sheets of a participant file (see SHEET_COLUMNS).
+
+    Returns a dict of sheet name -> DataFrame and the SHA-256 hex digest of
+    the file content.
+    """
+    if os.path.isdir(path):
+        # Directory formats (csv, parquet, feather)
+        sheets = {}
+        for sheet_name, df in output.read(path).items():
+            columns = SHEET_COLUMNS.get(sheet_name)
+            if columns is None or not isinstance(df, pd.DataFrame):
+                continue
+            df = df[[column for column in columns if column in df.columns]]
+            sheets[sheet_name] = ingest.set_dtypes(df.copy())
+        return sheets, cache.file_hash(path)
+
+    with open(path, "rb") as f:
+        content = f.read()
+    sha256 = hashlib.sha256(content).hexdigest()
+    sheets = ingest.read_sheets(io.BytesIO(content), SHEET_COLUMNS, file_name=path)
+    return sheets, sha256
+
+
+def summarise_file(path):
+    """Read and aggregate one participant file (run in a worker process).
+
+    Returns a (rows, sha256, error) tuple: the summary rows (see
+    summarise_sheets) or None, the digest of the file content, and the error
+    message if the file could not be summarised.
+    """
+    try:
+        sub, sha256 = read_file(path)
+        return summarise_sheets(sub), sha256, None
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+
+
+def data_files(dir_data):
+    """Return the sorted paths of the participant sessions in a directory.
+
+    Sessions saved in any output format are found, as in the warehouse (see
+    utils.warehouse.find_sessions), plus legacy .xls workbooks.
+    """
+    legacy = [
+        os.path.join(dir_data, f)
+        for f in os.listdir(dir_data)
+        if f.endswith(LEGACY_EXTENSIONS) and not f.startswith("~$")
+    ]
+    return sorted(warehouse.find_sessions(dir_data) + legacy)
+
+
+def build_summary(rows):
+    """Merge the summary rows of all participants into one DataFrame.
+
+    Parameters:
+    rows -- dict of summary table name -> list of rows
+    """
+    tables = {
+        name: pd.DataFrame(rows.get(name, []), columns=columns)
+        for name, columns in TABLES.items()
+    }
+
+    # Questionnaire scores, one matrix product per questionnaire
+    for sheet in questionnaires.QUESTIONNAIRES:
+        tables[sheet] = questionnaires.score_cohort(
+            sheet, rows.get(QUESTIONNAIRE_ROWS + sheet, [])
+        )
+
+    # Only merge tasks that were used
+    all_data = tables.pop("info")
+    for task in tables.values():
+        if task.shape[0] != 0:
+            all_data = all_data.merge(task, on="sub_num", how="left")
+
+    return all_data.sort_values("sub_num").reset_index(drop=True)
+
+
+def summarise(dir_data, output_file, workers=None, cache_file=None):
+    """Summarise all participant files in a directory into a csv file.
+
+    Returns the summary DataFrame.
+
+    Parameters:
+    dir_data -- directory with the participant files
+    output_file -- path of the csv file to write
+    workers -- number of worker processes. Defaults to the number of CPUs
+    cache_file -- path of the cache database. None disables the cache
+    """
+    configure_pandas()
+    files = [os.path.abspath(path) for path in data_files(dir_data)]
+    rows = {name: [] for name in TABLES}
+
+    summary_cache = None
+    if cache_file is not None:
+        summary_cache = cache.SummaryCache(
+            cache_file,
+            cache.code_version(
+                analysis, cache, ingest, output, questionnaires, sys.modules[__name__]
+            ),
+        )
+
+    # Files whose rows are not cached are scored by the workers
+    file_rows = {}
+    stats = {path: cache.session_stat(path) for path in files}
+    pending = []
+    for path in files:
+        cached = summary_cache.get(path, stats[path]) if summary_cache else None
+        if cached is None:
+            pending.append(path)
+        else:
+            file_rows[path] = cached
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(pending) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=configure_pandas
+        ) as pool:
+            results = pool.map(summarise_file, pending, chunksize=chunksize)
+            for path, (sub_rows, sha256, error) in zip(pending, results):
+                if error is not None:
+                    print(
+                        "Error summarizing {}: {}".format(os.path.basename(path), error)
+                    )
+                    continue
+
+                print("Summarizing {}".format(os.path.basename(path)))
+                file_rows[path] = sub_rows
+                if summary_cache is not None:
+                    summary_cache.put(path, stats[path], sha256, sub_rows)
+
+    print(
+        "Summarized {} files ({} from cache)".format(
+            len(file_rows), len(files) - len(pending)
+        )
+    )
+
+    if summary_cache is not None:
+        summary_cache.prune(files)
+        summary_cache.close()
+
+    for path in files:
+        for name, row in file_rows.get(path, {}).items():
+            rows.setdefault(name, []).append(row)
+
+    all_data = build_summary(rows)
+    all_data.to_csv(output_file, index=False, sep=",")
+    return all_data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Summarise participant data files into battery_data.csv."
+    )
+    parser.add_argument("data_dir", help="directory with the participant files")
+    parser.add_argument("output_dir", help="directory where battery_data.csv is saved")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help=f"cache database (default: {CACHE_FILE_NAME} in the output directory)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="re-score every file"
+    )
+    args = parser.parse_args(argv)
+
+    cache_file = None
+    if not args.no_cache:
+        cache_file = args.cache or os.path.join(args.output_dir, CACHE_FILE_NAME)
+
+    summarise(
+        args.data_dir,
+        os.path.join(args.output_dir, "battery_data.csv"),
+        workers=args.workers,
+        cache_file=cache_file,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,29 +7,10 @@ import pygame
 import pandas as pd
 
 from PyQt5 import QtCore, QtGui, QtWidgets
-from utils import display, values
+from utils import display, events, fonts, journal, output, performance, values
 from designer import battery_window_qt
-from interface import about_dialog, update_dialog, settings_window
-from tasks import (
-    ant,
-    flanker,
-    mrt,
-    sart,
-    ravens,
-    digitspan_backwards,
-    digits_memorization,
-    sternberg,
-    neopir,
-    d2,
-    dual_task,
-    pvr,
-    acs,
-    riasec,
-    inteligencia_multiple,
-    ikigai,
-    srq20,
-    fourfigures,
-)
+from interface import about_dialog, update_dialog, settings_window, export_worker
+from tasks import registry
 
 
 class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery):
@@ -92,6 +73,18 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         if not os.path.isdir(self.dataPath):
             os.makedirs(self.dataPath)
 
+        # Session data is exported in the background, one session at a time,
+        # so the next participant can be set up while the file is written
+        self.export_pool = QtCore.QThreadPool()
+        self.export_pool.setMaxThreadCount(1)
+        self.pending_exports = {}  # output file -> export worker
+
+        self.exportProgress = QtWidgets.QProgressBar()
+        self.exportProgress.setMaximumWidth(150)
+        self.exportProgress.setTextVisible(False)
+        self.exportProgress.hide()
+        self.statusbar.addPermanentWidget(self.exportProgress)
+
         # Handle menu bar item click events
         self.actionExit.triggered.connect(self.close)
         self.actionSettings.triggered.connect(self.show_settings)
@@ -104,6 +97,16 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         self.actionCheck_for_updates.triggered.connect(self.show_update)
         self.actionAbout.triggered.connect(self.show_about)
 
+        # Add tasks registered by other packages to the task list
+        listed_tasks = [
+            self.taskList.item(index).text() for index in range(self.taskList.count())
+        ]
+        for task_spec in registry.get_tasks():
+            if task_spec.name not in listed_tasks:
+                item = QtWidgets.QListWidgetItem(task_spec.name)
+                item.setCheckState(QtCore.Qt.Unchecked)
+                self.taskList.addItem(item)
+
         # Bind button events
         self.cancelButton.clicked.connect(self.close)
         self.startButton.clicked.connect(self.start)
@@ -136,6 +139,17 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         self.settings.setValue("width", self.settings.value("width", 1280))
         self.settings.setValue("height", self.settings.value("height", 1024))
         self.settings.setValue("taskBeep", self.settings.value("taskBeep", "true"))
+        self.settings.setValue(
+            "outputFormat",
+            self.settings.value("outputFormat", output.DEFAULT_FORMAT),
+        )
+        self.settings.setValue(
+            "performanceLog", self.settings.value("performanceLog", "false")
+        )
+        self.settings.setValue(
+            "performanceAllocations",
+            self.settings.value("performanceAllocations", "false"),
+        )
         self.settings.endGroup()
 
         # Settings - Attention Network Test
@@ -233,6 +247,43 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
     def error_dialog(self, message):
         QtWidgets.QMessageBox.warning(self, "Error", message)
 
+    def export_session(self, journal_file, output_file, writer):
+        """Write the output of a session from its journal in the background."""
+        worker = export_worker.ExportWorker(journal_file, output_file, writer)
+        worker.signals.progress.connect(self.export_progress)
+        worker.signals.finished.connect(self.export_finished)
+        worker.signals.error.connect(
+            lambda kept, message: self.export_failed(output_file, kept, message)
+        )
+        self.pending_exports[output_file] = worker
+
+        self.exportProgress.setRange(0, 0)
+        self.exportProgress.show()
+        self.statusbar.showMessage(f"Saving {os.path.basename(output_file)}...")
+        self.export_pool.start(worker)
+
+    def export_progress(self, done, total):
+        self.exportProgress.setRange(0, total)
+        self.exportProgress.setValue(done)
+
+    def export_finished(self, output_file):
+        self.pending_exports.pop(output_file, None)
+        self.statusbar.showMessage(f"Saved {os.path.basename(output_file)}", 10000)
+        if not self.pending_exports:
+            self.exportProgress.hide()
+        print("--- Data saved to", output_file)
+
+    def export_failed(self, output_file, journal_file, message):
+        self.pending_exports.pop(output_file, None)
+        self.statusbar.showMessage(f"Error saving {os.path.basename(output_file)}")
+        if not self.pending_exports:
+            self.exportProgress.hide()
+        print("Error writing Excel:", message)
+        self.error_dialog(
+            f"Error al guardar datos: {message}\n\n"
+            f"Los datos siguen en {journal_file}"
+        )
+
     def random_order_selected(self):
         if self.randomOrderCheck.isChecked():
             self.upButton.setEnabled(False)
@@ -285,6 +336,18 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         else:
             self.task_beep = False
 
+        self.output_format = str(self.settings.value("outputFormat"))
+
+        if self.settings.value("performanceLog") == "true":
+            self.performance_log = True
+        else:
+            self.performance_log = False
+
+        if self.settings.value("performanceAllocations") == "true":
+            self.performance_allocations = True
+        else:
+            self.performance_allocations = False
+
         self.settings.endGroup()
 
         # ANT settings
@@ -325,6 +388,11 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         self.settings.setValue("pos", self.pos())
         self.settings.endGroup()
 
+        # Let pending exports finish, otherwise their data stays in the journal
+        if self.pending_exports:
+            self.statusbar.showMessage("Saving session data...")
+            self.export_pool.waitForDone()
+
         event.accept()
         sys.exit(0)  # This closes any open pygame windows
 
@@ -388,26 +456,49 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                 ],
             )
 
+            # Read settings (including the output format) before building the filename
+            self.get_settings()
+            try:
+                writer = output.get_writer(self.output_format)
+            except ValueError as e:
+                self.error_dialog(str(e))
+                return
+
             # Build the output filename first (using sorted task names for deterministic ordering)
-            # Format: {sub_num}-{tasks}.xlsx
+            # Format: {sub_num}-{tasks}.xlsx (or the extension of the output format)
             # Sanitize sub_num to remove filesystem-unsafe characters
             safe_sub_num = re.sub(r'[/\\:*?"<>|]', "_", sub_num)
             tasks_sorted = sorted(selected_tasks)
             tasks_str = ", ".join(tasks_sorted)
-            data_file_name = f"{safe_sub_num}-{tasks_str}.xlsx"
-            output_file = os.path.join(self.dataPath, data_file_name)
+            output_file = writer.output_path(
+                os.path.join(self.dataPath, f"{safe_sub_num}-{tasks_str}")
+            )
+            data_file_name = os.path.basename(output_file)
+            session_journal = journal.journal_path(output_file)
 
             # Block execution only when the exact output file already exists
-            if os.path.exists(output_file):
+            if output_file in self.pending_exports:
+                self.error_dialog(
+                    f"The data of a previous session is still being saved to:\n"
+                    f"{data_file_name}\n\n"
+                    "Choose a different subject number or task combination."
+                )
+            elif os.path.exists(output_file):
                 self.error_dialog(
                     f"Output file already exists:\n{data_file_name}\n\n"
                     "Choose a different subject number or task combination."
                 )
+            elif os.path.exists(session_journal):
+                self.error_dialog(
+                    "A journal from an interrupted session already exists:\n"
+                    f"{os.path.basename(session_journal)}\n\n"
+                    "Recover it with 'python -m utils.journal <data folder>' "
+                    "or choose a different subject number or task combination."
+                )
             else:
 
-                # Minimizar UI y obtener ajustes antes de ejecutar tareas
+                # Minimizar UI antes de ejecutar tareas
                 self.showMinimized()
-                self.get_settings()
 
                 # Posicionar ventana pygame en esquina superior izquierda para pantalla completa
                 if not self.task_fullscreen:
@@ -428,14 +519,14 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
 
                 # Crear ventana pygame usando resolución completa de pantalla
                 if self.task_fullscreen:
-                    self.pygame_screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+                    self.pygame_screen = display.set_mode((0, 0), pygame.FULLSCREEN)
                 else:
                     if self.task_borderless:
-                        self.pygame_screen = pygame.display.set_mode(
+                        self.pygame_screen = display.set_mode(
                             (self.res_width, self.res_height), pygame.NOFRAME
                         )
                     else:
-                        self.pygame_screen = pygame.display.set_mode(
+                        self.pygame_screen = display.set_mode(
                             (self.res_width, self.res_height)
                         )
 
@@ -445,6 +536,16 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                 # Ejecutar tasks y guardar DataFrames en memoria
                 results = {}  # diccionario: sheet_name -> DataFrame
 
+                # Every trial and finished task is also written to the journal,
+                # so nothing is lost if the session is interrupted
+                journal.start_session(session_journal)
+                journal.record_sheet("info", subject_info)
+                journaled_sheets = set()
+
+                # Medir la calidad temporal de la sesión (opcional)
+                if self.performance_log:
+                    performance.start(self.performance_allocations)
+
                 for task_index, task in enumerate(selected_tasks):
                     # Show transition screen before each task except the first
                     if task_index > 0:
@@ -459,131 +560,58 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                         screen_w = self.pygame_screen.get_width()
                         screen_h = self.pygame_screen.get_height()
                         # Wrap and center transition message
-                        words = trans_text.split()
-                        lines = []
-                        current_line = []
-                        max_w = screen_w - 160
-                        for word in words:
-                            test = " ".join(current_line + [word])
-                            if font_trans.size(test)[0] <= max_w:
-                                current_line.append(word)
-                            else:
-                                if current_line:
-                                    lines.append(" ".join(current_line))
-                                current_line = [word]
-                        if current_line:
-                            lines.append(" ".join(current_line))
-                        line_h = 50
-                        total_h = len(lines) * line_h
-                        y0 = (screen_h - total_h) // 2
-                        for li, ln in enumerate(lines):
-                            surf = font_trans.render(ln, True, (0, 0, 0))
-                            x0 = (screen_w - surf.get_width()) // 2
-                            self.pygame_screen.blit(surf, (x0, y0 + li * line_h))
-                        pygame.display.flip()
+                        paragraph = fonts.layout(
+                            font_trans, trans_text, screen_w - 160, 50, "center"
+                        )
+                        paragraph.blit(
+                            self.pygame_screen,
+                            (screen_w - paragraph.width) // 2,
+                            (screen_h - paragraph.height) // 2,
+                        )
+                        display.flip()
                         # Wait for key 0
                         waiting_transition = True
                         pygame.event.clear()
                         while waiting_transition:
-                            for ev in pygame.event.get():
+                            for ev in events.wait():
                                 if ev.type == pygame.KEYDOWN:
                                     if ev.key == pygame.K_0 or ev.key == pygame.K_KP0:
                                         waiting_transition = False
                                     elif ev.key == pygame.K_F12:
                                         sys.exit(0)
 
-                    if task == "Attention Network Test (ANT)":
-                        ant_task = ant.ANT(self.pygame_screen, background, blocks=self.ant_blocks)
-                        ant_data = ant_task.run()
-                        results["ANT"] = ant_data
-                    elif task == "Digit Span (backwards)":
-                        ds_task = digitspan_backwards.DigitspanBackwards(self.pygame_screen, background)
-                        ds_data = ds_task.run()
-                        results["Digit span (backwards)"] = ds_data
-                    elif task == "Digits Memorization":
-                        dm_task = digits_memorization.DigitsMemorization(self.pygame_screen, background)
-                        dm_data = dm_task.run()
-                        results["Digits Memorization"] = dm_data
-                    elif task == "Eriksen Flanker Task":
-                        flanker_task = flanker.Flanker(
-                            self.pygame_screen,
-                            background,
-                            self.flanker_dark_mode,
-                            self.flanker_sets_practice,
-                            self.flanker_sets_main,
-                            self.flanker_blocks_compat,
-                            self.flanker_blocks_incompat,
-                            self.flanker_block_order,
-                        )
-                        flanker_data = flanker_task.run()
-                        results["Eriksen Flanker"] = flanker_data
-                    elif task == "Mental Rotation Task":
-                        mrt_task = mrt.MRT(self.pygame_screen, background)
-                        mrt_data = mrt_task.run()
-                        results["MRT"] = mrt_data
-                    elif task == "Raven's Progressive Matrices":
-                        ravens_task = ravens.Ravens(
-                            self.pygame_screen,
-                            background
-                        )
-                        ravens_data = ravens_task.run()
-                        results["Ravens Matrices"] = ravens_data
-                    elif task == "Sternberg Task":
-                        sternberg_task = sternberg.Sternberg(
-                            self.pygame_screen, background, blocks=self.sternberg_blocks
-                        )
-                        sternberg_data = sternberg_task.run()
-                        results["Sternberg"] = sternberg_data
-                    elif task == "Sustained Attention to Response Task (SART)":
-                        sart_task = sart.SART(self.pygame_screen, background)
-                        sart_data = sart_task.run()
-                        results["SART"] = sart_data
-                    elif task == "NEO-PI-R":
-                        neopir_task = neopir.NeoPiR(self.pygame_screen, background)
-                        neopir_data = neopir_task.run()
-                        results["NEO-PI-R"] = neopir_data
-                    elif task == "ACS":
-                        acs_task = acs.ACS(self.pygame_screen, background)
-                        acs_data = acs_task.run()
-                        results["ACS"] = acs_data
-                    elif task == "RIASEC":
-                        riasec_task = riasec.RIASEC(self.pygame_screen, background)
-                        riasec_data = riasec_task.run()
-                        results["RIASEC"] = riasec_data
-                    elif task == "Inteligencia Multiple":
-                        im_task = inteligencia_multiple.InteligenciaMultiple(self.pygame_screen, background)
-                        im_data = im_task.run()
-                        results["Inteligencia Multiple"] = im_data
-                    elif task == "Ikigai":
-                        ikigai_task = ikigai.Ikigai(self.pygame_screen, background)
-                        ikigai_data = ikigai_task.run()
-                        results["Ikigai"] = ikigai_data
-                    elif task == "SRQ20":
-                        srq20_task = srq20.SRQ20(self.pygame_screen, background)
-                        srq20_data = srq20_task.run()
-                        results["SRQ20"] = srq20_data
-                    elif task == "D2 (Test de atención y concentración)":
-                        d2_task = d2.D2(self.pygame_screen, background)
-                        d2_data = d2_task.run()
-                        results["D2"] = d2_data
-                    elif task == "Dual Task":
-                        dt_task = dual_task.DualTask(self.pygame_screen, background)
-                        dt_data = dt_task.run()
-                        results["Dual Task - Tracking"] = dt_data["tracking"]
-                        results["Dual Task - Responses"] = dt_data["responses"]
-                    elif task == "Relative Verticality Perception (PVR)":
-                        pvr_task = pvr.PVR(self.pygame_screen, background)
-                        pvr_data = pvr_task.run()
-                        results["PVR"] = pvr_data
-                    elif task == "FourFigures":
-                        fourfigures_task = fourfigures.FourFigures(self.pygame_screen, background)
-                        fourfigures_data = fourfigures_task.run()
-                        results["FourFigures"] = fourfigures_data
+                    # Importar y ejecutar la tarea seleccionada
+                    task_spec = registry.get_task(task)
+                    performance.start_task(task)
+                    results.update(
+                        task_spec.run(self.pygame_screen, background, self)
+                    )
+                    performance.end_task()
+
+                    # Journal the data of the finished task
+                    for sheet_name, df in results.items():
+                        if sheet_name not in journaled_sheets:
+                            journal.record_sheet(sheet_name, df)
+                            journaled_sheets.add(sheet_name)
 
                     # Play beep after each task
                     if self.task_beep:
                         beep_sound.play()
 
+                # Guardar el informe de calidad temporal como hoja aparte
+                performance_data = performance.stop()
+                if performance_data is not None:
+                    results[performance.SHEET] = performance_data
+                    journal.record_sheet(performance.SHEET, performance_data)
+                    for line in performance.report(performance_data):
+                        print(line)
+                    text_stats = fonts.stats()
+                    if text_stats["hit_rate"] is not None:
+                        print(
+                            f"Text cache: {text_stats['hit_rate']:.1%} hit rate "
+                            f"({text_stats['misses']} surfaces rendered)"
+                        )
+
                 # Fin de experimentos en pantalla (igual que antes)
                 pygame.display.set_caption("Cognitive Battery")
                 pygame.mouse.set_visible(1)
@@ -591,32 +619,23 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                 self.pygame_screen.blit(background, (0, 0))
                 font = pygame.font.SysFont("arial", 30)
                 display.text(self.pygame_screen, font, "End of Experiment", "center", "center")
-                pygame.display.flip()
+                display.flip()
                 display.wait_for_space()
 
                 # Quit pygame antes de abrir/escribir el archivo Excel
                 pygame.quit()
+                # Las superficies guardadas dependen de la ventana cerrada
+                fonts.clear()
 
-                # Ahora sí: escribir el archivo Excel (abrir writer al final, fuera del contexto pygame)
-                try:
-                    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-                        # Guardar info del sujeto
-                        subject_info.to_excel(writer, sheet_name="info", index=False)
-
-                        # Guardar cada resultado en una hoja distinta
-                        for sheet_name, df in results.items():
-                            # Verifica que df sea un DataFrame válido antes de escribir
-                            if isinstance(df, pd.DataFrame):
-                                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                            else:
-                                # si por alguna razón la task devolvió None, crear hoja vacía o anotar
-                                pd.DataFrame({"note": [f"No data for {sheet_name}"]}).to_excel(
-                                    writer, sheet_name=sheet_name, index=False
-                                )
-                except Exception as e:
-                    # Si algo sale mal al guardar, mostrar diálogo y registrar el error
-                    self.error_dialog(f"Error al guardar datos: {e}")
-                    print("Error writing Excel:", e)
+                # Construir el archivo Excel a partir del journal en segundo plano.
+                # El journal solo se borra si el archivo se ha escrito bien
+                journal.end_session()
+                self.export_session(session_journal, output_file, writer)
 
                 print("--- Experiment complete")
-                self.close()
\ No newline at end of file
+
+                # Dejar la ventana lista para el siguiente participante
+                self.subNumBox.clear()
+                self.ageBox.clear()
+                self.showNormal()
+                self.activateWindow()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import traceback
+
+from PyQt5 import QtCore
+from utils import journal
+
+
+class ExportSignals(QtCore.QObject):
+    """Signals emitted by an ExportWorker.
+
+    progress -- (sheets written, total sheets)
+    finished -- path of the written output file
+    error -- (path of the journal that was kept, error message)
+    """
+
+    progress = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal(str)
+    error = QtCore.pyqtSignal(str, str)
+
+
+class ExportWorker(QtCore.QRunnable):
+    """Build the output file of a session from its journal on a worker thread.
+
+    The journal is only deleted once the output file has been written, so if
+    the export fails the session data is still on disk and can be recovered.
+
+    Parameters:
+    journal_file -- path of the session journal
+    output_file -- path of the output file to write
+    writer -- utils.output.OutputWriter used to write it
+    """
+
+    def __init__(self, journal_file, output_file, writer):
+        super(ExportWorker, self).__init__()
+        self.journal_file = journal_file
+        self.output_file = output_file
+        self.writer = writer
+        self.signals = ExportSignals()
+
+    def run(self):
+        try:
+            journal.finalise(
+                self.journal_file,
+                self.output_file,
+                progress=self.signals.progress.emit,
+                writer=self.writer,
+            )
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(self.journal_file, str(e))
+        else:
+            self.signals.finished.emit(self.output_file)
@@ -1,4 +1,16 @@
-from .ravens import Ravens
-from .d2 import D2
+import importlib
+
+# Task classes are imported on first access (e.g. `from tasks import Ravens`)
+# so that importing the package does not load every task module
+_lazy_classes = {
+    "Ravens": "tasks.ravens",
+    "D2": "tasks.d2",
+}
 
 __all__ = ['Ravens', 'D2']
+
+
+def __getattr__(name):
+    if name in _lazy_classes:
+        return getattr(importlib.import_module(_lazy_classes[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,12 @@
 import os
 import sys
-import time
 import pandas as pd
 import numpy as np
 import pygame
 
 from pygame.locals import *
 from itertools import product
-from utils import display
+from utils import assets, display, journal, performance, responses, scheduler, timing
 
 
 class ANT(object):
@@ -79,6 +78,14 @@ class ANT(object):
         self.flanker_h = self.img_left_incongruent.get_rect().height
         self.fixation_h = self.img_fixation.get_rect().height
 
+        # Every stimulus frame is composed before the first trial
+        self.stimuli = assets.StimulusSet(self.screen, self.background)
+        self.build_stimuli()
+
+        # Stimulus durations are presented as whole screen refreshes
+        self.scheduler = scheduler.FrameScheduler()
+        self.responses = responses.ResponseCapture(keys={K_LEFT: "left", K_RIGHT: "right"})
+
         # Create output dataframe
         self.all_data = pd.DataFrame()
 
@@ -109,35 +116,60 @@ class ANT(object):
 
         return cur_block
 
-    def display_flanker(self, flanker_type, location, direction):
+    def flanker_image(self, flanker_type, direction):
         # Left flanker
         if direction == "left":
             if flanker_type == "congruent":
-                stimulus = self.img_left_congruent
+                return self.img_left_congruent
             elif flanker_type == "incongruent":
-                stimulus = self.img_left_incongruent
-            else:
-                stimulus = self.img_left_neutral
+                return self.img_left_incongruent
+            return self.img_left_neutral
         # Right flanker
-        else:
-            if flanker_type == "congruent":
-                stimulus = self.img_right_congruent
-            elif flanker_type == "incongruent":
-                stimulus = self.img_right_incongruent
-            else:
-                stimulus = self.img_right_neutral
-
-        # Offset the flanker stimulus to above/below fixation
-        if location == "top":
-            display.image(
-                self.screen,
-                stimulus,
-                "center",
-                self.screen_y / 2.1 - self.flanker_h - self.TARGET_OFFSET,
+        if flanker_type == "congruent":
+            return self.img_right_congruent
+        elif flanker_type == "incongruent":
+            return self.img_right_incongruent
+        return self.img_right_neutral
+
+    def build_stimuli(self):
+        """Compose every fixation, cue and target frame before the trials."""
+        fixation = (self.img_fixation, "center", "center")
+        cue_y = {
+            "top": self.screen_y / 2 - self.fixation_h - self.TARGET_OFFSET,
+            "bottom": self.screen_y / 2 + self.TARGET_OFFSET,
+        }
+        # Flankers are offset to above/below fixation
+        flanker_y = {
+            "top": self.screen_y / 2.1 - self.flanker_h - self.TARGET_OFFSET,
+            "bottom": self.screen_y / 1.9 + self.TARGET_OFFSET,
+        }
+
+        self.stimuli.add("fixation", [fixation])
+        self.stimuli.add(("cue", "nocue"), [fixation])
+        self.stimuli.add(("cue", "center"), [(self.img_cue, "center", "center")])
+        self.stimuli.add(
+            ("cue", "double"),
+            [fixation] + [(self.img_cue, "center", y) for y in cue_y.values()],
+        )
+        for location in self.LOCATION_LEVELS:
+            self.stimuli.add(
+                ("cue", "spatial", location),
+                [fixation, (self.img_cue, "center", cue_y[location])],
             )
-        elif location == "bottom":
-            display.image(
-                self.screen, stimulus, "center", self.screen_y / 1.9 + self.TARGET_OFFSET
+
+        for congruency, location, direction in product(
+            self.CONGRUENCY_LEVELS, self.LOCATION_LEVELS, self.DIRECTION_LEVELS
+        ):
+            self.stimuli.add(
+                ("target", congruency, location, direction),
+                [
+                    fixation,
+                    (
+                        self.flanker_image(congruency, direction),
+                        "center",
+                        flanker_y[location],
+                    ),
+                ],
             )
 
     def display_trial(self, trial_num, data, trial_type):
@@ -146,111 +178,56 @@ class ANT(object):
             if event.type == KEYDOWN and event.key == K_F12:
                 sys.exit(0)
 
+        self.scheduler.dropped_frames = 0
+
         # Display fixation
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-        pygame.display.flip()
+        self.stimuli.draw("fixation")
+        fixation_onset = self.scheduler.flip()
 
-        display.wait(data["fixationTime"][trial_num])
+        self.scheduler.hold(fixation_onset, data["fixationTime"][trial_num])
 
         # Display cue
-        self.screen.blit(self.background, (0, 0))
-
         cue_type = data["cue"][trial_num]
-
-        if cue_type == "nocue":
-            # Display fixation in the center
-            display.image(self.screen, self.img_fixation, "center", "center")
-        elif cue_type == "center":
-            # Display cue in the center
-            display.image(self.screen, self.img_cue, "center", "center")
-        elif cue_type == "double":
-            # Display fixation in the center
-            display.image(self.screen, self.img_fixation, "center", "center")
-
-            # Display cue above and below fixation
-            display.image(
-                self.screen,
-                self.img_cue,
-                "center",
-                self.screen_y / 2 - self.fixation_h - self.TARGET_OFFSET,
-            )
-            display.image(
-                self.screen,
-                self.img_cue,
-                "center",
-                self.screen_y / 2 + self.TARGET_OFFSET,
-            )
-        elif cue_type == "spatial":
-            cue_location = data["location"][trial_num]
-
-            # Display fixation in the center
-            display.image(self.screen, self.img_fixation, "center", "center")
-
-            # Display cue at target location
-            if cue_location == "top":
-                display.image(
-                    self.screen,
-                    self.img_cue,
-                    "center",
-                    self.screen_y / 2 - self.fixation_h - self.TARGET_OFFSET,
-                )
-            elif cue_location == "bottom":
-                display.image(
-                    self.screen,
-                    self.img_cue,
-                    "center",
-                    self.screen_y / 2 + self.TARGET_OFFSET,
-                )
-
-        pygame.display.flip()
+        if cue_type == "spatial":
+            # Cue at target location
+            self.stimuli.draw(("cue", cue_type, data["location"][trial_num]))
+        else:
+            self.stimuli.draw(("cue", cue_type))
+        cue_onset = self.scheduler.flip()
 
         # Display cue for certain duration
-        display.wait(self.CUE_DURATION)
+        self.scheduler.hold(cue_onset, self.CUE_DURATION)
 
         # Prestim interval with fixation
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-        pygame.display.flip()
+        self.stimuli.draw("fixation")
+        cue_offset = self.scheduler.flip()
 
-        display.wait(self.PRE_STIM_FIXATION_DURATION)
+        self.scheduler.hold(cue_offset, self.PRE_STIM_FIXATION_DURATION)
 
         # Display flanker target
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-
-        self.display_flanker(
-            data["congruency"][trial_num],
-            data["location"][trial_num],
-            data["direction"][trial_num],
+        self.stimuli.draw(
+            (
+                "target",
+                data["congruency"][trial_num],
+                data["location"][trial_num],
+                data["direction"][trial_num],
+            )
         )
-        pygame.display.flip()
-
-        start_time = int(round(time.time() * 1000))
+        target_onset = self.scheduler.flip()
 
         # Clear the event queue before checking for responses
-        pygame.event.clear()
-        response = "NA"
-        wait_response = True
-        while wait_response:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_LEFT:
-                    response = "left"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_RIGHT:
-                    response = "right"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_F12:
-                    sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
-
-            # If time limit has been reached, consider it a missed trial
-            if end_time - start_time >= self.FLANKER_DURATION:
-                wait_response = False
+        self.responses.clear()
+        press = self.responses.wait(target_onset + timing.ms_to_ns(self.FLANKER_DURATION))
+
+        # If time limit has been reached, consider it a missed trial
+        if press is None:
+            response = "NA"
+            rt = self.FLANKER_DURATION
+        else:
+            response = press[0]
+            rt = responses.rt(target_onset, press[1])
 
         # Store reaction time and response
-        rt = int(round(time.time() * 1000)) - start_time
         data.at[trial_num, "RT"] = rt
         data.at[trial_num, "response"] = response
 
@@ -268,14 +245,20 @@ class ANT(object):
                 display.text(
                     self.screen, self.font, "incorrecto", "center", "center", (255, 0, 0)
                 )
-            pygame.display.flip()
+            display.flip()
 
             display.wait(self.FEEDBACK_DURATION)
 
         # Display fixation during ITI
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-        pygame.display.flip()
+        self.stimuli.draw("fixation")
+        target_offset = self.scheduler.flip()
+
+        # Measured stimulus timing, in ms since the start of the task
+        data.at[trial_num, "cueOnset"] = self.scheduler.elapsed_ms(cue_onset)
+        data.at[trial_num, "cueOffset"] = self.scheduler.elapsed_ms(cue_offset)
+        data.at[trial_num, "targetOnset"] = self.scheduler.elapsed_ms(target_onset)
+        data.at[trial_num, "targetOffset"] = self.scheduler.elapsed_ms(target_offset)
+        data.at[trial_num, "droppedFrames"] = self.scheduler.dropped_frames
 
         iti = self.ITI_MAX - rt - data["fixationTime"][trial_num]
         data.at[trial_num, "ITI"] = iti
@@ -288,6 +271,10 @@ class ANT(object):
         for i in range(cur_block.shape[0]):
             self.display_trial(i, cur_block, block_type)
 
+            if block_type == "main":
+                journal.record("ANT", cur_block.loc[i].to_dict())
+                performance.end_trial("ANT")
+
         if block_type == "main":
             # Add block data to all_data
             self.all_data = pd.concat([self.all_data, cur_block])
@@ -305,7 +292,7 @@ class ANT(object):
             display.text_space(
                 self.screen, self.font, "center", (self.screen_y / 2) + 100
             )
-            pygame.display.flip()
+            display.flip()
 
             display.wait_for_space()
 
@@ -398,7 +385,7 @@ class ANT(object):
         display.image(self.screen, self.img_fixation, "center", self.screen_y / 2 + 380)
 
         display.text_space(self.screen, self.font, "center", (self.screen_y / 2) + 480)
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -426,7 +413,7 @@ class ANT(object):
             self.screen_y / 2 -50,
         )
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 100)
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -471,7 +458,7 @@ class ANT(object):
             self.screen_y / 2 + 100,
         )
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 200)
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -495,6 +482,11 @@ class ANT(object):
             "response",
             "correct",
             "RT",
+            "cueOnset",
+            "cueOffset",
+            "targetOnset",
+            "targetOffset",
+            "droppedFrames",
         ]
         self.all_data = self.all_data[columns]
 
@@ -502,7 +494,7 @@ class ANT(object):
         self.screen.blit(self.background, (0, 0))
         display.text(self.screen, self.font, "Fin de la tarea", "center", "center")
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 100)
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
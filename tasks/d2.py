@@ -1,11 +1,10 @@
 import os
 import sys
-import time
 import pandas as pd
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import display, events, journal, performance, timing
 
 
 class D2(object):
@@ -310,7 +309,7 @@ class D2(object):
         y_pos += 30
         display.text_space(self.screen, self.font, "center", y_pos, (0, 0, 0))
         
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def _redraw_training_screen(self, img_prueba, img_x, img_y, img_height, hitboxes, selections):
@@ -361,7 +360,7 @@ class D2(object):
         y += 30
         display.text_space(self.screen, self.font, "center", y, (0, 0, 0))
         
-        pygame.display.flip()
+        display.flip()
 
     def display_training(self):
         """Screen 2: Display training screen with 22 clickable letters"""
@@ -390,7 +389,7 @@ class D2(object):
                 "Error: Image 'prueba.png' not found in images/D2/",
                 "center", "center", (255, 0, 0)
             )
-            pygame.display.flip()
+            display.flip()
             display.wait(3000)
             return []
 
@@ -408,7 +407,7 @@ class D2(object):
                 "Error: Invalid training image dimensions",
                 "center", "center", (255, 0, 0)
             )
-            pygame.display.flip()
+            display.flip()
             display.wait(3000)
             return []
         
@@ -487,12 +486,12 @@ class D2(object):
         text_y += 30
         display.text_space(self.screen, self.font, "center", text_y, (0, 0, 0))
         
-        pygame.display.flip()
+        display.flip()
 
         # Interactive loop for training
         waiting = True
         while waiting:
-            for event in pygame.event.get():
+            for event in events.wait():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     waiting = False
                 elif event.type == KEYDOWN and event.key == K_F12:
@@ -536,7 +535,7 @@ class D2(object):
                 f"Error: Image 'fila{row_num}.jpg' not found in images/D2/",
                 "center", "center", (255, 0, 0)
             )
-            pygame.display.flip()
+            display.flip()
             display.wait(2000)
             
             # Return DataFrame with expected structure (47 letters, all unselected)
@@ -569,7 +568,7 @@ class D2(object):
                 f"Error: Invalid dimensions for 'fila{row_num}.jpg'",
                 "center", "center", (255, 0, 0)
             )
-            pygame.display.flip()
+            display.flip()
             display.wait(2000)
             
             # Return DataFrame with expected structure
@@ -639,21 +638,23 @@ class D2(object):
                 )
             hitboxes.append(hitbox)
 
-        pygame.display.flip()
+        display.flip()
 
         # Start timer
-        start_time = int(round(time.time() * 1000))
+        start_time = timing.get_time_ms()
         
         # Interactive loop for this row (20 seconds)
         running = True
         while running:
-            for event in pygame.event.get():
+            # Sleep until a click or the end of the row
+            remaining = self.ROW_DURATION - (timing.get_time_ms() - start_time)
+            for event in events.wait(remaining):
                 if event.type == KEYDOWN and event.key == K_F12:
                     sys.exit(0)
                 elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
                     # Check if any hitbox was clicked
                     mouse_pos = pygame.mouse.get_pos()
-                    current_time = int(round(time.time() * 1000))
+                    current_time = timing.get_time_ms()
                     
                     for i, hitbox in enumerate(hitboxes):
                         if hitbox.collidepoint(mouse_pos):
@@ -677,11 +678,11 @@ class D2(object):
                                 if selected:
                                     pygame.draw.rect(self.screen, (255, 0, 0), hitboxes[j], 3)
                             
-                            pygame.display.flip()
+                            display.flip()
                             break
 
             # Check if time is up
-            current_time = int(round(time.time() * 1000))
+            current_time = timing.get_time_ms()
             if current_time - start_time >= self.ROW_DURATION:
                 running = False
 
@@ -717,7 +718,7 @@ class D2(object):
             "center", self.screen_y / 2 + 100, (0, 0, 0)
         )
         
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def run(self):
@@ -731,6 +732,10 @@ class D2(object):
         # Screens 3-16: Main task (14 rows)
         for row_num in range(1, self.NUM_ROWS + 1):
             row_data = self.display_row(row_num)
+            for letter in row_data.to_dict("records"):
+                journal.record("D2", letter)
+            # Rows are timed as a whole, so they are summarised as one trial
+            performance.end_trial("D2")
             self.all_data = pd.concat([self.all_data, row_data], ignore_index=True)
 
         # Screen 17: Final
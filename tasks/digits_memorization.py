@@ -1,10 +1,9 @@
 import sys
-import time
 import pygame
 import pandas as pd
 
 from pygame.locals import *
-from utils import display
+from utils import display, fonts, timing
 
 
 class DigitsMemorization(object):
@@ -171,45 +170,24 @@ class DigitsMemorization(object):
     def _format_sequence(self, sequence):
         return " - ".join(str(digit) for digit in sequence)
 
-    def _wrap_text(self, text_string, font, max_width):
-        words = text_string.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            proposed = " ".join(current_line + [word])
-            if font.size(proposed)[0] <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(" ".join(current_line))
-                current_line = [word]
-
-        if current_line:
-            lines.append(" ".join(current_line))
-
-        return lines
-
     def _draw_wrapped_text(self, text_string, start_y, colour=(0, 0, 0)):
-        lines = self._wrap_text(text_string, self.font, self.screen_x - (self.TEXT_MARGIN * 2))
-        for line_index, line in enumerate(lines):
-            display.text(
-                self.screen,
-                self.font,
-                line,
-                self.TEXT_MARGIN,
-                start_y + (line_index * 40),
-                colour,
-            )
-        return start_y + (len(lines) * 40)
+        paragraph = fonts.layout(
+            self.font,
+            text_string,
+            self.screen_x - (self.TEXT_MARGIN * 2),
+            line_height=40,
+        )
+        return paragraph.blit(self.screen, self.TEXT_MARGIN, start_y, colour)
 
     def _draw_sequence_line(self, digits, y, wrong_index=None):
         digit_surfaces = []
         for digit_index, digit in enumerate(digits):
             colour = (255, 0, 0) if digit_index == wrong_index else (0, 0, 0)
-            digit_surfaces.append(self.stimulus_font.render(str(digit), True, colour))
+            digit_surfaces.append(
+                fonts.render(self.stimulus_font, str(digit), True, colour)
+            )
 
-        separator_surface = self.stimulus_font.render(" - ", True, (0, 0, 0))
+        separator_surface = fonts.render(self.stimulus_font, " - ", True, (0, 0, 0))
 
         total_width = 0
         for digit_index, surface in enumerate(digit_surfaces):
@@ -303,13 +281,13 @@ class DigitsMemorization(object):
     def _show_feedback_message(self, message):
         self.screen.blit(self.background, (0, 0))
         self._draw_wrapped_text(message, self.screen_y / 2 - 80)
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def _collect_response(self, expected_sequence, draw_callback, no_countdown=False):
         expected_digits = [str(digit) for digit in expected_sequence]
         entered_digits = []
-        response_start = time.time()
+        response_start = timing.get_time()
         countdown_delay = len(expected_digits) * self.RESPONSE_TIMEOUT_MULTIPLIER
         timeout_limit = countdown_delay + self.COUNTDOWN_SECONDS
         clock = pygame.time.Clock()
@@ -317,7 +295,7 @@ class DigitsMemorization(object):
         pygame.event.clear()
 
         while True:
-            elapsed = time.time() - response_start
+            elapsed = timing.get_time() - response_start
             countdown = None
             if not no_countdown and elapsed >= countdown_delay:
                 countdown = max(0, self.COUNTDOWN_SECONDS - int(elapsed - countdown_delay))
@@ -333,26 +311,26 @@ class DigitsMemorization(object):
                 if digit != expected_digits[digit_index]:
                     draw_callback(entered_digits, wrong_index=digit_index, countdown=countdown)
                     self._draw_border((255, 0, 0))
-                    pygame.display.flip()
+                    display.flip()
                     display.wait(self.FEEDBACK_DURATION)
                     return False
 
                 if len(entered_digits) == len(expected_digits):
                     draw_callback(entered_digits, countdown=countdown)
                     self._draw_border((0, 255, 0))
-                    pygame.display.flip()
+                    display.flip()
                     display.wait(self.FEEDBACK_DURATION)
                     return True
 
             if not no_countdown and elapsed >= timeout_limit:
                 draw_callback(entered_digits, countdown=0)
                 self._draw_border((255, 0, 0))
-                pygame.display.flip()
+                display.flip()
                 display.wait(self.FEEDBACK_DURATION)
                 return False
 
             draw_callback(entered_digits, countdown=countdown)
-            pygame.display.flip()
+            display.flip()
             clock.tick(60)
 
     def _show_presentation(self, sequence):
@@ -364,7 +342,7 @@ class DigitsMemorization(object):
             "center",
             "center",
         )
-        pygame.display.flip()
+        display.flip()
         display.wait(len(sequence) * 1000)
 
     def _run_section(self, section):
@@ -420,7 +398,7 @@ class DigitsMemorization(object):
 
         self.screen.blit(self.background, (0, 0))
         display.text(self.screen, self.font, "Fin de la tarea", "center", "center")
-        pygame.display.flip()
+        display.flip()
         display.wait(1000)
 
         print("- Digits Memorization complete")
@@ -63,12 +63,12 @@ class DigitspanBackwards(object):
         for number in data["sequence"][i]:
             self.screen.blit(self.background, (0, 0))
             display.text(self.screen, self.stimulus_font, number, "center", "center")
-            pygame.display.flip()
+            display.flip()
 
             display.wait(self.STIM_DURATION)
 
             self.screen.blit(self.background, (0, 0))
-            pygame.display.flip()
+            display.flip()
 
             display.wait(self.INTER_NUMBER_DURATION)
 
@@ -113,7 +113,7 @@ class DigitspanBackwards(object):
                 self.screen, self.stimulus_font, user_sequence, "center", "center"
             )
 
-            pygame.display.flip()
+            display.flip()
 
         return user_sequence
 
@@ -186,7 +186,7 @@ class DigitspanBackwards(object):
 
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 350)
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -203,7 +203,7 @@ class DigitspanBackwards(object):
 
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 100)
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -225,7 +225,7 @@ class DigitspanBackwards(object):
                 self.screen, self.font, "Incorrect", "center", "center", (255, 0, 0)
             )
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait(self.FEEDBACK_DURATION)
 
@@ -240,7 +240,7 @@ class DigitspanBackwards(object):
         )
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 100)
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -261,7 +261,7 @@ class DigitspanBackwards(object):
         display.text(self.screen, self.font, "End of task", "center", "center")
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 100)
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
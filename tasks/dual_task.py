@@ -1,5 +1,3 @@
-import sys
-import time
 import math
 import heapq
 import random
@@ -7,7 +5,7 @@ import pandas as pd
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import display, responses, timing
 
 
 class DualTask(object):
@@ -100,6 +98,8 @@ class DualTask(object):
     PATH_RAW_SAMPLES_PER_SEG = 300   # sub-samples used for arc-length computation
     PATH_OUTPUT_POINTS_PER_SEG = 60  # arc-length-uniform output points per segment
 
+    FRAME_RATE = 60  # frames per second of the tracking display
+
     # Tracking measurement offsets after stimulus onset: (seconds, phase_label).
     TRACKING_OFFSETS = [
         (0.2, "concurrent"),
@@ -123,6 +123,9 @@ class DualTask(object):
         pygame.display.set_caption("Dual Task")
         pygame.mouse.set_visible(1)
 
+        # Presses of A are stamped when queued, not when the frame loop reads them
+        self.responses = responses.ResponseCapture(keys={K_a: "a"})
+
         # Scale factors relative to the 1920×1080 reference resolution
         self.scale_x = self.screen_x / 1920.0
         self.scale_y = self.screen_y / 1080.0
@@ -347,7 +350,7 @@ class DualTask(object):
         )
         y += 80
         display.text_space(self.screen, self.font, "center", y)
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def _show_pre_practice_screen(self):
@@ -367,7 +370,7 @@ class DualTask(object):
         )
         cy += 80
         display.text_space(self.screen, self.font, "center", cy)
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def _show_post_practice_screen(self):
@@ -393,7 +396,7 @@ class DualTask(object):
         )
         cy += 80
         display.text_space(self.screen, self.font, "center", cy)
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     @staticmethod
@@ -429,16 +432,15 @@ class DualTask(object):
         -------
         tracking_data, response_data : lists of dicts.
         """
-        pygame.event.clear()
+        self.responses.clear()
         pygame.mouse.set_visible(1)
 
-        task_start = time.time()
+        task_start = timing.get_time()
         tracking_data = []
         response_data = []
 
         active_stim = None   # dict with display/response timing and state
         stim_idx = 0
-        clock = pygame.time.Clock()
 
         # Priority queue of pending tracking measurements.
         # Each entry: (scheduled_absolute_time, counter, stim_num, stype, phase)
@@ -446,7 +448,7 @@ class DualTask(object):
         meas_counter = 0
 
         while True:
-            now = time.time()
+            now = timing.get_time()
             elapsed = now - task_start
 
             if elapsed >= duration:
@@ -459,22 +461,22 @@ class DualTask(object):
                 break
 
             # --- Event handling ---
-            for event in pygame.event.get():
-                if event.type == KEYDOWN:
-                    if event.key == K_F12:
-                        sys.exit(0)
-                    elif event.key == K_a:
-                        if active_stim is not None and not active_stim["responded"]:
-                            if now <= active_stim["response_end"]:
-                                latency = now - active_stim["onset_time"]
-                                response_data.append({
-                                    "stimulus": active_stim["idx"] + 1,
-                                    "stimulus_type": active_stim["stype"],
-                                    "stimulus_time_s": active_stim["onset_elapsed"],
-                                    "latency_s": round(latency, 4),
-                                    "responded": True,
-                                })
-                                active_stim["responded"] = True
+            # Responses were collected while waiting for this frame, each with
+            # the time at which it was queued
+            self.responses.poll()
+            for _, stamp in self.responses.pop():
+                press_time = stamp / 1e9
+                if active_stim is not None and not active_stim["responded"]:
+                    if press_time <= active_stim["response_end"]:
+                        latency = press_time - active_stim["onset_time"]
+                        response_data.append({
+                            "stimulus": active_stim["idx"] + 1,
+                            "stimulus_type": active_stim["stype"],
+                            "stimulus_time_s": active_stim["onset_elapsed"],
+                            "latency_s": round(latency, 4),
+                            "responded": True,
+                        })
+                        active_stim["responded"] = True
 
             # --- Activate new stimuli ---
             while (
@@ -499,16 +501,9 @@ class DualTask(object):
                     "idx": stim_idx,
                     "stype": stype,
                     "responded": False,
+                    "shown": False,
                 }
 
-                # Schedule the four tracking measurements for this stimulus
-                for offset, phase in self.TRACKING_OFFSETS:
-                    heapq.heappush(
-                        pending_meas,
-                        (now + offset, meas_counter, stim_idx + 1, stype, phase),
-                    )
-                    meas_counter += 1
-
                 stim_idx += 1
 
             # --- Expire stimulus response window ---
@@ -566,8 +561,39 @@ class DualTask(object):
                 10, 10, (100, 100, 100),
             )
 
-            pygame.display.flip()
-            clock.tick(60)
+            display.flip()
+
+            # The square appears with the first flip after its activation, so
+            # its timing (and that of its tracking measurements) is measured
+            # from there
+            if active_stim is not None and not active_stim["shown"]:
+                delay = timing.get_time() - active_stim["onset_time"]
+                active_stim["onset_time"] += delay
+                active_stim["onset_elapsed"] = round(
+                    active_stim["onset_elapsed"] + delay, 4
+                )
+                active_stim["display_end"] += delay
+                active_stim["response_end"] += delay
+                active_stim["shown"] = True
+
+                # Schedule the four tracking measurements for this stimulus
+                for offset, phase in self.TRACKING_OFFSETS:
+                    heapq.heappush(
+                        pending_meas,
+                        (
+                            active_stim["onset_time"] + offset,
+                            meas_counter,
+                            active_stim["idx"] + 1,
+                            active_stim["stype"],
+                            phase,
+                        ),
+                    )
+                    meas_counter += 1
+
+            # Keep collecting responses until the next frame is due
+            self.responses.wait(
+                timing.ms_to_ns((now + 1.0 / self.FRAME_RATE) * 1000), stop=False
+            )
 
         return tracking_data, response_data
 
@@ -576,5 +602,5 @@ class DualTask(object):
         self.screen.blit(self.background, (0, 0))
         display.text(self.screen, self.font, "Fin de la tarea", "center", "center")
         display.text_space(self.screen, self.font, "center", self.screen_y // 2 + 80)
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
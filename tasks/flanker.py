@@ -1,12 +1,20 @@
 import sys
-import time
 import pandas as pd
 import numpy as np
 import pygame
 
 from pygame.locals import *
 from itertools import product
-from utils import display
+from utils import (
+    assets,
+    display,
+    fonts,
+    journal,
+    performance,
+    responses,
+    scheduler,
+    timing,
+)
 
 
 class Flanker(object):
@@ -72,6 +80,14 @@ class Flanker(object):
         # Level combinations give us 4 trials.
         self.combinations = list(product(self.CONGRUENCY_LEVELS, self.DIRECTION_LEVELS))
 
+        # Every stimulus frame is composed before the first trial
+        self.stimuli = assets.StimulusSet(self.screen, self.background)
+        self.build_stimuli()
+
+        # Stimulus durations are presented as whole screen refreshes
+        self.scheduler = scheduler.FrameScheduler()
+        self.responses = responses.ResponseCapture(keys={K_LEFT: "left", K_RIGHT: "right"})
+
         # Create output dataframe
         self.all_data = pd.DataFrame()
 
@@ -93,11 +109,23 @@ class Flanker(object):
 
         return cur_block
 
-    def display_flanker(self, flanker_type, direction):
-        stimulus = self.flanker_stim[direction][flanker_type]
-        display.text(
-            self.screen, self.font_stim, stimulus, "center", "center", self.colour_font
-        )
+    def build_stimuli(self):
+        """Compose the fixation, flanker and feedback frames before the trials."""
+
+        def centred(font, text, colour):
+            return [(fonts.render(font, text, 1, colour), "center", "center")]
+
+        self.stimuli.add("fixation", centred(self.font, "+", self.colour_font))
+        for direction, stimuli in self.flanker_stim.items():
+            for flanker_type, stimulus in stimuli.items():
+                self.stimuli.add(
+                    ("flanker", flanker_type, direction),
+                    centred(self.font_stim, stimulus, self.colour_font),
+                )
+
+        self.stimuli.add("too slow", centred(self.font, "too slow", self.colour_font))
+        self.stimuli.add("correct", centred(self.font, "correct", (0, 255, 0)))
+        self.stimuli.add("incorrect", centred(self.font, "incorrect", (255, 0, 0)))
 
     def display_trial(self, trial_num, data):
         # Check for a quit press after stimulus was shown
@@ -105,57 +133,55 @@ class Flanker(object):
             if event.type == KEYDOWN and event.key == K_F12:
                 sys.exit(0)
 
+        self.scheduler.dropped_frames = 0
+
         # Display fixation
-        self.screen.blit(self.background, (0, 0))
-        display.text(self.screen, self.font, "+", "center", "center", self.colour_font)
-        pygame.display.flip()
+        self.stimuli.draw("fixation")
+        fixation_onset = self.scheduler.flip()
 
-        display.wait(self.FIXATION_DURATION)
+        self.scheduler.hold(fixation_onset, self.FIXATION_DURATION)
 
         # Display flanker stimulus
-        self.screen.blit(self.background, (0, 0))
-        self.display_flanker(
-            data["congruency"][trial_num], data["direction"][trial_num]
+        self.stimuli.draw(
+            ("flanker", data["congruency"][trial_num], data["direction"][trial_num])
         )
-        pygame.display.flip()
-
-        # Clear the event queue before checking for responses
-        pygame.event.clear()
-        response = "NA"
-        too_slow = False
-        wait_response = True
-        post_flanker_blank_shown = False
-
-        start_time = int(round(time.time() * 1000))
-        while wait_response:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_LEFT:
-                    response = "left"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_RIGHT:
-                    response = "right"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_F12:
-                    sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
-
-            if end_time - start_time >= self.FLANKER_DURATION:
-                if not post_flanker_blank_shown:
-                    self.screen.blit(self.background, (0, 0))
-                    pygame.display.flip()
-                    post_flanker_blank_shown = True
-
-            if end_time - start_time >= self.MAX_RESPONSE_TIME:
-                # If time limit has been reached, consider it a missed trial
-                wait_response = False
-                too_slow = True
+        stim_onset = self.scheduler.flip()
+        stim_offset = None
+        blank_due = self.scheduler.schedule(stim_onset, self.FLANKER_DURATION)
+
+        # Clear the event queue before checking for responses, and collect
+        # them until the flanker offset
+        self.responses.clear()
+        press = self.responses.wait(blank_due)
+
+        # Without a response yet, blank the screen and keep waiting until the
+        # response time limit
+        if press is None:
+            self.screen.blit(self.background, (0, 0))
+            stim_offset = self.scheduler.flip()
+            press = self.responses.wait(
+                stim_onset + timing.ms_to_ns(self.MAX_RESPONSE_TIME)
+            )
+
+        if press is None:
+            # If time limit has been reached, consider it a missed trial
+            response = "NA"
+            too_slow = True
+            rt = self.MAX_RESPONSE_TIME
+        else:
+            response = press[0]
+            too_slow = False
+            rt = responses.rt(stim_onset, press[1])
 
         # Store reaction time and response
-        rt = int(round(time.time() * 1000)) - start_time
         data.at[trial_num, "RT"] = rt
         data.at[trial_num, "response"] = response
 
+        # Measured stimulus timing, in ms since the start of the task
+        data.at[trial_num, "stimOnset"] = self.scheduler.elapsed_ms(stim_onset)
+        if stim_offset is not None:
+            data.at[trial_num, "stimOffset"] = self.scheduler.elapsed_ms(stim_offset)
+
         if data["compatibility"][trial_num] == "compatible":
             correct = 1 if response == data["direction"][trial_num] else 0
         else:
@@ -163,31 +189,25 @@ class Flanker(object):
         data.at[trial_num, "correct"] = correct
 
         # Display feedback
-        self.screen.blit(self.background, (0, 0))
         if too_slow:
-            display.text(
-                self.screen, self.font, "too slow", "center", "center", self.colour_font
-            )
+            self.stimuli.draw("too slow")
+        elif correct == 1:
+            self.stimuli.draw("correct")
         else:
-            if correct == 1:
-                display.text(
-                    self.screen, self.font, "correct", "center", "center", (0, 255, 0)
-                )
-            else:
-                display.text(
-                    self.screen, self.font, "incorrect", "center", "center", (255, 0, 0)
-                )
-        pygame.display.flip()
+            self.stimuli.draw("incorrect")
+        feedback_onset = self.scheduler.flip()
+
+        # A response before the flanker offset replaces it with the feedback
+        if stim_offset is None:
+            data.at[trial_num, "stimOffset"] = self.scheduler.elapsed_ms(feedback_onset)
+        data.at[trial_num, "droppedFrames"] = self.scheduler.dropped_frames
 
         display.wait(self.FEEDBACK_DURATION)
 
         if trial_num != data.shape[0] - 1:
             # Display fixation
-            self.screen.blit(self.background, (0, 0))
-            display.text(
-                self.screen, self.font, "+", "center", "center", self.colour_font
-            )
-            pygame.display.flip()
+            self.stimuli.draw("fixation")
+            display.flip()
             display.wait(self.ITI)
 
     def run_block(
@@ -200,6 +220,10 @@ class Flanker(object):
         for i in range(cur_block.shape[0]):
             self.display_trial(i, cur_block)
 
+            if block_type == "main":
+                journal.record("Eriksen Flanker", cur_block.loc[i].to_dict())
+                performance.end_trial("Eriksen Flanker")
+
         if block_type == "main":
             # Add block data to all_data
             self.all_data = pd.concat([self.all_data, cur_block])
@@ -225,7 +249,7 @@ class Flanker(object):
                 (self.screen_y / 2) + 100,
                 self.colour_font,
             )
-            pygame.display.flip()
+            display.flip()
 
             display.wait_for_space()
 
@@ -262,7 +286,7 @@ class Flanker(object):
                     self.screen_y / 2 - 150,
                     self.colour_font,
                 )
-                pygame.display.flip()
+                display.flip()
 
                 wait_response = True
                 while wait_response:
@@ -382,7 +406,7 @@ class Flanker(object):
             (self.screen_y / 2) + 300,
             self.colour_font,
         )
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
         # Instructions Practice
@@ -398,7 +422,7 @@ class Flanker(object):
         display.text_space(
             self.screen, self.font, "center", self.screen_y / 2 + 100, self.colour_font
         )
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
         # Practice trials
@@ -417,7 +441,7 @@ class Flanker(object):
         display.text_space(
             self.screen, self.font, "center", self.screen_y / 2 + 200, self.colour_font
         )
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
         # Main task second half
@@ -447,7 +471,7 @@ class Flanker(object):
                 self.screen_y / 2 + 200,
                 self.colour_font,
             )
-            pygame.display.flip()
+            display.flip()
             display.wait_for_space()
 
             # Practice instructions
@@ -521,7 +545,7 @@ class Flanker(object):
                 self.screen_y / 2 + 250,
                 self.colour_font,
             )
-            pygame.display.flip()
+            display.flip()
             display.wait_for_space()
 
             # Instructions Practice
@@ -541,7 +565,7 @@ class Flanker(object):
                 self.screen_y / 2 + 100,
                 self.colour_font,
             )
-            pygame.display.flip()
+            display.flip()
             display.wait_for_space()
 
             # Practice trials
@@ -564,7 +588,7 @@ class Flanker(object):
                 self.screen_y / 2 + 200,
                 self.colour_font,
             )
-            pygame.display.flip()
+            display.flip()
             display.wait_for_space()
 
             # Main task
@@ -600,6 +624,9 @@ class Flanker(object):
             "response",
             "correct",
             "RT",
+            "stimOnset",
+            "stimOffset",
+            "droppedFrames",
         ]
         self.all_data = self.all_data[columns]
 
@@ -611,7 +638,7 @@ class Flanker(object):
         display.text_space(
             self.screen, self.font, "center", self.screen_y / 2 + 100, self.colour_font
         )
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -4,7 +4,7 @@ import pandas as pd
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import display, events, fonts, journal, performance, responses, timing
 
 
 class FourFigures(object):
@@ -113,6 +113,10 @@ class FourFigures(object):
 
         self.rows = []
 
+        # Controls on the current screen, for simulated participants
+        # (see utils.simulation.Target)
+        self.hit_rects = {}
+
     def _draw_shape(self, surface, shape, center, size, color=(0, 0, 0), width=0):
         """Draw a shape on the given surface at center with given size."""
         cx, cy = center
@@ -189,7 +193,7 @@ class FourFigures(object):
 
             pygame.draw.rect(self.screen, fill_color, rect)
             pygame.draw.rect(self.screen, (0, 0, 0), rect, 2)
-            label_surface = self.font_small.render(label, True, (0, 0, 0))
+            label_surface = fonts.render(self.font_small, label, True, (0, 0, 0))
             self.screen.blit(
                 label_surface,
                 (
@@ -200,23 +204,6 @@ class FourFigures(object):
 
         return button_rects
 
-    def _wrap_lines(self, text, font, max_width):
-        """Return list of wrapped line strings."""
-        words = text.split()
-        lines = []
-        current = []
-        for word in words:
-            test = " ".join(current + [word])
-            if font.size(test)[0] <= max_width:
-                current.append(word)
-            else:
-                if current:
-                    lines.append(" ".join(current))
-                current = [word]
-        if current:
-            lines.append(" ".join(current))
-        return lines if lines else [""]
-
     def _draw_arrow(self, start, end, color=(0, 0, 0)):
         """Draw an arrow from start to end with an arrowhead."""
         pygame.draw.line(self.screen, color, start, end, 2)
@@ -238,6 +225,7 @@ class FourFigures(object):
     def _show_text_screen(self, lines, wait_for_space=True, title=None,
                            show_examples=False):
         """Show a screen with text lines, optional title, optional inline examples."""
+        self.hit_rects = {}
         self.screen.blit(self.background, (0, 0))
 
         y = 60
@@ -247,7 +235,7 @@ class FourFigures(object):
 
         for line in lines:
             if line:
-                wrapped = self._wrap_lines(line, self.font, self.screen_x - 100)
+                wrapped = fonts.wrap(self.font, line, self.screen_x - 100)
                 for wline in wrapped:
                     display.text(self.screen, self.font, wline, "center", y)
                     y += 40
@@ -260,7 +248,7 @@ class FourFigures(object):
         if wait_for_space:
             display.text_space(self.screen, self.font, "center", self.screen_y - 70)
 
-        pygame.display.flip()
+        display.flip()
 
         if wait_for_space:
             display.wait_for_space()
@@ -291,7 +279,7 @@ class FourFigures(object):
             outer_size=stim_size,
             inner_size=inner_size,
         )
-        coin_surf = self.font.render("Coincidente", True, (0, 0, 0))
+        coin_surf = fonts.render(self.font, "Coincidente", True, (0, 0, 0))
         self.screen.blit(coin_surf, (left_cx - coin_surf.get_width() // 2, stim_y + stim_size + 12))
 
         # Draw right example: square (outer) + triangle (inner) → Discrepante
@@ -301,7 +289,7 @@ class FourFigures(object):
             outer_size=stim_size,
             inner_size=inner_size,
         )
-        disc_surf = self.font.render("Discrepante", True, (0, 0, 0))
+        disc_surf = fonts.render(self.font, "Discrepante", True, (0, 0, 0))
         self.screen.blit(disc_surf, (right_cx - disc_surf.get_width() // 2, stim_y + stim_size + 12))
 
         # Draw arrows on the right example: one pointing to outer, one to inner
@@ -312,14 +300,14 @@ class FourFigures(object):
         outer_tip = (right_cx + stim_size - 5, stim_y)
         arrow_ext_start = (right_cx + stim_size + 70, stim_y - 30)
         self._draw_arrow(arrow_ext_start, outer_tip, arrow_color)
-        ext_surf = label_font.render("Figura externa", True, arrow_color)
+        ext_surf = fonts.render(label_font, "Figura externa", True, arrow_color)
         self.screen.blit(ext_surf, (arrow_ext_start[0] - 5, arrow_ext_start[1] - ext_surf.get_height() - 2))
 
         # Arrow for inner figure (from below-right, pointing to center)
         inner_tip = (right_cx + inner_size + 4, stim_y + inner_size + 4)
         arrow_int_start = (right_cx + stim_size + 70, stim_y + 40)
         self._draw_arrow(arrow_int_start, inner_tip, arrow_color)
-        int_surf = label_font.render("Figura interna", True, arrow_color)
+        int_surf = fonts.render(label_font, "Figura interna", True, arrow_color)
         self.screen.blit(int_surf, (arrow_int_start[0] - 5, arrow_int_start[1]))
 
         return stim_y + stim_size + coin_surf.get_height() + gap
@@ -337,13 +325,16 @@ class FourFigures(object):
             regla = "contorno" if target_rule == "contour" else "contenido"
         self._draw_hierarchical_figure(contour, content, is_red=is_red)
         button_rects = self._draw_response_buttons()
-        pygame.display.flip()
+        self.hit_rects = {"responses": button_rects}
+        display.flip()
+        onset = timing.get_time_ns()
 
         selected_idx = None
         selected_shape = None
+        response_time = None
 
         while selected_idx is None:
-            for event in pygame.event.get():
+            for event in events.wait():
                 if event.type == KEYDOWN and event.key == K_F12:
                     sys.exit(0)
                 if event.type == MOUSEBUTTONDOWN and event.button == 1:
@@ -351,8 +342,13 @@ class FourFigures(object):
                         if rect.collidepoint(event.pos):
                             selected_idx = idx
                             selected_shape = self.RESPONSE_OPTIONS[idx][0]
+                            # Time the click was queued, not read
+                            response_time = responses.event_time(event)
                             break
+                    if selected_idx is not None:
+                        break
 
+        rt = responses.rt(onset, response_time)
         is_correct = selected_shape == correct_response
 
         self.screen.blit(self.background, (0, 0))
@@ -361,7 +357,7 @@ class FourFigures(object):
             regla = "contorno" if target_rule == "contour" else "contenido"
         self._draw_hierarchical_figure(contour, content, is_red=is_red)
         self._draw_response_buttons(selected_idx=selected_idx, is_correct=is_correct)
-        pygame.display.flip()
+        display.flip()
 
         display.wait(200)
 
@@ -375,8 +371,13 @@ class FourFigures(object):
                 "response_given": "yes" if selected_shape is not None else "no",
                 "correct_response": correct_response,
                 "correct": "yes" if is_correct else "no",
+                "rule": target_rule,
+                "switch": "yes" if trial.get("switch_before", False) else "no",
+                "RT": rt,
             }
         )
+        journal.record("FourFigures", self.rows[-1])
+        performance.end_trial("FourFigures")
 
     def _run_trials(self, trials, part, initial_rule):
         rule = initial_rule
@@ -505,9 +506,9 @@ class FourFigures(object):
             y = 50
             for line in instruction_lines:
                 if line:
-                    wrapped = self._wrap_lines(line, self.font, self.screen_x - 100)
+                    wrapped = fonts.wrap(self.font, line, self.screen_x - 100)
                     for wline in wrapped:
-                        surf = self.font.render(wline, True, (0, 0, 0))
+                        surf = fonts.render(self.font, wline, True, (0, 0, 0))
                         self.screen.blit(surf, ((self.screen_x - surf.get_width()) // 2, y))
                         y += 38
                 else:
@@ -547,7 +548,7 @@ class FourFigures(object):
 
                         pygame.draw.rect(self.screen, fill, rect)
                         pygame.draw.rect(self.screen, (0, 0, 0), rect, 1)
-                        lbl = self.font_label.render(label, True, (0, 0, 0))
+                        lbl = fonts.render(self.font_label, label, True, (0, 0, 0))
                         self.screen.blit(lbl, (rect.centerx - lbl.get_width() // 2,
                                                rect.centery - lbl.get_height() // 2))
                     btn_rects_all.append(row_btn_rects)
@@ -557,16 +558,24 @@ class FourFigures(object):
                 footer_y = self.screen_y - BOTTOM_MARGIN - footer_total_h + 10
                 for fline in footer_lines:
                     if fline:
-                        wrapped = self._wrap_lines(fline, self.font_small, self.screen_x - 100)
+                        wrapped = fonts.wrap(self.font_small, fline, self.screen_x - 100)
                         for wline in wrapped:
-                            fs = self.font_small.render(wline, True, (0, 0, 0))
+                            fs = fonts.render(self.font_small, wline, True, (0, 0, 0))
                             self.screen.blit(fs, ((self.screen_x - fs.get_width()) // 2, footer_y))
                             footer_y += FOOTER_LINE_H
                     else:
                         footer_y += 12
                 display.text_space(self.screen, self.font, "center", self.screen_y - 45)
 
-            pygame.display.flip()
+            self.hit_rects = {
+                "responses": [
+                    rect
+                    for stim_idx, btn_row in enumerate(btn_rects_all)
+                    if responses[stim_idx] is None
+                    for rect in btn_row
+                ]
+            }
+            display.flip()
             return btn_rects_all
 
         all_answered = False
@@ -574,7 +583,7 @@ class FourFigures(object):
 
         waiting = True
         while waiting:
-            for event in pygame.event.get():
+            for event in events.wait():
                 if event.type == QUIT:
                     sys.exit(0)
                 elif event.type == KEYDOWN:
@@ -610,8 +619,12 @@ class FourFigures(object):
                     "response_given": "yes" if selected_shape is not None else "no",
                     "correct_response": correct_shape,
                     "correct": "yes" if correct_flags[stim_idx] else "no",
+                    "rule": target_rule,
+                    "switch": "yes" if trial.get("switch_before", False) else "no",
                 }
             )
+            journal.record("FourFigures", self.rows[-1])
+            performance.end_trial("FourFigures")
 
     def run(self):
         # ---- Intro screen with inline examples ----
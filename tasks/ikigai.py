@@ -1,11 +1,145 @@
 import os
 import sys
+import bisect
+import itertools
 
 import pandas as pd
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import display, events, fonts
+
+
+class OptionList(object):
+    """Scrollable list of selectable options, wrapped and rendered once.
+
+    Row tops are prefix sums of the row heights, so finding the rows in view
+    or the row under the mouse is a binary search, and only the rows in view
+    are drawn. Row surfaces are cached for both selection states.
+
+    Parameters:
+    options -- option strings
+    font -- pygame font object of the option text
+    width -- width of the rows in pixels
+    """
+
+    LINE_HEIGHT = 28
+    ROW_GAP = 10
+    MIN_ROW_HEIGHT = 48
+    TEXT_X = 45
+    TEXT_Y = 10
+
+    def __init__(self, options, font, width):
+        self.font = font
+        self.width = width
+        self.paragraphs = [
+            fonts.layout(font, option, width - self.TEXT_X, self.LINE_HEIGHT)
+            for option in options
+        ]
+        self.heights = [
+            max(self.MIN_ROW_HEIGHT, len(paragraph.lines) * self.LINE_HEIGHT + 18)
+            for paragraph in self.paragraphs
+        ]
+        # Top of each row, relative to the top of the first one
+        self.tops = list(
+            itertools.accumulate(
+                [0] + [height + self.ROW_GAP for height in self.heights]
+            )
+        )[:-1]
+        self.total_height = self.tops[-1] + self.heights[-1] if self.heights else 0
+        self._rows = {}
+
+    def __len__(self):
+        return len(self.heights)
+
+    def row_at(self, y):
+        """Return the index of the row at a content y coordinate, or None."""
+        index = bisect.bisect_right(self.tops, y) - 1
+        if index >= 0 and y < self.tops[index] + self.heights[index]:
+            return index
+        return None
+
+    def visible_rows(self, scroll_offset, view_height):
+        """Return the range of the rows overlapping the view."""
+        first = max(0, bisect.bisect_right(self.tops, scroll_offset) - 1)
+        last = bisect.bisect_right(self.tops, scroll_offset + view_height)
+        return range(first, last)
+
+    def row_surface(self, index, selected):
+        """Return the (cached) surface of a row."""
+        key = (index, selected)
+        surface = self._rows.get(key)
+        if surface is not None:
+            return surface
+
+        fill_color = (220, 240, 255) if selected else (255, 255, 255)
+        border_color = (0, 120, 215) if selected else (160, 160, 160)
+
+        surface = pygame.Surface((self.width, self.heights[index]))
+        surface.fill(fill_color)
+        rect = surface.get_rect()
+        pygame.draw.rect(surface, border_color, rect, 2)
+
+        marker_rect = pygame.Rect(12, rect.centery - 10, 20, 20)
+        pygame.draw.rect(surface, (255, 255, 255), marker_rect)
+        pygame.draw.rect(surface, border_color, marker_rect, 2)
+        if selected:
+            pygame.draw.line(
+                surface,
+                border_color,
+                (marker_rect.x + 4, marker_rect.y + 11),
+                (marker_rect.x + 9, marker_rect.y + 16),
+                3,
+            )
+            pygame.draw.line(
+                surface,
+                border_color,
+                (marker_rect.x + 9, marker_rect.y + 16),
+                (marker_rect.x + 17, marker_rect.y + 4),
+                3,
+            )
+
+        self.paragraphs[index].blit(surface, self.TEXT_X, self.TEXT_Y)
+        try:
+            surface = surface.convert()
+        except pygame.error:
+            pass  # No display mode set yet
+
+        self._rows[key] = surface
+        return surface
+
+    def draw(self, screen, x, y, view_rect, scroll_offset, selected_indices):
+        """Draw the rows in view.
+
+        Parameters:
+        screen -- surface to draw on
+        x -- x coordinate of the rows
+        y -- y coordinate of the top of the first row when not scrolled
+        view_rect -- visible area of the list (rows are clipped to it)
+        scroll_offset -- pixels scrolled
+        selected_indices -- indices of the selected options
+        """
+        screen.set_clip(view_rect)
+        view_top = view_rect.y - y + scroll_offset
+        for index in self.visible_rows(view_top, view_rect.height):
+            screen.blit(
+                self.row_surface(index, index in selected_indices),
+                (x, y + self.tops[index] - scroll_offset),
+            )
+        screen.set_clip(None)
+
+    def row_rects(self, x, y, view_rect, scroll_offset):
+        """Return the screen rects of the rows in view, clipped to the view.
+
+        Parameters are those of draw().
+        """
+        view_top = view_rect.y - y + scroll_offset
+        return [
+            pygame.Rect(
+                x, y + self.tops[index] - scroll_offset, self.width, self.heights[index]
+            ).clip(view_rect)
+            for index in self.visible_rows(view_top, view_rect.height)
+        ]
 
 
 class Ikigai(object):
@@ -29,6 +163,10 @@ class Ikigai(object):
         self.base_dir = os.path.dirname(os.path.realpath(__file__))
         self.statements_dir = os.path.join(os.path.dirname(self.base_dir), "enunciados")
 
+        # Controls on the current screen, for simulated participants
+        # (see utils.simulation.Target)
+        self.hit_rects = {}
+
     def _load_options(self, file_name):
         options_path = os.path.join(self.statements_dir, file_name)
         try:
@@ -41,38 +179,16 @@ class Ikigai(object):
             print(f"ERROR: Failed to load statements file: {exc}")
             sys.exit(1)
 
-    def _wrap_text(self, text, font, max_width):
-        words = text.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            test_line = " ".join(current_line + [word])
-            if font.size(test_line)[0] <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(" ".join(current_line))
-                current_line = [word]
-
-        if current_line:
-            lines.append(" ".join(current_line))
-
-        return lines if lines else [""]
-
     def _draw_wrapped_text(self, text, font, x, y, max_width, *, center=False, color=(0, 0, 0), line_height=None):
         if line_height is None:
             line_height = font.get_linesize() + 6
 
-        lines = self._wrap_text(text, font, max_width)
-        for index, line in enumerate(lines):
-            line_surface = font.render(line, True, color)
-            draw_x = x
-            if center:
-                draw_x = x + (max_width - line_surface.get_width()) // 2
-            self.screen.blit(line_surface, (draw_x, y + index * line_height))
-
-        return y + len(lines) * line_height
+        paragraph = fonts.layout(
+            font, text, max_width, line_height, "center" if center else "left"
+        )
+        if center:
+            x += (max_width - paragraph.width) // 2
+        return paragraph.blit(self.screen, x, y, color)
 
     def _draw_button(self, rect, label, enabled):
         fill_color = (210, 210, 210) if enabled else (235, 235, 235)
@@ -82,7 +198,7 @@ class Ikigai(object):
         pygame.draw.rect(self.screen, fill_color, rect)
         pygame.draw.rect(self.screen, border_color, rect, 2)
 
-        label_surface = self.font.render(label, True, text_color)
+        label_surface = fonts.render(self.font, label, True, text_color)
         self.screen.blit(
             label_surface,
             (
@@ -108,7 +224,7 @@ class Ikigai(object):
         handle_rect = pygame.Rect(track_rect.x, handle_y, track_rect.width, handle_height)
         pygame.draw.rect(self.screen, (120, 120, 120), handle_rect)
 
-    def _draw_selection_page(self, prompt, options, selected_indices, button_label, scroll_offset):
+    def _draw_selection_page(self, prompt, option_list, selected_indices, button_label, scroll_offset):
         self.screen.blit(self.background, (0, 0))
 
         display.text(self.screen, self.font_title, "Ikigai", "center", 35)
@@ -127,11 +243,11 @@ class Ikigai(object):
         )
 
         counter_text = f"Seleccionadas: {len(selected_indices)} / {self.MAX_SELECTIONS}"
-        counter_surface = self.font.render(counter_text, True, (0, 0, 0))
+        counter_surface = fonts.render(self.font, counter_text, True, (0, 0, 0))
         self.screen.blit(counter_surface, (70, prompt_y + 10))
 
         help_text = "Usa la rueda del ratón o las flechas arriba/abajo para desplazarte."
-        help_surface = self.font_small.render(help_text, True, (110, 110, 110))
+        help_surface = fonts.render(self.font_small, help_text, True, (110, 110, 110))
         self.screen.blit(help_surface, (70, prompt_y + 55))
 
         list_rect = pygame.Rect(70, prompt_y + 95, self.screen_x - 140, self.screen_y - (prompt_y + 220))
@@ -140,73 +256,53 @@ class Ikigai(object):
 
         button_rect = pygame.Rect((self.screen_x - 220) // 2, self.screen_y - 90, 220, 52)
 
-        option_rects = []
-        item_gap = 10
-        item_y = list_rect.y + 10 - scroll_offset
-        inner_width = list_rect.width - 34
-
-        self.screen.set_clip(list_rect)
-        for option_index, option_text in enumerate(options):
-            wrapped_lines = self._wrap_text(option_text, self.font_small, inner_width - 45)
-            option_height = max(48, len(wrapped_lines) * 28 + 18)
-            option_rect = pygame.Rect(list_rect.x + 10, item_y, inner_width, option_height)
-            option_rects.append((option_index, option_rect))
-
-            if option_rect.bottom >= list_rect.y and option_rect.top <= list_rect.bottom:
-                is_selected = option_index in selected_indices
-                fill_color = (220, 240, 255) if is_selected else (255, 255, 255)
-                border_color = (0, 120, 215) if is_selected else (160, 160, 160)
-                pygame.draw.rect(self.screen, fill_color, option_rect)
-                pygame.draw.rect(self.screen, border_color, option_rect, 2)
-
-                marker_rect = pygame.Rect(option_rect.x + 12, option_rect.centery - 10, 20, 20)
-                pygame.draw.rect(self.screen, (255, 255, 255), marker_rect)
-                pygame.draw.rect(self.screen, border_color, marker_rect, 2)
-                if is_selected:
-                    pygame.draw.line(
-                        self.screen,
-                        border_color,
-                        (marker_rect.x + 4, marker_rect.y + 11),
-                        (marker_rect.x + 9, marker_rect.y + 16),
-                        3,
-                    )
-                    pygame.draw.line(
-                        self.screen,
-                        border_color,
-                        (marker_rect.x + 9, marker_rect.y + 16),
-                        (marker_rect.x + 17, marker_rect.y + 4),
-                        3,
-                    )
-
-                text_y = option_rect.y + 10
-                for line in wrapped_lines:
-                    line_surface = self.font_small.render(line, True, (0, 0, 0))
-                    self.screen.blit(line_surface, (option_rect.x + 45, text_y))
-                    text_y += 28
-
-            item_y += option_height + item_gap
-
-        self.screen.set_clip(None)
-
-        total_height = item_y - (list_rect.y + 10) + scroll_offset - item_gap
-        max_scroll = max(0, total_height - list_rect.height)
+        option_list.draw(
+            self.screen,
+            list_rect.x + 10,
+            list_rect.y + 10,
+            list_rect,
+            scroll_offset,
+            selected_indices,
+        )
+
+        max_scroll = max(0, option_list.total_height - list_rect.height)
         self._draw_scrollbar(list_rect, scroll_offset, max_scroll)
 
         self._draw_button(button_rect, button_label, len(selected_indices) == self.MAX_SELECTIONS)
-        pygame.display.flip()
+        self.hit_rects = {
+            "options": option_list.row_rects(
+                list_rect.x + 10, list_rect.y + 10, list_rect, scroll_offset
+            ),
+            "button": [button_rect],
+        }
+        display.flip()
+
+        return list_rect, button_rect, max_scroll
 
-        return option_rects, list_rect, button_rect, max_scroll
+    def _option_at(self, option_list, list_rect, scroll_offset, pos):
+        """Return the index of the option under a screen position, or None."""
+        if not list_rect.collidepoint(pos):
+            return None
+        if not list_rect.x + 10 <= pos[0] < list_rect.x + 10 + option_list.width:
+            return None
+        return option_list.row_at(pos[1] - (list_rect.y + 10) + scroll_offset)
 
     def _run_selection_page(self, prompt, options, button_label):
         selected_indices = []
         scroll_offset = 0
+        option_list = OptionList(options, self.font_small, self.screen_x - 174)
 
+        # Only redraw when the scroll position or the selection changed
+        redraw = True
         while True:
-            option_rects, list_rect, button_rect, max_scroll = self._draw_selection_page(
-                prompt, options, selected_indices, button_label, scroll_offset
-            )
+            if redraw:
+                list_rect, button_rect, max_scroll = self._draw_selection_page(
+                    prompt, option_list, selected_indices, button_label, scroll_offset
+                )
+                redraw = False
 
-            for event in pygame.event.get():
+            for event in events.wait():
+                previous = (scroll_offset, len(selected_indices))
                 if event.type == QUIT:
                     sys.exit(0)
                 elif event.type == KEYDOWN:
@@ -224,13 +320,12 @@ class Ikigai(object):
                         if button_rect.collidepoint(mouse_pos) and len(selected_indices) == self.MAX_SELECTIONS:
                             return selected_indices
 
-                        for option_index, option_rect in option_rects:
-                            if option_rect.collidepoint(mouse_pos) and list_rect.collidepoint(mouse_pos):
-                                if option_index in selected_indices:
-                                    selected_indices.remove(option_index)
-                                elif len(selected_indices) < self.MAX_SELECTIONS:
-                                    selected_indices.append(option_index)
-                                break
+                        option_index = self._option_at(option_list, list_rect, scroll_offset, mouse_pos)
+                        if option_index is not None:
+                            if option_index in selected_indices:
+                                selected_indices.remove(option_index)
+                            elif len(selected_indices) < self.MAX_SELECTIONS:
+                                selected_indices.append(option_index)
                     elif event.button == 4:
                         scroll_offset = max(0, scroll_offset - 40)
                     elif event.button == 5:
@@ -238,6 +333,9 @@ class Ikigai(object):
                 elif event.type == MOUSEWHEEL:
                     scroll_offset = min(max_scroll, max(0, scroll_offset - event.y * 40))
 
+                if (scroll_offset, len(selected_indices)) != previous:
+                    redraw = True
+
     def _show_intro(self):
         self.screen.blit(self.background, (0, 0))
 
@@ -251,7 +349,7 @@ class Ikigai(object):
         rendered_lines = []
         for line in lines:
             if line:
-                wrapped = self._wrap_text(line, self.font, self.screen_x - 180)
+                wrapped = fonts.wrap(self.font, line, self.screen_x - 180)
                 rendered_lines.append(wrapped)
                 total_height += len(wrapped) * 40
             else:
@@ -267,10 +365,11 @@ class Ikigai(object):
                 display.text(self.screen, self.font, line, "center", y_pos)
                 y_pos += 40
 
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def _show_end_screen(self):
+        self.hit_rects = {}
         self.screen.blit(self.background, (0, 0))
         display.text(self.screen, self.font_title, "Fin de la tarea", "center", "center")
         display.text(
@@ -280,7 +379,7 @@ class Ikigai(object):
             "center",
             self.screen_y // 2 + 70,
         )
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def _build_results(self, world_options, world_selected, paid_options, paid_selected):
@@ -6,6 +6,7 @@ import pygame
 
 from pygame.locals import *
 from sys import exit
+from utils import assets, display, events, fonts, timing
 
 
 class MRT(object):
@@ -79,6 +80,16 @@ class MRT(object):
         # Path to UI elements (kept in old location)
         self.imagePath = os.path.join(self.directory, "images", "MRT")
 
+        self.PRACTICE_IMAGE_SCALE = 0.7  # shrink practice images uniformly
+        self.MAIN_IMAGE_SCALE = 0.8  # shrink main experiment images
+
+        # Images are decoded and scaled once, then served from memory
+        self.images = assets.ImageCache()
+
+        # Controls on the current screen, for simulated participants
+        # (see utils.simulation.Target)
+        self.hit_rects = {}
+
     def get_image_path(self, trial_num, image_type=None):
         """
         Map old image naming convention to new Mental Rotation Test 3D naming.
@@ -133,8 +144,41 @@ class MRT(object):
         
         return path
 
+    def preloadImages(self):
+        """Decode and scale the trial images and UI sprites before the task starts."""
+        sprites = [
+            "indicator.png",
+            "circleBlue.png",
+            "circleBlank.png",
+            "previous.png",
+            "next.png",
+            "finish.png",
+            "correct.png",
+        ]
+        self.images.preload(os.path.join(self.imagePath, name) for name in sprites)
+        self.images.preload([self.get_image_path('0a'), self.get_image_path('0b')])
+
+        for i in range(3):
+            self.images.preload(
+                (self.get_image_path(f'p{i + 1}', image_type) for image_type in "qabcd"),
+                self.PRACTICE_IMAGE_SCALE,
+            )
+
+        for trial in self.trialNums:
+            self.images.preload(
+                (self.get_image_path(int(trial), image_type) for image_type in "qabcd"),
+                self.MAIN_IMAGE_SCALE,
+            )
+
+    def boxRect(self, box):
+        """Return the pygame Rect of a box given as [top left, bottom right]."""
+        (left, top), (right, bottom) = box
+        return pygame.Rect(int(left), int(top), int(right - left), int(bottom - top))
+
     def pressSpace(self, x, y):
-        self.space = self.xFont.render("(Press spacebar when ready)", 1, (0, 0, 0))
+        self.space = fonts.render(
+            self.xFont, "(Press spacebar when ready)", 1, (0, 0, 0)
+        )
         self.screen.blit(self.space, (x, y))
 
     def mainExperiment(self, section, data):
@@ -142,16 +186,21 @@ class MRT(object):
         # check for first half or second half to determine current trial number
         if section == 1:
             self.curTrial = 1
+            self.trialOffset = 0
         elif section == 2:
             self.curTrial = 13
+            self.trialOffset = 12
 
         # time at task start
-        self.start_time = int(time.time())
+        self.start_time = int(timing.get_time())
+
+        # state shown in the last drawn frame. The screen is only redrawn when
+        # it changes (timer text, current question or any answer)
+        last_frame = None
 
         while main:
-            self.screen.blit(self.background, (0, 0))
             # calculate amount of time left in the task
-            self.curTime = int(time.time()) - self.start_time
+            self.curTime = int(timing.get_time()) - self.start_time
             self.timeLeft = 180 - self.curTime
             # convert seconds to time format
             self.timer = time.strftime("%M:%S", time.gmtime(self.timeLeft))
@@ -167,253 +216,25 @@ class MRT(object):
             else:
                 self.timerColour = (0, 0, 0)
 
-            # display the timer
-            self.timerText = self.xFont.render(
-                "Time left: " + str(self.timer), 1, self.timerColour
-            )
-            self.timerW = self.timerText.get_rect().width
-            self.screen.blit(
-                self.timerText,
-                (self.screen_x / 2 - self.timerW / 2, self.screen_y / 2 + 300),
-            )
             # stop if timer hits 0
             if self.timeLeft <= 0:
                 main = False
 
-            # draw circles
-            if section == 1:
-                self.trialOffset = 0
-            elif section == 2:
-                self.trialOffset = 12
-
-            for i in range(12):
-                # draws indicating arrow above timeline
-                if i + 1 + self.trialOffset == self.curTrial:
-                    self.imgIndicator = pygame.image.load(os.path.join(self.imagePath,
-                                                                       "indicator.png"))
-                    self.indicatorX, self.indicatorY = self.imgIndicator.get_rect().size
-                    self.screen.blit(
-                        self.imgIndicator,
-                        (
-                            (self.screen_x / 2)
-                            - (self.indicatorX * 6)
-                            + (self.indicatorX * i),
-                            self.screen_y / 2 - 400,
-                        ),
-                    )
-
-                # if 2 answers have been selected, draw blue circle for that question
-                if (
-                    data.at[i + self.trialOffset, "user_answer1"] != 0
-                    and data.at[i + self.trialOffset, "user_answer2"] != 0
-                ):
-                    self.imgCircle = pygame.image.load(os.path.join(
-                        self.imagePath, "circleBlue.png")
-                    )
-                else:
-                    self.imgCircle = pygame.image.load(os.path.join(
-                        self.imagePath, "circleBlank.png")
-                    )
-                self.circleX, self.circleY = self.imgCircle.get_rect().size
-                self.screen.blit(
-                    self.imgCircle,
-                    (
-                        (self.screen_x / 2) - (self.circleX * 6) + (self.circleX * i),
-                        self.screen_y / 2 - 350,
-                    ),
-                )
-
-            # draw previous button
-            self.imgPrev = pygame.image.load(os.path.join(self.imagePath, "previous.png"))
-            self.prevX, self.prevY = self.imgPrev.get_rect().size
-            self.prevButton = (
-                [
-                    (self.screen_x / 2) - (self.circleX * 6) - self.prevX - 50,
-                    self.screen_y / 2 - 350,
-                ],
-                [
-                    (self.screen_x / 2) - (self.circleX * 6) - 50,
-                    self.screen_y / 2 - 300,
-                ],
-            )
-            self.screen.blit(
-                self.imgPrev, (self.prevButton[0][0], self.prevButton[0][1])
-            )
-
-            # draw next button
-            self.imgNext = pygame.image.load(os.path.join(self.imagePath, "next.png"))
-            self.nextX, self.nextY = self.imgNext.get_rect().size
-            self.nextButton = (
-                [
-                    (self.screen_x / 2) + (self.circleX * 6) + 50,
-                    self.screen_y / 2 - 350,
-                ],
-                [
-                    (self.screen_x / 2) + (self.circleX * 6) + self.nextX + 50,
-                    self.screen_y / 2 - 300,
-                ],
-            )
-            self.screen.blit(
-                self.imgNext, (self.nextButton[0][0], self.nextButton[0][1])
-            )
-
-            # draw finish button
-            self.imgFinish = pygame.image.load(os.path.join(self.imagePath, "finish.png"))
-            self.finishX, self.finishY = self.imgFinish.get_rect().size
-            self.finishButton = (
-                [
-                    (self.screen_x / 2) + (self.circleX * 6) + self.nextX + 60,
-                    self.screen_y / 2 - 350,
-                ],
-                [
-                    (self.screen_x / 2)
-                    + (self.circleX * 6)
-                    + self.nextX
-                    + 60
-                    + self.finishX,
-                    self.screen_y / 2 - 300,
-                ],
-            )
-            if self.curTrial == 12 or self.curTrial == 24:
-                self.screen.blit(
-                    self.imgFinish, (self.finishButton[0][0], self.finishButton[0][1])
-                )
-
-            # task boxes
-            self.questionX = self.screen_x / 2 - 600  # question box start X position
-            self.answerX = self.screen_x / 2 - 300  # answer boxes start X position
-            self.spacer = 30  # between answer boxes
-            self.letterOffset = 35  # text offset above boxes
-            image_scale = 0.7  # shrink practice images uniformly
-            main_image_scale = 0.8  # shrink main experiment images
-
-            # target image
-            imgQ = pygame.image.load(self.get_image_path(self.curTrial, 'q'))
-            imgQ = pygame.transform.smoothscale(imgQ, (int(imgQ.get_width() * main_image_scale), int(imgQ.get_height() * main_image_scale)))
-            qX, qY = imgQ.get_rect().size
-            qButton = (
-                [self.questionX, (self.screen_y / 2) - (qY / 2)],
-                [self.questionX + qX, (self.screen_y / 2) + (qY / 2)],
-            )
-            self.screen.blit(imgQ, (qButton[0][0], qButton[0][1]))
-            lineQ = self.xFont.render("Q" + str(self.curTrial), 1, (0, 0, 0))
-            self.screen.blit(lineQ, (qButton[0][0], qButton[0][1] - self.letterOffset))
-
-            # answer a
-            imgA = pygame.image.load(self.get_image_path(self.curTrial, 'a'))
-            imgA = pygame.transform.smoothscale(imgA, (int(imgA.get_width() * main_image_scale), int(imgA.get_height() * main_image_scale)))
-            aX, aY = imgA.get_rect().size
-            aButton = (
-                [self.answerX, (self.screen_y / 2) - (aY / 2)],
-                [self.answerX + aX, (self.screen_y / 2) + (aY / 2)],
-            )
-            self.screen.blit(imgA, (aButton[0][0], aButton[0][1]))
-            lineA = self.xFont.render("a", 1, (0, 0, 0))
-            self.screen.blit(lineA, (aButton[0][0], aButton[0][1] - self.letterOffset))
-
-            # answer b
-            imgB = pygame.image.load(self.get_image_path(self.curTrial, 'b'))
-            imgB = pygame.transform.smoothscale(imgB, (int(imgB.get_width() * main_image_scale), int(imgB.get_height() * main_image_scale)))
-            bX, bY = imgB.get_rect().size
-            bButton = (
-                [self.answerX + aX + self.spacer, (self.screen_y / 2) - (bY / 2)],
-                [self.answerX + aX + self.spacer + bX, (self.screen_y / 2) + (bY / 2)],
-            )
-            self.screen.blit(imgB, (bButton[0][0], bButton[0][1]))
-            lineB = self.xFont.render("b", 1, (0, 0, 0))
-            self.screen.blit(lineB, (bButton[0][0], bButton[0][1] - self.letterOffset))
-
-            # answer c
-            imgC = pygame.image.load(self.get_image_path(self.curTrial, 'c'))
-            imgC = pygame.transform.smoothscale(imgC, (int(imgC.get_width() * main_image_scale), int(imgC.get_height() * main_image_scale)))
-            cX, cY = imgC.get_rect().size
-            cButton = (
-                [
-                    self.answerX + bX * 2 + self.spacer * 2,
-                    (self.screen_y / 2) - (cY / 2),
-                ],
-                [
-                    self.answerX + bX * 2 + self.spacer * 2 + cX,
-                    (self.screen_y / 2) + (cY / 2),
-                ],
-            )
-            self.screen.blit(imgC, (cButton[0][0], cButton[0][1]))
-            lineC = self.xFont.render("c", 1, (0, 0, 0))
-            self.screen.blit(lineC, (cButton[0][0], cButton[0][1] - self.letterOffset))
-
-            # answer d
-            imgD = pygame.image.load(self.get_image_path(self.curTrial, 'd'))
-            imgD = pygame.transform.smoothscale(imgD, (int(imgD.get_width() * main_image_scale), int(imgD.get_height() * main_image_scale)))
-            dX, dY = imgD.get_rect().size
-            dButton = (
-                [
-                    self.answerX + cX * 3 + self.spacer * 3,
-                    (self.screen_y / 2) - (dY / 2),
-                ],
-                [
-                    self.answerX + cX * 3 + self.spacer * 3 + dX,
-                    (self.screen_y / 2) + (dY / 2),
-                ],
+            frame = (
+                self.curTrial,
+                self.timer,
+                self.timerColour,
+                tuple(data["user_answer1"]),
+                tuple(data["user_answer2"]),
             )
-            self.screen.blit(imgD, (dButton[0][0], dButton[0][1]))
-            lineD = self.xFont.render("d", 1, (0, 0, 0))
-            self.screen.blit(lineD, (dButton[0][0], dButton[0][1] - self.letterOffset))
-
-            # cache current answers
-            self.answer1 = data.at[self.curTrial - 1, "user_answer1"]
-            self.answer2 = data.at[self.curTrial - 1, "user_answer2"]
-
-            # check what choices have been made/stored, then draw user choice boxes
-            if self.answer1 == 1 or self.answer2 == 1:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        aButton[0][0],
-                        aButton[0][1],
-                        aButton[1][0] - aButton[0][0],
-                        aButton[1][1] - aButton[0][1],
-                    ),
-                    5,
-                )
-            if self.answer1 == 2 or self.answer2 == 2:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        bButton[0][0],
-                        bButton[0][1],
-                        bButton[1][0] - bButton[0][0],
-                        bButton[1][1] - bButton[0][1],
-                    ),
-                    5,
-                )
-            if self.answer1 == 3 or self.answer2 == 3:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        cButton[0][0],
-                        cButton[0][1],
-                        cButton[1][0] - cButton[0][0],
-                        cButton[1][1] - cButton[0][1],
-                    ),
-                    5,
-                )
-            if self.answer1 == 4 or self.answer2 == 4:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        dButton[0][0],
-                        dButton[0][1],
-                        dButton[1][0] - dButton[0][0],
-                        dButton[1][1] - dButton[0][1],
-                    ),
-                    5,
-                )
-
-            for event in pygame.event.get():
+            if frame != last_frame:
+                aButton, bButton, cButton, dButton = self.drawMain(data)
+                display.flip()
+                last_frame = frame
+
+            # sleep until input or the next tick of the timer
+            next_tick = self.start_time + self.curTime + 1 - timing.get_time()
+            for event in events.wait(next_tick * 1000 if main else 0):
                 # check quit
                 if event.type == KEYDOWN and event.key == K_F12:
                     main = False
@@ -526,14 +347,267 @@ class MRT(object):
                         elif self.answer2 == 0:
                             data.at[self.curTrial - 1, "user_answer2"] = 4
 
-            pygame.display.flip()
+        self.hit_rects = {}
+
+    def drawMain(self, data):
+        """Draw the current main experiment question and return its answer boxes."""
+        self.screen.blit(self.background, (0, 0))
+
+        # display the timer
+        self.timerText = fonts.render(
+            self.xFont, "Time left: " + str(self.timer), 1, self.timerColour
+        )
+        self.timerW = self.timerText.get_rect().width
+        self.screen.blit(
+            self.timerText,
+            (self.screen_x / 2 - self.timerW / 2, self.screen_y / 2 + 300),
+        )
+
+        for i in range(12):
+            # draws indicating arrow above timeline
+            if i + 1 + self.trialOffset == self.curTrial:
+                self.imgIndicator = self.images.load(
+                    os.path.join(self.imagePath, "indicator.png")
+                )
+                self.indicatorX, self.indicatorY = self.imgIndicator.get_rect().size
+                self.screen.blit(
+                    self.imgIndicator,
+                    (
+                        (self.screen_x / 2)
+                        - (self.indicatorX * 6)
+                        + (self.indicatorX * i),
+                        self.screen_y / 2 - 400,
+                    ),
+                )
+
+            # if 2 answers have been selected, draw blue circle for that question
+            if (
+                data.at[i + self.trialOffset, "user_answer1"] != 0
+                and data.at[i + self.trialOffset, "user_answer2"] != 0
+            ):
+                self.imgCircle = self.images.load(
+                    os.path.join(self.imagePath, "circleBlue.png")
+                )
+            else:
+                self.imgCircle = self.images.load(
+                    os.path.join(self.imagePath, "circleBlank.png")
+                )
+            self.circleX, self.circleY = self.imgCircle.get_rect().size
+            self.screen.blit(
+                self.imgCircle,
+                (
+                    (self.screen_x / 2) - (self.circleX * 6) + (self.circleX * i),
+                    self.screen_y / 2 - 350,
+                ),
+            )
+
+        # draw previous button
+        self.imgPrev = self.images.load(os.path.join(self.imagePath, "previous.png"))
+        self.prevX, self.prevY = self.imgPrev.get_rect().size
+        self.prevButton = (
+            [
+                (self.screen_x / 2) - (self.circleX * 6) - self.prevX - 50,
+                self.screen_y / 2 - 350,
+            ],
+            [
+                (self.screen_x / 2) - (self.circleX * 6) - 50,
+                self.screen_y / 2 - 300,
+            ],
+        )
+        self.screen.blit(
+            self.imgPrev, (self.prevButton[0][0], self.prevButton[0][1])
+        )
+
+        # draw next button
+        self.imgNext = self.images.load(os.path.join(self.imagePath, "next.png"))
+        self.nextX, self.nextY = self.imgNext.get_rect().size
+        self.nextButton = (
+            [
+                (self.screen_x / 2) + (self.circleX * 6) + 50,
+                self.screen_y / 2 - 350,
+            ],
+            [
+                (self.screen_x / 2) + (self.circleX * 6) + self.nextX + 50,
+                self.screen_y / 2 - 300,
+            ],
+        )
+        self.screen.blit(
+            self.imgNext, (self.nextButton[0][0], self.nextButton[0][1])
+        )
+
+        # draw finish button
+        self.imgFinish = self.images.load(os.path.join(self.imagePath, "finish.png"))
+        self.finishX, self.finishY = self.imgFinish.get_rect().size
+        self.finishButton = (
+            [
+                (self.screen_x / 2) + (self.circleX * 6) + self.nextX + 60,
+                self.screen_y / 2 - 350,
+            ],
+            [
+                (self.screen_x / 2)
+                + (self.circleX * 6)
+                + self.nextX
+                + 60
+                + self.finishX,
+                self.screen_y / 2 - 300,
+            ],
+        )
+        if self.curTrial == 12 or self.curTrial == 24:
+            self.screen.blit(
+                self.imgFinish, (self.finishButton[0][0], self.finishButton[0][1])
+            )
+
+        # task boxes
+        self.questionX = self.screen_x / 2 - 600  # question box start X position
+        self.answerX = self.screen_x / 2 - 300  # answer boxes start X position
+        self.spacer = 30  # between answer boxes
+        self.letterOffset = 35  # text offset above boxes
+        main_image_scale = self.MAIN_IMAGE_SCALE
+
+        # target image
+        imgQ = self.images.load(self.get_image_path(self.curTrial, 'q'), main_image_scale)
+        qX, qY = imgQ.get_rect().size
+        qButton = (
+            [self.questionX, (self.screen_y / 2) - (qY / 2)],
+            [self.questionX + qX, (self.screen_y / 2) + (qY / 2)],
+        )
+        self.screen.blit(imgQ, (qButton[0][0], qButton[0][1]))
+        lineQ = fonts.render(self.xFont, "Q" + str(self.curTrial), 1, (0, 0, 0))
+        self.screen.blit(lineQ, (qButton[0][0], qButton[0][1] - self.letterOffset))
+
+        # answer a
+        imgA = self.images.load(self.get_image_path(self.curTrial, 'a'), main_image_scale)
+        aX, aY = imgA.get_rect().size
+        aButton = (
+            [self.answerX, (self.screen_y / 2) - (aY / 2)],
+            [self.answerX + aX, (self.screen_y / 2) + (aY / 2)],
+        )
+        self.screen.blit(imgA, (aButton[0][0], aButton[0][1]))
+        lineA = fonts.render(self.xFont, "a", 1, (0, 0, 0))
+        self.screen.blit(lineA, (aButton[0][0], aButton[0][1] - self.letterOffset))
+
+        # answer b
+        imgB = self.images.load(self.get_image_path(self.curTrial, 'b'), main_image_scale)
+        bX, bY = imgB.get_rect().size
+        bButton = (
+            [self.answerX + aX + self.spacer, (self.screen_y / 2) - (bY / 2)],
+            [self.answerX + aX + self.spacer + bX, (self.screen_y / 2) + (bY / 2)],
+        )
+        self.screen.blit(imgB, (bButton[0][0], bButton[0][1]))
+        lineB = fonts.render(self.xFont, "b", 1, (0, 0, 0))
+        self.screen.blit(lineB, (bButton[0][0], bButton[0][1] - self.letterOffset))
+
+        # answer c
+        imgC = self.images.load(self.get_image_path(self.curTrial, 'c'), main_image_scale)
+        cX, cY = imgC.get_rect().size
+        cButton = (
+            [
+                self.answerX + bX * 2 + self.spacer * 2,
+                (self.screen_y / 2) - (cY / 2),
+            ],
+            [
+                self.answerX + bX * 2 + self.spacer * 2 + cX,
+                (self.screen_y / 2) + (cY / 2),
+            ],
+        )
+        self.screen.blit(imgC, (cButton[0][0], cButton[0][1]))
+        lineC = fonts.render(self.xFont, "c", 1, (0, 0, 0))
+        self.screen.blit(lineC, (cButton[0][0], cButton[0][1] - self.letterOffset))
+
+        # answer d
+        imgD = self.images.load(self.get_image_path(self.curTrial, 'd'), main_image_scale)
+        dX, dY = imgD.get_rect().size
+        dButton = (
+            [
+                self.answerX + cX * 3 + self.spacer * 3,
+                (self.screen_y / 2) - (dY / 2),
+            ],
+            [
+                self.answerX + cX * 3 + self.spacer * 3 + dX,
+                (self.screen_y / 2) + (dY / 2),
+            ],
+        )
+        self.screen.blit(imgD, (dButton[0][0], dButton[0][1]))
+        lineD = fonts.render(self.xFont, "d", 1, (0, 0, 0))
+        self.screen.blit(lineD, (dButton[0][0], dButton[0][1] - self.letterOffset))
+
+        # cache current answers
+        self.answer1 = data.at[self.curTrial - 1, "user_answer1"]
+        self.answer2 = data.at[self.curTrial - 1, "user_answer2"]
+
+        # check what choices have been made/stored, then draw user choice boxes
+        if self.answer1 == 1 or self.answer2 == 1:
+            pygame.draw.rect(
+                self.screen,
+                (0, 0, 255),
+                (
+                    aButton[0][0],
+                    aButton[0][1],
+                    aButton[1][0] - aButton[0][0],
+                    aButton[1][1] - aButton[0][1],
+                ),
+                5,
+            )
+        if self.answer1 == 2 or self.answer2 == 2:
+            pygame.draw.rect(
+                self.screen,
+                (0, 0, 255),
+                (
+                    bButton[0][0],
+                    bButton[0][1],
+                    bButton[1][0] - bButton[0][0],
+                    bButton[1][1] - bButton[0][1],
+                ),
+                5,
+            )
+        if self.answer1 == 3 or self.answer2 == 3:
+            pygame.draw.rect(
+                self.screen,
+                (0, 0, 255),
+                (
+                    cButton[0][0],
+                    cButton[0][1],
+                    cButton[1][0] - cButton[0][0],
+                    cButton[1][1] - cButton[0][1],
+                ),
+                5,
+            )
+        if self.answer1 == 4 or self.answer2 == 4:
+            pygame.draw.rect(
+                self.screen,
+                (0, 0, 255),
+                (
+                    dButton[0][0],
+                    dButton[0][1],
+                    dButton[1][0] - dButton[0][0],
+                    dButton[1][1] - dButton[0][1],
+                ),
+                5,
+            )
+
+        self.hit_rects = {
+            "answers": [
+                self.boxRect(box) for box in (aButton, bButton, cButton, dButton)
+            ],
+            "previous": [self.boxRect(self.prevButton)],
+            "next": [self.boxRect(self.nextButton)],
+            "finish": [self.boxRect(self.finishButton)]
+            if self.curTrial == 12 or self.curTrial == 24
+            else [],
+        }
+
+        return aButton, bButton, cButton, dButton
 
     def run(self):
+        self.preloadImages()
+
         # instructions
         # page 1
+        loop = events.EventLoop()
         instructions = True
         while instructions:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     instructions = False
                 elif event.type == KEYDOWN and event.key == K_F12:
@@ -542,55 +616,60 @@ class MRT(object):
 
             self.screen.blit(self.background, (0, 0))
 
-            self.title = self.xFont.render("Mental Rotation Task", 1, (0, 0, 0))
+            self.title = fonts.render(self.xFont, "Mental Rotation Task", 1, (0, 0, 0))
             self.titleW = self.title.get_rect().width
             self.screen.blit(
                 self.title,
                 (self.screen_x / 2 - self.titleW / 2, self.screen_y / 2 - 500),
             )
 
-            self.line1 = self.xFont.render(
-                "Please look at these five figures:", 1, (0, 0, 0)
+            self.line1 = fonts.render(
+                self.xFont, "Please look at these five figures:", 1, (0, 0, 0)
             )
             self.screen.blit(self.line1, (100, self.screen_y / 2 - 400))
 
-            img0a = pygame.image.load(self.get_image_path('0a'))
+            img0a = self.images.load(self.get_image_path('0a'))
             x, y = img0a.get_rect().size
             self.screen.blit(
                 img0a, ((self.screen_x / 2) - (x / 2), self.screen_y / 2 - 360)
             )
 
-            line2 = self.xFont.render(
+            line2 = fonts.render(
+                self.xFont,
                 "Note that these are all pictures of the same object which is shown from different angles.",
                 1,
                 (0, 0, 0),
             )
             self.screen.blit(line2, (100, self.screen_y / 2 - 70))
-            line2a = self.xFont.render(
+            line2a = fonts.render(
+                self.xFont,
                 "Try to imagine moving the object (or yourself with respect to the object), as you look from one drawing to the next.",
                 1,
                 (0, 0, 0),
             )
             self.screen.blit(line2a, (100, self.screen_y / 2 - 40))
 
-            img0b = pygame.image.load(self.get_image_path('0b'))
+            img0b = self.images.load(self.get_image_path('0b'))
             x, y = img0b.get_rect().size
             self.screen.blit(
                 img0b, ((self.screen_x / 2) - (x / 2), self.screen_y / 2 )
             )
 
-            line3 = self.xFont.render(
+            line3 = fonts.render(
+                self.xFont,
                 "Above are two drawings of a new figure that is different from the one shown in the first 5 drawings.",
                 1,
                 (0, 0, 0),
             )
             self.screen.blit(line3, (50, self.screen_y / 2 + 280))
-            line3a = self.xFont.render(
+            line3a = fonts.render(
+                self.xFont,
                 "Satisfy yourself that these two drawings show an object that is different, and cannot be rotated to be identical with",
                 1,
                 (0, 0, 0),
             )
-            line3b = self.xFont.render(
+            line3b = fonts.render(
+                self.xFont,
                 "the object shown in the first five drawings.",
                 1,
                 (0, 0, 0),
@@ -601,16 +680,21 @@ class MRT(object):
 
             self.pressSpace(100, self.screen_y / 2 + 400)
 
-            pygame.display.flip()
+            display.flip()
 
         # page 2 - practice questions
+        loop = events.EventLoop()
         instructions = True
         practiceCompleted = 0
         while instructions:
+            loop.idle()
             self.screen.blit(self.background, (0, 0))
-            line1 = self.xFont.render("Here are 3 practice questions.", 1, (0, 0, 0))
+            line1 = fonts.render(
+                self.xFont, "Here are 3 practice questions.", 1, (0, 0, 0)
+            )
             self.screen.blit(line1, (100, self.screen_y / 2 - 450))
-            line2 = self.xFont.render(
+            line2 = fonts.render(
+                self.xFont,
                 "For each question, 2 of the 4 pictures show the same object. Click on the 2 matching pictures in each question...",
                 1,
                 (0, 0, 0),
@@ -621,7 +705,7 @@ class MRT(object):
             self.answerX = self.screen_x / 2 - 300  # answer boxes start X position
             self.spacer = 40  # between answer boxes
             self.letterOffset = 35  # text offset above boxes
-            image_scale = 0.7  # shrink practice images uniformly
+            image_scale = self.PRACTICE_IMAGE_SCALE
             # lists used to hold box locations
             qButton = []
             aButton = []
@@ -630,11 +714,7 @@ class MRT(object):
             dButton = []
             # draws image boxes, 3 rows. appends location of boxes, for each row, into lists above
             for i in range(3):
-                imgQ = pygame.image.load(self.get_image_path(f'p{i + 1}', 'q'))
-                qX, qY = imgQ.get_rect().size
-                imgQ = pygame.transform.smoothscale(
-                    imgQ, (int(qX * image_scale), int(qY * image_scale))
-                )
+                imgQ = self.images.load(self.get_image_path(f'p{i + 1}', 'q'), image_scale)
                 qX, qY = imgQ.get_rect().size
                 qButton.append(
                     (
@@ -646,16 +726,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgQ, (qButton[i][0][0], qButton[i][0][1]))
-                lineQ = self.xFont.render("Q" + str(i + 1), 1, (0, 0, 0))
+                lineQ = fonts.render(self.xFont, "Q" + str(i + 1), 1, (0, 0, 0))
                 self.screen.blit(
                     lineQ, (qButton[i][0][0], qButton[i][0][1] - self.letterOffset)
                 )
 
-                imgA = pygame.image.load(self.get_image_path(f'p{i + 1}', 'a'))
-                aX, aY = imgA.get_rect().size
-                imgA = pygame.transform.smoothscale(
-                    imgA, (int(aX * image_scale), int(aY * image_scale))
-                )
+                imgA = self.images.load(self.get_image_path(f'p{i + 1}', 'a'), image_scale)
                 aX, aY = imgA.get_rect().size
                 aButton.append(
                     (
@@ -664,16 +740,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgA, (aButton[i][0][0], aButton[i][0][1]))
-                lineA = self.xFont.render("a", 1, (0, 0, 0))
+                lineA = fonts.render(self.xFont, "a", 1, (0, 0, 0))
                 self.screen.blit(
                     lineA, (aButton[i][0][0], aButton[i][0][1] - self.letterOffset)
                 )
 
-                imgB = pygame.image.load(self.get_image_path(f'p{i + 1}', 'b'))
-                bX, bY = imgB.get_rect().size
-                imgB = pygame.transform.smoothscale(
-                    imgB, (int(bX * image_scale), int(bY * image_scale))
-                )
+                imgB = self.images.load(self.get_image_path(f'p{i + 1}', 'b'), image_scale)
                 bX, bY = imgB.get_rect().size
                 bButton.append(
                     (
@@ -688,16 +760,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgB, (bButton[i][0][0], bButton[i][0][1]))
-                lineB = self.xFont.render("b", 1, (0, 0, 0))
+                lineB = fonts.render(self.xFont, "b", 1, (0, 0, 0))
                 self.screen.blit(
                     lineB, (bButton[i][0][0], bButton[i][0][1] - self.letterOffset)
                 )
 
-                imgC = pygame.image.load(self.get_image_path(f'p{i + 1}', 'c'))
-                cX, cY = imgC.get_rect().size
-                imgC = pygame.transform.smoothscale(
-                    imgC, (int(cX * image_scale), int(cY * image_scale))
-                )
+                imgC = self.images.load(self.get_image_path(f'p{i + 1}', 'c'), image_scale)
                 cX, cY = imgC.get_rect().size
                 cButton.append(
                     (
@@ -712,16 +780,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgC, (cButton[i][0][0], cButton[i][0][1]))
-                lineC = self.xFont.render("c", 1, (0, 0, 0))
+                lineC = fonts.render(self.xFont, "c", 1, (0, 0, 0))
                 self.screen.blit(
                     lineC, (cButton[i][0][0], cButton[i][0][1] - self.letterOffset)
                 )
 
-                imgD = pygame.image.load(self.get_image_path(f'p{i + 1}', 'd'))
-                dX, dY = imgD.get_rect().size
-                imgD = pygame.transform.smoothscale(
-                    imgD, (int(dX * image_scale), int(dY * image_scale))
-                )
+                imgD = self.images.load(self.get_image_path(f'p{i + 1}', 'd'), image_scale)
                 dX, dY = imgD.get_rect().size
                 dButton.append(
                     (
@@ -736,7 +800,7 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgD, (dButton[i][0][0], dButton[i][0][1]))
-                lineD = self.xFont.render("d", 1, (0, 0, 0))
+                lineD = fonts.render(self.xFont, "d", 1, (0, 0, 0))
                 self.screen.blit(
                     lineD, (dButton[i][0][0], dButton[i][0][1] - self.letterOffset)
                 )
@@ -794,7 +858,7 @@ class MRT(object):
 
             # check answer box clicks
             (mouseX, mouseY) = pygame.mouse.get_pos()
-            for event in pygame.event.get():
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     # check all practice questions have been completed before showing answers
                     if (
@@ -880,16 +944,26 @@ class MRT(object):
 
             self.pressSpace(100, (self.screen_y / 2) + 450)
 
-            pygame.display.flip()
+            self.hit_rects = {
+                "answers": [
+                    self.boxRect(box)
+                    for boxes in (aButton, bButton, cButton, dButton)
+                    for box in boxes
+                ]
+            }
+            display.flip()
 
         # practise answers
+        self.hit_rects = {}
+        loop = events.EventLoop()
         answers = True
         while answers:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     answers = False
             # draws a tick next to the correct answers for practice questions
-            imgCorrect = pygame.image.load(os.path.join(self.imagePath, "correct.png"))
+            imgCorrect = self.images.load(os.path.join(self.imagePath, "correct.png"))
             correctX, correctY = imgCorrect.get_rect().size
             correctAnswers = [
                 [bButton[0][0], bButton[0][1]],
@@ -904,37 +978,43 @@ class MRT(object):
                     imgCorrect, (correctAnswers[i][0], correctAnswers[i][1])
                 )
 
-            pygame.display.flip()
+            display.flip()
 
         # page 3
+        loop = events.EventLoop()
         instructions = True
         while instructions:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     instructions = False
 
             self.screen.blit(self.background, (0, 0))
-            line1 = self.xFont.render(
+            line1 = fonts.render(
+                self.xFont,
                 "When you do the test, please remember that for each problem set there are 2, and only 2, figures that match the target figure.",
                 1,
                 (0, 0, 0),
             )
             self.screen.blit(line1, (60, self.screen_y / 2 - 300))
 
-            line2 = self.xFont.render(
+            line2 = fonts.render(
+                self.xFont,
                 "You will only be given a point if you mark off BOTH correct matching figures, marking off only one of these will result in no marks.",
                 1,
                 (0, 0, 0),
             )
             self.screen.blit(line2, (60, self.screen_y / 2 - 200))
-            line2a = self.xFont.render(
+            line2a = fonts.render(
+                self.xFont,
                 "Unlike the practice questions, you WON'T be told what the correct answer is.",
                 1,
                 (0, 0, 0),
             )
             self.screen.blit(line2a, (60, self.screen_y / 2 - 100))
 
-            line3 = self.xFont.render(
+            line3 = fonts.render(
+                self.xFont,
                 "You will have 3 minutes to complete 12 questions. You may complete them in any order you wish.",
                 1,
                 (0, 0, 0),
@@ -943,36 +1023,41 @@ class MRT(object):
 
             self.pressSpace(100, (self.screen_y / 2) + 300)
 
-            pygame.display.flip()
+            display.flip()
 
         # page 4
+        loop = events.EventLoop()
         instructions = True
         while instructions:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     instructions = False
 
             self.screen.blit(self.background, (0, 0))
             largeFont = pygame.font.SysFont("arial", 50)
-            line1 = largeFont.render("Ready?", 1, (0, 0, 0))
+            line1 = fonts.render(largeFont, "Ready?", 1, (0, 0, 0))
             self.screen.blit(line1, (100, self.screen_y / 2 - 100))
 
             self.pressSpace(100, (self.screen_y / 2) + 100)
 
-            pygame.display.flip()
+            display.flip()
 
         # main loop
         self.mainExperiment(1, self.allData)
 
         # break screen
+        loop = events.EventLoop()
         breakScreen = True
         while breakScreen:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     breakScreen = False
 
             self.screen.blit(self.background, (0, 0))
-            text = self.xFont.render(
+            text = fonts.render(
+                self.xFont,
                 "Take a quick break. We will do another block of 12 questions when you're ready.",
                 1,
                 (0, 0, 0),
@@ -982,7 +1067,7 @@ class MRT(object):
 
             self.pressSpace(100, (self.screen_y / 2) + 100)
 
-            pygame.display.flip()
+            display.flip()
 
         # second half
         self.mainExperiment(2, self.allData)
@@ -1021,19 +1106,21 @@ class MRT(object):
         self.allData = self.allData[self.columns]
 
         # display end screen
+        loop = events.EventLoop()
         instructions = True
         while instructions:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     instructions = False
 
             self.screen.blit(self.background, (0, 0))
-            endText = largeFont.render("End of task.", 1, (0, 0, 0))
+            endText = fonts.render(largeFont, "End of task.", 1, (0, 0, 0))
             self.screen.blit(endText, (100, self.screen_y / 2))
 
             self.pressSpace(100, (self.screen_y / 2) + 100)
 
-            pygame.display.flip()
+            display.flip()
 
         print("- MRT complete")
 
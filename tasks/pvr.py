@@ -1,11 +1,10 @@
 import sys
 import math
-import time
 import pygame
 import pandas as pd
 
 from pygame.locals import *
-from utils import display
+from utils import display, timing
 
 
 class PVR(object):
@@ -116,7 +115,7 @@ class PVR(object):
             y = start_y + i * line_height
             display.text(self.screen, self.font, line, "center", y)
 
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def _run_task(self):
@@ -128,7 +127,7 @@ class PVR(object):
         current_angle = self.initial_angle
         dragging = False
         last_mouse_x = 0
-        start_time = int(round(time.time() * 1000))
+        start_time = timing.get_time_ms()
 
         clock = pygame.time.Clock()
         running = True
@@ -165,10 +164,10 @@ class PVR(object):
             hint = "Pulsa Enter cuando la línea esté vertical"
             display.text(self.screen, self.font_small, hint, "center", self.screen_y - 60)
 
-            pygame.display.flip()
+            display.flip()
             clock.tick(60)
 
-        end_time = int(round(time.time() * 1000))
+        end_time = timing.get_time_ms()
         rotation_time_ms = end_time - start_time
 
         # Normalize angle to [0, 360) for consistent output
@@ -188,7 +187,7 @@ class PVR(object):
             "center",
             "center",
         )
-        pygame.display.flip()
+        display.flip()
         display.wait_for_space()
 
     def run(self):
@@ -5,7 +5,7 @@ import pandas as pd
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import display, events, fonts, journal, performance
 
 
 class QuestionnaireTask(object):
@@ -120,7 +120,7 @@ class QuestionnaireTask(object):
         line_heights = []
         for line in instructions:
             if line:
-                wrapped = self._wrap_text_with_font(font, line, max_width)
+                wrapped = fonts.wrap(font, line, max_width)
                 h = len(wrapped) * line_spacing
                 line_heights.append(h)
                 total_height += h
@@ -133,35 +133,37 @@ class QuestionnaireTask(object):
 
         for i, line in enumerate(instructions):
             if line:
-                wrapped = self._wrap_text_with_font(font, line, max_width)
+                wrapped = fonts.wrap(font, line, max_width)
                 for wline in wrapped:
-                    surf = font.render(wline, True, (0, 0, 0))
+                    surf = fonts.render(font, wline, True, (0, 0, 0))
                     x_pos = (self.screen_x - surf.get_width()) // 2
                     self.screen.blit(surf, (x_pos, y_pos))
                     y_pos += line_spacing
             else:
                 y_pos += gap_spacing
 
-        pygame.display.flip()
+        display.flip()
 
     def draw_statement(self, trial_index, current_response):
         self.screen.blit(self.background, (0, 0))
 
         back_text = "Volver al enunciado anterior"
-        back_surface = self.font.render(back_text, True, (0, 0, 0))
+        back_surface = fonts.render(self.font, back_text, True, (0, 0, 0))
         self.back_button_rect = pygame.Rect(20, 40, back_surface.get_width() + 30, back_surface.get_height() + 20)
         pygame.draw.rect(self.screen, (200, 200, 200), self.back_button_rect)
         pygame.draw.rect(self.screen, (0, 0, 0), self.back_button_rect, 2)
         self.screen.blit(back_surface, (35, 50))
 
         counter_text = f"{trial_index + 1} / {len(self.randomized_statements)}"
-        counter_surface = self.font.render(counter_text, True, (0, 0, 0))
+        counter_surface = fonts.render(self.font, counter_text, True, (0, 0, 0))
         self.screen.blit(counter_surface, (self.screen_x - counter_surface.get_width() - 50, 50))
 
         # Draw item prompt above the statement (dark grey, centered)
         statement_y = self.screen_y // 3
         if self.item_prompt:
-            prompt_surf = self.font_prompt.render(self.item_prompt, True, (80, 80, 80))
+            prompt_surf = fonts.render(
+                self.font_prompt, self.item_prompt, True, (80, 80, 80)
+            )
             prompt_x = (self.screen_x - prompt_surf.get_width()) // 2
             prompt_y = statement_y - prompt_surf.get_height() - 12
             self.screen.blit(prompt_surf, (prompt_x, prompt_y))
@@ -191,25 +193,31 @@ class QuestionnaireTask(object):
                 self.screen, (0, 0, 0), (x_pos, scale_y), 32 if len(option["label"]) > 1 else 25, 2
             )
 
-            num_surface = self.font_large.render(option["label"], True, text_color)
+            num_surface = fonts.render(
+                self.font_large, option["label"], True, text_color
+            )
             self.screen.blit(
                 num_surface, (x_pos - num_surface.get_width() // 2, scale_y - num_surface.get_height() // 2)
             )
 
             if option.get("desc1"):
-                desc1_surface = self.font_small.render(option["desc1"], True, (0, 0, 0))
+                desc1_surface = fonts.render(
+                    self.font_small, option["desc1"], True, (0, 0, 0)
+                )
                 self.screen.blit(
                     desc1_surface, (x_pos - desc1_surface.get_width() // 2, scale_y + 45)
                 )
 
             if option.get("desc2"):
-                desc2_surface = self.font_small.render(option["desc2"], True, (0, 0, 0))
+                desc2_surface = fonts.render(
+                    self.font_small, option["desc2"], True, (0, 0, 0)
+                )
                 self.screen.blit(
                     desc2_surface, (x_pos - desc2_surface.get_width() // 2, scale_y + 72)
                 )
 
         change_text = "Cambiar respuesta"
-        change_surface = self.font_small.render(change_text, True, (0, 0, 0))
+        change_surface = fonts.render(self.font_small, change_text, True, (0, 0, 0))
         button_width = change_surface.get_width() + 40
         button_x = (self.screen_x - button_width) // 2
         button_y = self.screen_y - 170
@@ -221,63 +229,24 @@ class QuestionnaireTask(object):
         if self.keyboard_hint is None:
             self.keyboard_hint = "Pulsa la barra espaciadora para continuar."
         instr_text = self.keyboard_hint
-        instr_surface = self.font_small.render(instr_text, True, (100, 100, 100))
+        instr_surface = fonts.render(self.font_small, instr_text, True, (100, 100, 100))
         self.screen.blit(
             instr_surface, ((self.screen_x - instr_surface.get_width()) // 2, self.screen_y - 100)
         )
 
-        pygame.display.flip()
+        display.flip()
 
     def draw_wrapped_text(self, text, x, y, max_width, center=False, line_height=35):
-        words = text.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            test_line = " ".join(current_line + [word])
-            test_surface = self.font.render(test_line, True, (0, 0, 0))
-
-            if test_surface.get_width() <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(" ".join(current_line))
-                current_line = [word]
-
-        if current_line:
-            lines.append(" ".join(current_line))
-
-        for i, line in enumerate(lines):
-            line_surface = self.font.render(line, True, (0, 0, 0))
-            if center:
-                x_pos = (self.screen_x - line_surface.get_width()) // 2
-            else:
-                x_pos = x
-            self.screen.blit(line_surface, (x_pos, y + i * line_height))
+        paragraph = fonts.layout(
+            self.font, text, max_width, line_height, "center" if center else "left"
+        )
+        if center:
+            x = (self.screen_x - paragraph.width) // 2
+        paragraph.blit(self.screen, x, y)
 
     def draw_wrapped_text_centered(self, text, y, max_width):
         self.draw_wrapped_text(text, 0, y, max_width, center=True, line_height=40)
 
-    def _wrap_text_with_font(self, font, text, max_width):
-        """Return a list of wrapped line strings using the given font."""
-        words = text.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            test_line = " ".join(current_line + [word])
-            if font.size(test_line)[0] <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(" ".join(current_line))
-                current_line = [word]
-
-        if current_line:
-            lines.append(" ".join(current_line))
-
-        return lines if lines else [""]
-
     def run(self):
         self.draw_instructions()
         display.wait_for_space()
@@ -297,7 +266,7 @@ class QuestionnaireTask(object):
 
             waiting = True
             while waiting:
-                for event in pygame.event.get():
+                for event in events.wait():
                     if event.type == QUIT:
                         sys.exit(0)
                     elif event.type == KEYDOWN:
@@ -306,6 +275,10 @@ class QuestionnaireTask(object):
                         elif event.key == K_SPACE:
                             if current_response:
                                 self.all_data.at[current_trial, "respuesta"] = current_response
+                                journal.record(
+                                    self.title, self.all_data.loc[current_trial].to_dict()
+                                )
+                                performance.end_trial(self.title)
                                 current_trial += 1
                                 waiting = False
                         else:
@@ -334,7 +307,7 @@ class QuestionnaireTask(object):
             "center",
             self.screen_y // 2 + 100,
         )
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
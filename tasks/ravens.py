@@ -3,6 +3,8 @@ import pygame
 import pandas as pd
 from pygame.locals import *
 from sys import exit
+from concurrent.futures import ThreadPoolExecutor
+from utils import display, events, fonts, journal, performance
 
 
  # INSTRUCCIONES PARA PASAR LA TAREA: EXPLICAR Y CUESTIONAR SI SELECCIÓN ERRÓNEA PARA LOS 5 PRIMEROS ENSAYOS
@@ -179,11 +181,21 @@ class Ravens(object):
         # Selected answer for current trial
         self.selected_answer = None
         
-        # Path for saving data
+        # Path for saving data. When set, answers are appended to a journal
+        # next to it as they are given, and compacted into the file at the end
         self.dataPath = None
+        self.dataJournal = None
         
         # Cache for image dimensions (to avoid loading sample images repeatedly)
         self.cached_image_dimensions = None
+
+        # Image scaling of the reference matrix and the answer options
+        self.REF_SCALE = 1
+        self.OPTION_SCALE = 0.85
+
+        # Trial images are loaded ahead of time on a background thread
+        self.prefetcher = ThreadPoolExecutor(max_workers=1)
+        self.prefetched = {}  # trial index -> future of (reference, options)
     
     def get_image_path(self, trial_id, image_type):
         """
@@ -210,9 +222,11 @@ class Ravens(object):
     
     def show_instructions(self):
         """Display the instruction screen"""
+        loop = events.EventLoop()
         instructions = True
         while instructions:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     instructions = False
                 elif event.type == KEYDOWN and event.key == K_F12:
@@ -225,7 +239,8 @@ class Ravens(object):
             self.screen.blit(self.background, (0, 0))
             
             # Title
-            title = self.titleFont.render(
+            title = fonts.render(
+                self.titleFont,
                 "Test de Matrices Progresivas de Raven con escala estándar",
                 1, (0, 0, 0)
             )
@@ -253,39 +268,166 @@ class Ravens(object):
             ]
             
             for i, line in enumerate(instructions_lines):
-                text = self.instructionsFont.render(line, 1, (0, 0, 0))
+                text = fonts.render(self.instructionsFont, line, 1, (0, 0, 0))
                 text_w = text.get_rect().width
                 self.screen.blit(text, (self.screen_x / 2 - text_w / 2, y_offset + i * line_spacing))
             
-            pygame.display.flip()
+            display.flip()
     
+    def load_trial_images(self, trial):
+        """Load and scale the reference and option images of a trial.
+
+        Runs on the prefetch thread; the surfaces are only drawn once, onto
+        the trial composition (see build_trial).
+        """
+        ref_image = pygame.image.load(self.get_image_path(trial['id'], 0))
+
+        # Scale reference image to be larger
+        ref_w = int(ref_image.get_width() * self.REF_SCALE)
+        ref_h = int(ref_image.get_height() * self.REF_SCALE)
+        ref_image = pygame.transform.smoothscale(ref_image, (ref_w, ref_h))
+
+        option_images = [
+            pygame.image.load(self.get_image_path(trial['id'], i + 1))
+            for i in range(trial['num_options'])
+        ]
+
+        # All options are drawn at the size of the first option of the task
+        if self.cached_image_dimensions is None:
+            self.cached_image_dimensions = option_images[0].get_size()
+
+        option_w = int(self.cached_image_dimensions[0] * self.OPTION_SCALE)
+        option_h = int(self.cached_image_dimensions[1] * self.OPTION_SCALE)
+        option_images = [
+            pygame.transform.smoothscale(image, (option_w, option_h))
+            for image in option_images
+        ]
+
+        return ref_image, option_images
+
+    def prefetch_trial(self, index):
+        """Start loading the images of a trial in the background."""
+        if index < len(self.trials) and index not in self.prefetched:
+            self.prefetched[index] = self.prefetcher.submit(
+                self.load_trial_images, self.trials[index]
+            )
+
+    def build_trial(self, index):
+        """Compose the full screen of a trial, without any selection.
+
+        Returns the composed surface and the option buttons used for click
+        detection and for redrawing the selection highlight.
+        """
+        trial = self.trials[index]
+        self.prefetch_trial(index)
+        ref_image, option_images = self.prefetched.pop(index).result()
+
+        composition = self.background.copy()
+
+        # Draw trial identifier at the top
+        trial_id_text = fonts.render(
+            self.titleFont, f"Ensayo {trial['id']}", 1, (0, 0, 0)
+        )
+        trial_id_w = trial_id_text.get_rect().width
+        composition.blit(trial_id_text, (self.screen_x / 2 - trial_id_w / 2, 50))
+
+        # Center the reference image
+        ref_w, ref_h = ref_image.get_size()
+        ref_x = self.screen_x / 2 - ref_w / 2
+        ref_y = 150
+        composition.blit(ref_image, (ref_x, ref_y))
+
+        # Display answer options in grid (3x2 or 4x2)
+        num_options = trial['num_options']
+        cols = 4 if num_options == 8 else 3
+
+        spacing_x = 20
+        spacing_y = 20
+
+        # Calculate starting position to center the grid
+        option_w, option_h = option_images[0].get_size()
+        grid_width = cols * option_w + (cols - 1) * spacing_x
+        grid_start_x = self.screen_x / 2 - grid_width / 2
+        grid_start_y = ref_y + ref_h + 50
+
+        option_buttons = []
+        for i, option_image in enumerate(option_images):
+            row = i // cols
+            col = i % cols
+
+            option_x = grid_start_x + col * (option_w + spacing_x)
+            option_y = grid_start_y + row * (option_h + spacing_y)
+
+            composition.blit(option_image, (option_x, option_y))
+
+            # Store button position for click detection
+            option_buttons.append({
+                'option': i + 1,
+                'rect': pygame.Rect(option_x, option_y, option_w, option_h)
+            })
+
+        # Display instruction at bottom
+        instruction_text = fonts.render(
+            self.instructionsFont,
+            "Selecciona una respuesta y pulsa la barra espaciadora para continuar",
+            1, (100, 100, 100)
+        )
+        instruction_w = instruction_text.get_rect().width
+        composition.blit(instruction_text, (self.screen_x / 2 - instruction_w / 2, self.screen_y - 80))
+
+        return composition, option_buttons
+
+    def draw_selection(self, composition, option, selected):
+        """Redraw one option from the composition, highlighted if selected.
+
+        Returns the rectangle of the screen that changed.
+        """
+        rect = self.option_buttons[option - 1]['rect']
+        self.screen.blit(composition, rect, rect)
+        if selected:
+            # Draw blue border if selected
+            pygame.draw.rect(self.screen, (0, 0, 255), rect, 5)
+        return rect
+
     def display_trial(self):
         """Display a single trial"""
         if self.current_trial >= len(self.trials):
             return False
         
         trial = self.trials[self.current_trial]
-        
+
+        # The trial screen is composed once; the next trial is loaded in the
+        # background while this one is displayed
+        composition, self.option_buttons = self.build_trial(self.current_trial)
+        self.prefetch_trial(self.current_trial + 1)
+
+        self.screen.blit(composition, (0, 0))
+        if self.selected_answer is not None:
+            self.draw_selection(composition, self.selected_answer, True)
+        display.flip()
+
         waiting = True
         while waiting:
-            for event in pygame.event.get():
+            for event in events.wait():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     # Save answer and advance
                     self.allData.at[self.current_trial, 'Respuesta dada'] = self.selected_answer
-                    self.save_data_incremental()
+                    self.save_data_incremental(self.current_trial)
                     self.current_trial += 1
                     self.selected_answer = None
                     waiting = False
                 elif event.type == KEYDOWN and event.key == K_F12:
                     # Save before quitting
                     self.allData.at[self.current_trial, 'Respuesta dada'] = self.selected_answer
-                    self.save_data_incremental()
+                    self.save_data_incremental(self.current_trial)
+                    self.save_data()
                     pygame.quit()
                     exit()
                 elif event.type == QUIT:
                     # Save before quitting
                     self.allData.at[self.current_trial, 'Respuesta dada'] = self.selected_answer
-                    self.save_data_incremental()
+                    self.save_data_incremental(self.current_trial)
+                    self.save_data()
                     pygame.quit()
                     exit()
                 elif event.type == MOUSEBUTTONUP and event.button == 1:
@@ -293,99 +435,24 @@ class Ravens(object):
                     mouseX, mouseY = pygame.mouse.get_pos()
                     clicked_option = self.check_option_click(mouseX, mouseY, trial)
                     if clicked_option is not None:
+                        # Only the options whose highlight changed are redrawn
+                        dirty = []
+                        if self.selected_answer is not None:
+                            dirty.append(
+                                self.draw_selection(composition, self.selected_answer, False)
+                            )
+
                         if self.selected_answer == clicked_option:
                             # Deselect if clicking the same option
                             self.selected_answer = None
                         else:
                             # Select new option
                             self.selected_answer = clicked_option
-            
-            # Draw the trial
-            self.screen.blit(self.background, (0, 0))
-            
-            # Draw trial identifier at the top
-            trial_id_text = self.titleFont.render(f"Ensayo {trial['id']}", 1, (0, 0, 0))
-            trial_id_w = trial_id_text.get_rect().width
-            self.screen.blit(trial_id_text, (self.screen_x / 2 - trial_id_w / 2, 50))
-            
-            # Load and display reference image (larger, centered)
-            ref_image_path = self.get_image_path(trial['id'], 0)
-            ref_image = pygame.image.load(ref_image_path)
-            
-            # Scale reference image to be larger
-            ref_scale = 1
-            ref_w = int(ref_image.get_width() * ref_scale)
-            ref_h = int(ref_image.get_height() * ref_scale)
-            ref_image = pygame.transform.smoothscale(ref_image, (ref_w, ref_h))
-            
-            # Center the reference image
-            ref_x = self.screen_x / 2 - ref_w / 2
-            ref_y = 150
-            self.screen.blit(ref_image, (ref_x, ref_y))
-            
-            # Display answer options in grid (3x2 or 4x2)
-            num_options = trial['num_options']
-            cols = 4 if num_options == 8 else 3
-            rows = 2
-            
-            option_scale = 0.85
-            spacing_x = 20
-            spacing_y = 20
-            
-            # Calculate starting position to center the grid
-            # Use cached dimensions or load once on first trial
-            if self.cached_image_dimensions is None:
-                sample_img = pygame.image.load(self.get_image_path(trial['id'], 1))
-                self.cached_image_dimensions = (sample_img.get_width(), sample_img.get_height())
-            
-            option_w = int(self.cached_image_dimensions[0] * option_scale)
-            option_h = int(self.cached_image_dimensions[1] * option_scale)
-            
-            grid_width = cols * option_w + (cols - 1) * spacing_x
-            grid_start_x = self.screen_x / 2 - grid_width / 2
-            grid_start_y = ref_y + ref_h + 50
-            
-            # Store button positions for click detection
-            self.option_buttons = []
-            
-            for i in range(num_options):
-                row = i // cols
-                col = i % cols
-                
-                option_x = grid_start_x + col * (option_w + spacing_x)
-                option_y = grid_start_y + row * (option_h + spacing_y)
-                
-                # Load and scale option image
-                option_image = pygame.image.load(self.get_image_path(trial['id'], i + 1))
-                option_image = pygame.transform.smoothscale(option_image, (option_w, option_h))
-                
-                # Draw the image
-                self.screen.blit(option_image, (option_x, option_y))
-                
-                # Store button position for click detection
-                self.option_buttons.append({
-                    'option': i + 1,
-                    'rect': pygame.Rect(option_x, option_y, option_w, option_h)
-                })
-                
-                # Draw blue border if selected
-                if self.selected_answer == i + 1:
-                    pygame.draw.rect(
-                        self.screen,
-                        (0, 0, 255),
-                        (option_x, option_y, option_w, option_h),
-                        5
-                    )
-            
-            # Display instruction at bottom
-            instruction_text = self.instructionsFont.render(
-                "Selecciona una respuesta y pulsa la barra espaciadora para continuar",
-                1, (100, 100, 100)
-            )
-            instruction_w = instruction_text.get_rect().width
-            self.screen.blit(instruction_text, (self.screen_x / 2 - instruction_w / 2, self.screen_y - 80))
-            
-            pygame.display.flip()
+                            dirty.append(
+                                self.draw_selection(composition, clicked_option, True)
+                            )
+
+                        display.update(dirty)
         
         return True
     
@@ -396,19 +463,41 @@ class Ravens(object):
                 return button['option']
         return None
     
-    def save_data_incremental(self):
-        """Save data after each trial"""
+    def save_data_incremental(self, trial_index):
+        """Append the answer of a trial to the journal(s).
+
+        Only one record is queued per trial; the writes happen on the journal
+        writer thread, so the next matrix is never held up by the disk.
+        """
+        row = self.allData.loc[trial_index].to_dict()
+        journal.record("Ravens Matrices", row)
+        performance.end_trial("Ravens Matrices")
+
         if self.dataPath:
+            if self.dataJournal is None:
+                self.dataJournal = journal.JournalWriter(
+                    journal.journal_path(self.dataPath)
+                )
+            self.dataJournal.record("Ravens Matrices", row)
+
+    def save_data(self):
+        """Compact the answers journal into the data file (once, at task end)"""
+        if self.dataJournal is not None:
+            self.dataJournal.record_sheet("Ravens Matrices", self.allData)
+            self.dataJournal.close()
             try:
-                self.allData.to_excel(self.dataPath, index=False)
+                journal.finalise(self.dataJournal.path, self.dataPath)
             except Exception as e:
                 print(f"Error saving data: {e}")
+            self.dataJournal = None
     
     def show_end_screen(self):
         """Display the end screen"""
+        loop = events.EventLoop()
         end_screen = True
         while end_screen:
-            for event in pygame.event.get():
+            loop.idle()
+            for event in loop.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     end_screen = False
                 elif event.type == KEYDOWN and event.key == K_F12:
@@ -420,28 +509,33 @@ class Ravens(object):
             
             self.screen.blit(self.background, (0, 0))
             
-            end_text = self.titleFont.render("Tarea completada", 1, (0, 0, 0))
+            end_text = fonts.render(self.titleFont, "Tarea completada", 1, (0, 0, 0))
             end_w = end_text.get_rect().width
             self.screen.blit(end_text, (self.screen_x / 2 - end_w / 2, self.screen_y / 2 - 50))
             
-            thanks_text = self.instructionsFont.render(
+            thanks_text = fonts.render(
+                self.instructionsFont,
                 "Gracias por tu participación",
                 1, (0, 0, 0)
             )
             thanks_w = thanks_text.get_rect().width
             self.screen.blit(thanks_text, (self.screen_x / 2 - thanks_w / 2, self.screen_y / 2 + 20))
             
-            space_text = self.instructionsFont.render(
+            space_text = fonts.render(
+                self.instructionsFont,
                 "(Pulsa la barra espaciadora para continuar)",
                 1, (100, 100, 100)
             )
             space_w = space_text.get_rect().width
             self.screen.blit(space_text, (self.screen_x / 2 - space_w / 2, self.screen_y / 2 + 100))
             
-            pygame.display.flip()
+            display.flip()
     
     def run(self):
         """Main run method for the task"""
+        # Load the first trial while the instructions are shown
+        self.prefetch_trial(0)
+
         # Show instructions
         self.show_instructions()
         
@@ -450,11 +544,13 @@ class Ravens(object):
             if not self.display_trial():
                 break
         
+        self.prefetcher.shutdown(wait=False)
+
         # Show end screen
         self.show_end_screen()
         
         # Final save
-        self.save_data_incremental()
+        self.save_data()
         
         print("- Raven's Progressive Matrices Task complete")
         
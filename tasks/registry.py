@@ -0,0 +1,343 @@
+"""Registry of the tasks the battery can run.
+
+Each task is described by a TaskSpec: the name shown in the task list, where
+its class lives, the output sheet(s) its data is saved to and which battery
+settings its constructor takes. Task modules are only imported when a task is
+run, so opening the battery window does not load every task.
+
+Tasks from other packages can be added with an entry point in the
+"cognitive_battery.tasks" group, pointing to a TaskSpec (or a callable
+returning one or a list of them), e.g. in setup.cfg:
+
+    [options.entry_points]
+    cognitive_battery.tasks =
+        stroop = my_tasks.stroop:TASK_SPEC
+"""
+import importlib
+import collections
+
+ENTRY_POINT_GROUP = "cognitive_battery.tasks"
+
+
+class TaskSpec(object):
+    """Description of a task.
+
+    Parameters:
+    name -- name shown in the battery task list
+    module -- module containing the task class (e.g. "tasks.ant")
+    class_name -- name of the task class. It is constructed as
+        cls(screen, background, **kwargs) and run() returns its data
+    sheet -- name of the output sheet, or a dict mapping the keys of the dict
+        returned by run() to sheet names for tasks with several sheets
+    settings -- dict mapping constructor keyword arguments to the attributes
+        of the battery window (see BatteryWindow.get_settings) they are read from
+    assets -- paths (relative to the battery directory) of the images, sounds
+        or text files the task needs
+    scoring -- for questionnaires, the keyword arguments of
+        analysis/questionnaires.py's Questionnaire: prefix of the score
+        columns, key file, number of items, response range and, for
+        non-numeric responses, their values. The questionnaire is scored
+        when its key file is present
+    """
+
+    def __init__(
+        self,
+        name,
+        module,
+        class_name,
+        sheet,
+        settings=None,
+        assets=(),
+        scoring=None,
+    ):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.sheet = sheet
+        self.settings = settings or {}
+        self.assets = tuple(assets)
+        self.scoring = scoring
+
+    @property
+    def sheets(self):
+        """Names of the output sheets of the task, in order."""
+        if isinstance(self.sheet, dict):
+            return list(self.sheet.values())
+        return [self.sheet]
+
+    def load(self):
+        """Import the task module and return the task class."""
+        module = importlib.import_module(self.module)
+        return getattr(module, self.class_name)
+
+    def create(self, screen, background, settings_source=None):
+        """Construct the task with its settings (see run()).
+
+        Parameters:
+        screen -- pygame display surface
+        background -- background surface
+        settings_source -- object holding the settings attributes (usually the
+            battery window)
+        """
+        kwargs = {
+            argument: getattr(settings_source, attribute)
+            for argument, attribute in self.settings.items()
+        }
+        return self.load()(screen, background, **kwargs)
+
+    def run(self, screen, background, settings_source=None):
+        """Run the task and return its data as an ordered dict of sheet -> data.
+
+        Parameters:
+        screen -- pygame display surface
+        background -- background surface
+        settings_source -- object holding the settings attributes (usually the
+            battery window)
+        """
+        task = self.create(screen, background, settings_source)
+        return self.collect(task.run())
+
+    def collect(self, data):
+        """Return the data returned by a task's run() by sheet name.
+
+        Parameters:
+        data -- data returned by run(): a DataFrame, or a dict of them for
+            tasks with several sheets
+        """
+        if isinstance(self.sheet, dict):
+            return collections.OrderedDict(
+                (sheet, data[key]) for key, sheet in self.sheet.items()
+            )
+        return collections.OrderedDict([(self.sheet, data)])
+
+
+# Tasks included in the battery, in the order of the task list
+BUILTIN_TASKS = [
+    TaskSpec(
+        "Attention Network Test (ANT)",
+        "tasks.ant",
+        "ANT",
+        "ANT",
+        settings={"blocks": "ant_blocks"},
+        assets=["tasks/images/ANT"],
+    ),
+    TaskSpec(
+        "Digit Span (backwards)",
+        "tasks.digitspan_backwards",
+        "DigitspanBackwards",
+        "Digit span (backwards)",
+    ),
+    TaskSpec(
+        "Digits Memorization",
+        "tasks.digits_memorization",
+        "DigitsMemorization",
+        "Digits Memorization",
+    ),
+    TaskSpec(
+        "Eriksen Flanker Task",
+        "tasks.flanker",
+        "Flanker",
+        "Eriksen Flanker",
+        settings={
+            "dark_mode": "flanker_dark_mode",
+            "sets_practice": "flanker_sets_practice",
+            "sets_main": "flanker_sets_main",
+            "blocks_compat": "flanker_blocks_compat",
+            "blocks_incompat": "flanker_blocks_incompat",
+            "block_order": "flanker_block_order",
+        },
+    ),
+    TaskSpec(
+        "Mental Rotation Task",
+        "tasks.mrt",
+        "MRT",
+        "MRT",
+        assets=["tasks/images/MRT"],
+    ),
+    TaskSpec(
+        "Raven's Progressive Matrices",
+        "tasks.ravens",
+        "Ravens",
+        "Ravens Matrices",
+        assets=["images/test  matrices progresivas de Raven escala standard"],
+    ),
+    TaskSpec(
+        "Sternberg Task",
+        "tasks.sternberg",
+        "Sternberg",
+        "Sternberg",
+        settings={"blocks": "sternberg_blocks"},
+        assets=["tasks/images/Sternberg"],
+    ),
+    TaskSpec(
+        "Sustained Attention to Response Task (SART)",
+        "tasks.sart",
+        "SART",
+        "SART",
+        assets=["tasks/images/SART"],
+    ),
+    TaskSpec(
+        "NEO-PI-R",
+        "tasks.neopir",
+        "NeoPiR",
+        "NEO-PI-R",
+        assets=["enunciados/NEOPIR.txt"],
+        scoring={
+            "prefix": "neopir",
+            "key_file": "NEOPIR.csv",
+            "num_items": 240,
+            "min_value": 1,
+            "max_value": 5,
+        },
+    ),
+    TaskSpec(
+        "D2 (Test de atención y concentración)",
+        "tasks.d2",
+        "D2",
+        "D2",
+        assets=["tasks/images/D2"],
+    ),
+    TaskSpec(
+        "Dual Task",
+        "tasks.dual_task",
+        "DualTask",
+        {"tracking": "Dual Task - Tracking", "responses": "Dual Task - Responses"},
+    ),
+    TaskSpec(
+        "Relative Verticality Perception (PVR)",
+        "tasks.pvr",
+        "PVR",
+        "PVR",
+    ),
+    TaskSpec(
+        "ACS",
+        "tasks.acs",
+        "ACS",
+        "ACS",
+        assets=["enunciados/ACS.txt"],
+        scoring={
+            "prefix": "acs",
+            "key_file": "ACS.csv",
+            "num_items": 20,
+            "min_value": 1,
+            "max_value": 4,
+        },
+    ),
+    TaskSpec(
+        "RIASEC",
+        "tasks.riasec",
+        "RIASEC",
+        "RIASEC",
+        assets=["enunciados/RIASEC.txt"],
+        scoring={
+            "prefix": "riasec",
+            "key_file": "RIASEC.csv",
+            "num_items": 36,
+            "min_value": 1,
+            "max_value": 3,
+        },
+    ),
+    TaskSpec(
+        "Inteligencia Multiple",
+        "tasks.inteligencia_multiple",
+        "InteligenciaMultiple",
+        "Inteligencia Multiple",
+        assets=["enunciados/inteligencia multiple.txt"],
+        scoring={
+            "prefix": "im",
+            "key_file": "inteligencia multiple.csv",
+            "num_items": 24,
+            "min_value": 1,
+            "max_value": 3,
+        },
+    ),
+    TaskSpec(
+        "SRQ20",
+        "tasks.srq20",
+        "SRQ20",
+        "SRQ20",
+        assets=["enunciados/SRQ-20.txt"],
+        scoring={
+            "prefix": "srq20",
+            "key_file": "SRQ-20.csv",
+            "num_items": 20,
+            "min_value": 0,
+            "max_value": 1,
+            "values": {"SI": 1, "NO": 0},
+        },
+    ),
+    TaskSpec(
+        "Ikigai",
+        "tasks.ikigai",
+        "Ikigai",
+        "Ikigai",
+        assets=["enunciados/IKIGAI_PaidFor", "enunciados/IKIGAI_WorldNeed"],
+    ),
+    TaskSpec(
+        "FourFigures",
+        "tasks.fourfigures",
+        "FourFigures",
+        "FourFigures",
+        assets=["tasks/images/FourFigures"],
+    ),
+]
+
+_registry = collections.OrderedDict((spec.name, spec) for spec in BUILTIN_TASKS)
+_entry_points_loaded = False
+
+
+def register(spec):
+    """Add a task to the registry, replacing any task with the same name.
+
+    Parameters:
+    spec -- TaskSpec of the task
+    """
+    _registry[spec.name] = spec
+
+
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+
+    try:
+        from importlib import metadata
+    except ImportError:
+        return
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        entry_points = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        entry_points = entry_points.get(ENTRY_POINT_GROUP, [])
+
+    for entry_point in entry_points:
+        try:
+            specs = entry_point.load()
+            if callable(specs):
+                specs = specs()
+            if isinstance(specs, TaskSpec):
+                specs = [specs]
+            for spec in specs:
+                register(spec)
+        except Exception as e:
+            print(f"Error loading task entry point {entry_point.name}: {e}")
+
+
+def get_tasks():
+    """Return the specs of all registered tasks, in task list order."""
+    _load_entry_points()
+    return list(_registry.values())
+
+
+def get_task(name):
+    """Return the spec of a task by its task list name.
+
+    Raises KeyError if there is no such task.
+
+    Parameters:
+    name -- name shown in the battery task list
+    """
+    _load_entry_points()
+    return _registry[name]
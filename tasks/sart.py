@@ -1,12 +1,10 @@
 import os
-import sys
-import time
 import random
 import pandas as pd
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import assets, display, fonts, journal, performance, responses, scheduler
 
 
 class SART(object):
@@ -46,76 +44,68 @@ class SART(object):
         # Use the 29mm mask image (as described by Robertson 1997)
         self.img_mask = pygame.image.load(os.path.join(self.image_path, "mask_29.png"))
 
+        # Stimulus durations are presented as whole screen refreshes
+        self.scheduler = scheduler.FrameScheduler()
+        self.responses = responses.ResponseCapture(keys={K_SPACE: 1})
+
         # Create trial sequence
         self.number_set = list(range(1, 10)) * 25  # Numbers 1-9
         random.shuffle(self.number_set)
         self.trial_num = list(range(1, len(self.number_set) + 1))
 
+        # Every stimulus frame is composed before the first trial
+        self.stimuli = assets.StimulusSet(self.screen, self.background)
+        self.build_stimuli()
+
         # Create output dataframe
         self.all_data = pd.DataFrame()
         self.all_data["trial"] = self.trial_num
         self.all_data["stimulus"] = self.number_set
 
+    def build_stimuli(self):
+        """Compose every digit, at every size, and the mask before the trials."""
+        for number in set(self.number_set):
+            for size_index, font in enumerate(self.stim_fonts):
+                surface = fonts.render(font, str(number), 1, (255, 255, 255))
+                self.stimuli.add(
+                    ("digit", number, size_index), [(surface, "center", "center")]
+                )
+        self.stimuli.add("mask", [(self.img_mask, "center", "center")])
+
     def display_trial(self, i, data):
         # Randomly choose font size for this trial
         size_index = random.randint(0, len(self.stim_fonts) - 1)
-        trial_font = self.stim_fonts[size_index]
 
         key_press = 0
         data.at[i, "RT"] = 1150
+        self.scheduler.dropped_frames = 0
 
         # Display number
-        self.screen.blit(self.background, (0, 0))
-        display.text(
-            self.screen,
-            trial_font,
-            str(data["stimulus"][i]),
-            "center",
-            "center",
-            (255, 255, 255),
-        )
-        pygame.display.flip()
-
-        # Get start time in ms
-        start_time = int(round(time.time() * 1000))
-
-        # Clear the event queue before checking for responses
-        pygame.event.clear()
-        wait_response = True
-        while wait_response:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    key_press = 1
-                    data.at[i, "RT"] = int(round(time.time() * 1000)) - start_time
-                elif event.type == KEYDOWN and event.key == K_F12:
-                    sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
+        self.stimuli.draw(("digit", data["stimulus"][i], size_index))
+        stim_onset = self.scheduler.flip()
+        mask_due = self.scheduler.schedule(stim_onset, self.STIM_DURATION)
 
-            # Stop this loop if stim duration has passed
-            if end_time - start_time >= self.STIM_DURATION:
-                wait_response = False
+        # Clear the event queue before checking for responses, and collect
+        # them until the stim duration has passed
+        self.responses.clear()
+        self.responses.wait(mask_due, stop=False)
 
         # Display mask
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_mask, "center", "center")
-        pygame.display.flip()
-
-        wait_response = True
-        while wait_response:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    if key_press == 0:
-                        key_press = 1
-                        data.at[i, "RT"] = int(round(time.time() * 1000)) - start_time
-                elif event.type == KEYDOWN and event.key == K_F12:
-                    sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
-
-            # Stop this loop if mask duration has passed
-            if end_time - start_time >= self.MASK_DURATION:
-                wait_response = False
+        self.stimuli.draw("mask")
+        mask_onset = self.scheduler.flip()
+        trial_end = self.scheduler.schedule(stim_onset, self.MASK_DURATION)
+
+        # Keep collecting until the mask duration has passed. Only the first
+        # response of the trial counts
+        press = self.responses.wait(trial_end, stop=False)
+        if press is not None:
+            key_press = 1
+            data.at[i, "RT"] = responses.rt(stim_onset, press[1])
+
+        # Measured stimulus timing, in ms since the start of the task
+        data.at[i, "stimOnset"] = self.scheduler.elapsed_ms(stim_onset)
+        data.at[i, "stimOffset"] = self.scheduler.elapsed_ms(mask_onset)
+        data.at[i, "droppedFrames"] = self.scheduler.dropped_frames
 
         # Check if response is correct
         if data["stimulus"][i] == 3:
@@ -186,7 +176,7 @@ class SART(object):
             self.screen, self.font, "center", self.screen_y / 2 + 300, (255, 255, 255)
         )
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -205,7 +195,7 @@ class SART(object):
             self.screen, self.font, "center", self.screen_y / 2 + 100, (255, 255, 255)
         )
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -244,7 +234,7 @@ class SART(object):
             self.screen, self.font, "center", self.screen_y / 2 + 100, (255, 255, 255)
         )
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -254,9 +244,21 @@ class SART(object):
         # Show main trials
         for i in range(self.all_data.shape[0]):
             self.display_trial(i, self.all_data)
+            journal.record("SART", self.all_data.loc[i].to_dict())
+            performance.end_trial("SART")
 
         # Rearrange dataframe
-        columns = ["trial", "stimulus", "stimSize", "RT", "key press", "accuracy"]
+        columns = [
+            "trial",
+            "stimulus",
+            "stimSize",
+            "RT",
+            "key press",
+            "accuracy",
+            "stimOnset",
+            "stimOffset",
+            "droppedFrames",
+        ]
         self.all_data = self.all_data[columns]
 
         # End screen
@@ -269,7 +271,7 @@ class SART(object):
             self.screen, self.font, "center", self.screen_y / 2 + 100, (255, 255, 255)
         )
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -1,13 +1,11 @@
 import os
-import sys
 import random
-import time
 import pandas as pd
 import pygame
 
 from pygame.locals import *
 from itertools import product
-from utils import display
+from utils import display, fonts, journal, performance, responses, timing
 
 
 class Sternberg(object):
@@ -56,6 +54,11 @@ class Sternberg(object):
         self.SET_SIZE = (2, 6)
         self.PROBE_TYPE = ("present", "absent")
 
+        # Responses to the probe: left arrow = present, right arrow = absent
+        self.responses = responses.ResponseCapture(
+            keys={K_LEFT: "present", K_RIGHT: "absent"}
+        )
+
         # Create condition combinations
         self.combinations = list(product(self.SET_SIZE, self.PROBE_TYPE))
 
@@ -120,7 +123,7 @@ class Sternberg(object):
     def display_trial(self, df, i, r, trial_type):
         # Clear screen
         self.screen.blit(self.background, (0, 0))
-        pygame.display.flip()
+        display.flip()
 
         # Display number sequence
         self.display_sequence(r["set"])
@@ -128,7 +131,7 @@ class Sternberg(object):
         # Display probe warning
         self.screen.blit(self.background, (0, 0))
         display.text(self.screen, self.stim_font, "+", "center", "center")
-        pygame.display.flip()
+        display.flip()
 
         display.wait(self.PROBE_WARN_DURATION)
 
@@ -150,7 +153,7 @@ class Sternberg(object):
                 self.screen_y / 2 + 150,
             )
 
-            yes_text = self.font.render("(yes)", 1, (0, 0, 0))
+            yes_text = fonts.render(self.font, "(yes)", 1, (0, 0, 0))
             display.text(
                 self.screen,
                 self.font,
@@ -166,7 +169,7 @@ class Sternberg(object):
                 self.screen_y / 2 + 150,
             )
 
-            no_text = self.font.render("(no)", 1, (0, 0, 0))
+            no_text = fonts.render(self.font, "(no)", 1, (0, 0, 0))
             display.text(
                 self.screen,
                 self.font,
@@ -175,32 +178,21 @@ class Sternberg(object):
                 self.screen_y / 2 + 160,
             )
 
-        pygame.display.flip()
-
-        start_time = int(round(time.time() * 1000))
+        display.flip()
+        probe_onset = timing.get_time_ns()
 
         # Clear the event queue before checking for responses
-        pygame.event.clear()
-        wait_response = True
-        while wait_response:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_LEFT:
-                    df.at[i, "response"] = "present"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_RIGHT:
-                    df.at[i, "response"] = "absent"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_F12:
-                    sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
-
-            # If time limit has been reached, consider it a missed trial
-            if end_time - start_time >= self.PROBE_DURATION:
-                wait_response = False
+        self.responses.clear()
+        press = self.responses.wait(probe_onset + timing.ms_to_ns(self.PROBE_DURATION))
+
+        # If time limit has been reached, consider it a missed trial
+        if press is None:
+            rt = self.PROBE_DURATION
+        else:
+            df.at[i, "response"] = press[0]
+            rt = responses.rt(probe_onset, press[1])
 
         # Store RT
-        rt = int(round(time.time() * 1000)) - start_time
         df.at[i, "RT"] = rt
 
         # Display blank screen
@@ -226,7 +218,7 @@ class Sternberg(object):
                     self.screen, self.font, "incorrect", "center", "center", (255, 0, 0)
                 )
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait(self.FEEDBACK_DURATION)
 
@@ -238,7 +230,7 @@ class Sternberg(object):
             # Display number
             self.screen.blit(self.background, (0, 0))
             display.text(self.screen, self.stim_font, number, "center", "center")
-            pygame.display.flip()
+            display.flip()
 
             display.wait(self.STIM_DURATION)
 
@@ -300,7 +292,7 @@ class Sternberg(object):
 
         display.text_space(self.screen, self.font, "center", 900)
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -316,7 +308,7 @@ class Sternberg(object):
 
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 100)
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -352,7 +344,7 @@ class Sternberg(object):
         )
         display.text_space(self.screen, self.font, "center", 800)
 
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
@@ -360,6 +352,8 @@ class Sternberg(object):
         for i, block in enumerate(self.blocks):
             for j, r in block.iterrows():
                 self.display_trial(block, j, r, "main")
+                journal.record("Sternberg", block.loc[j].to_dict())
+                performance.end_trial("Sternberg")
 
             # If this is not the final block, show instructions for next block
             if i != len(self.blocks) - 1:
@@ -374,7 +368,7 @@ class Sternberg(object):
                 )
                 display.text_space(self.screen, self.font, "center", 700)
 
-                pygame.display.flip()
+                display.flip()
 
                 display.wait_for_space()
 
@@ -382,7 +376,7 @@ class Sternberg(object):
         self.screen.blit(self.background, (0, 0))
         display.text(self.screen, self.font, "End of task", "center", "center")
         display.text_space(self.screen, self.font, "center", self.screen_y / 2 + 100)
-        pygame.display.flip()
+        display.flip()
 
         display.wait_for_space()
 
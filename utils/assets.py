@@ -0,0 +1,125 @@
+import collections
+import pygame
+
+
+class ImageCache(object):
+    """Decode, convert and scale images once and serve them from memory.
+
+    Images are converted to the display pixel format (keeping per-pixel
+    alpha where the file has it), so a display mode must be set before the
+    first load. The least recently used images are dropped once `max_size`
+    images are cached.
+
+    Parameters:
+    max_size -- maximum number of cached images. None keeps them all
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._images = collections.OrderedDict()
+
+    def load(self, path, scale=1.0):
+        """Return the image at path, scaled by a factor.
+
+        Parameters:
+        path -- path of the image file
+        scale -- scaling factor applied (with smoothscale) to both dimensions
+        """
+        key = (path, scale)
+        if key in self._images:
+            self._images.move_to_end(key)
+            return self._images[key]
+
+        image = pygame.image.load(path)
+        if image.get_flags() & pygame.SRCALPHA:
+            image = image.convert_alpha()
+        else:
+            image = image.convert()
+
+        if scale != 1.0:
+            width, height = image.get_size()
+            image = pygame.transform.smoothscale(
+                image, (int(width * scale), int(height * scale))
+            )
+
+        self._images[key] = image
+        if self.max_size is not None and len(self._images) > self.max_size:
+            self._images.popitem(last=False)
+
+        return image
+
+    def preload(self, paths, scale=1.0):
+        """Load several images into the cache ahead of their first use.
+
+        Parameters:
+        paths -- iterable of image file paths
+        scale -- scaling factor applied to all of them
+        """
+        for path in paths:
+            self.load(path, scale)
+
+    def clear(self):
+        """Drop all cached images."""
+        self._images.clear()
+
+
+class StimulusSet(object):
+    """Stimulus frames composed ahead of time, drawn with two blits each.
+
+    Each frame is a list of layers (images or rendered text) placed on the
+    screen. add() composes the layers once onto a copy of the part of the
+    background they cover, converted to the display pixel format, so that
+    drawing a frame inside a timed trial is a blit of the background and a
+    blit of the composed patch. A display mode must be set, and the
+    background filled, before frames are added.
+
+    Parameters:
+    screen -- pygame screen the frames are drawn on
+    background -- background surface the frames are composed on
+    """
+
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self._frames = {}
+
+    def _position(self, surface, x, y):
+        # Same placement as display.image(): "center" or screen coordinates
+        width, height = surface.get_size()
+        if x == "center":
+            x = self.screen.get_width() / 2 - width / 2
+        if y == "center":
+            y = self.screen.get_height() / 2 - height / 2
+        return int(x), int(y)
+
+    def add(self, name, layers):
+        """Compose a frame.
+
+        Parameters:
+        name -- key of the frame, e.g. ("target", "left", "top")
+        layers -- list of (surface, x, y) drawn in order, where x and y can be
+            "center" or screen coordinates
+        """
+        placed = [
+            (surface, self._position(surface, x, y)) for surface, x, y in layers
+        ]
+        area = pygame.Rect(placed[0][1], placed[0][0].get_size())
+        for surface, position in placed[1:]:
+            area.union_ip(pygame.Rect(position, surface.get_size()))
+        area = area.clip(self.screen.get_rect())
+
+        frame = pygame.Surface(area.size).convert()
+        frame.blit(self.background, (0, 0), area)
+        for surface, (x, y) in placed:
+            frame.blit(surface, (x - area.x, y - area.y))
+
+        self._frames[name] = (frame, area.topleft)
+
+    def draw(self, name):
+        """Draw a frame on the screen, over a clear background."""
+        frame, position = self._frames[name]
+        self.screen.blit(self.background, (0, 0))
+        self.screen.blit(frame, position)
+
+    def __contains__(self, name):
+        return name in self._frames
@@ -1,8 +1,88 @@
 import sys
-import time
 import pygame
 
 from pygame.locals import *
+from utils import events, fonts, performance, timing
+
+# Whether the current display was opened with vsync (see set_mode)
+_vsync = False
+
+
+def set_mode(size, flags=0):
+    """Open the pygame display, synchronised to the refresh where supported.
+
+    The SCALED renderer is only used when the window covers the desktop at
+    its native resolution: for any other size it would upscale a window or
+    letterbox a fullscreen mode, changing the size of the stimuli on screen.
+    Other sizes request vsync without it. When vsync cannot be had (pygame 1,
+    or a driver without it) the display is opened as before and has_vsync()
+    returns False.
+
+    Parameters:
+    size -- (width, height) of the window. (0, 0) uses the desktop resolution
+    flags -- additional pygame display flags (e.g. pygame.FULLSCREEN)
+    """
+    global _vsync
+
+    # Info() only reports the desktop until a window has been opened
+    if hasattr(pygame.display, "get_desktop_sizes"):
+        desktop = tuple(pygame.display.get_desktop_sizes()[0])
+    else:
+        info = pygame.display.Info()
+        desktop = (info.current_w, info.current_h)
+    if size == (0, 0):
+        size = desktop
+
+    extra_flags = getattr(pygame, "SCALED", 0) if tuple(size) == desktop else 0
+    try:
+        screen = pygame.display.set_mode(size, flags | extra_flags, vsync=1)
+    except (TypeError, pygame.error):
+        screen = pygame.display.set_mode(size, flags)
+        _vsync = False
+        return screen
+
+    # Without SCALED (or OpenGL) the vsync request may be silently ignored
+    is_vsync = getattr(pygame.display, "is_vsync", None)
+    if is_vsync is not None:
+        _vsync = bool(is_vsync())
+    else:
+        _vsync = bool(extra_flags)
+    return screen
+
+
+def has_vsync():
+    """Return True if the display was opened with vsync by set_mode()."""
+    return _vsync
+
+
+def flip():
+    """Show the frame drawn so far (pygame.display.flip).
+
+    The flip is timed when the session is instrumented (see utils.performance).
+    """
+    if not performance.is_running():
+        pygame.display.flip()
+        return
+
+    start = timing.get_time_ns()
+    pygame.display.flip()
+    performance.flip(start, timing.get_time_ns())
+
+
+def update(rectangles=None):
+    """Show parts of the frame drawn so far (pygame.display.update).
+
+    Parameters:
+    rectangles -- rectangle or list of rectangles to update. None updates the
+        whole screen
+    """
+    if not performance.is_running():
+        pygame.display.update(rectangles)
+        return
+
+    start = timing.get_time_ns()
+    pygame.display.update(rectangles)
+    performance.flip(start, timing.get_time_ns())
 
 
 def blank_screen(screen, background, duration):
@@ -15,7 +95,7 @@ def blank_screen(screen, background, duration):
     """
 
     screen.blit(background, (0, 0))
-    pygame.display.flip()
+    flip()
 
     wait(duration)
 
@@ -59,7 +139,7 @@ def text(screen, font, text_string, x, y, colour=(0, 0, 0)):
 
     # Duck typing to check whether we received a string or pygame text surface
     try:
-        text_object = font.render(text_string, 1, colour)  # Assume string
+        text_object = fonts.render(font, text_string, 1, colour)  # Assume string
     except TypeError:
         text_object = text_string  # Already a pygame surface
 
@@ -98,12 +178,15 @@ def wait(duration):
     """
     pygame.event.clear()  # Clear any events in the queue
 
-    start_time = int(round(time.time() * 1000))
-    while (int(round(time.time() * 1000)) - start_time) < duration:
-        for event in pygame.event.get():
-            # Battery will quit if F12 is pressed while waiting
-            if event.type == KEYDOWN and event.key == K_F12:
-                sys.exit(0)
+    timing.sleep(duration, poll=check_quit)
+
+
+def check_quit():
+    """Drain the event queue, quitting the battery if F12 was pressed."""
+    for event in pygame.event.get():
+        # Battery will quit if F12 is pressed while waiting
+        if event.type == KEYDOWN and event.key == K_F12:
+            sys.exit(0)
 
 
 def wait_for_space():
@@ -116,7 +199,7 @@ def wait_for_space():
 
     waiting = True
     while waiting:
-        for event in pygame.event.get():
+        for event in events.wait():
             if event.type == KEYDOWN and event.key == K_SPACE:
                 waiting = False
             elif event.type == KEYDOWN and event.key == K_F12:
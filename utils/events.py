@@ -0,0 +1,105 @@
+"""Idle-aware reading of the pygame event queue.
+
+Screens that only change on input (instructions, questionnaires, Ravens)
+used to poll pygame.event.get() in a tight loop, keeping a CPU core busy for
+as long as the participant reads. wait() instead blocks in
+pygame.event.wait() until input arrives or a timeout passes, so a loop that
+also has to wake for a deadline (a countdown, the end of a timed row) passes
+the time left as the timeout.
+
+EventLoop suits loops that draw every iteration: its first idle() returns at
+once, so the first frame is drawn, and later ones block until there is input
+to react to.
+"""
+import math
+import pygame
+
+from pygame.locals import *
+from utils import timing
+
+# Interval between polls where pygame.event.wait() takes no timeout (pygame 1)
+POLL_INTERVAL_NS = 1000000
+
+
+def _wait_event(timeout):
+    # Return the first event to arrive (NOEVENT if the timeout passed first)
+    try:
+        if timeout is None:
+            return pygame.event.wait()
+        return pygame.event.wait(timeout)
+    except TypeError:
+        pass  # pygame.event.wait() takes no timeout
+
+    deadline = None
+    if timeout is not None:
+        deadline = timing.get_time_ns() + timing.ms_to_ns(timeout)
+    while True:
+        event = pygame.event.poll()
+        if event.type != NOEVENT:
+            return event
+        if deadline is not None and timing.get_time_ns() >= deadline:
+            return event
+        timing.pause(POLL_INTERVAL_NS)
+
+
+def wait(timeout=None):
+    """Block until input arrives and return all the queued events.
+
+    Returns an empty list if the timeout passes first.
+
+    Parameters:
+    timeout -- longest time to block in milliseconds. None blocks until an
+        event arrives, 0 or less does not block
+    """
+    if timeout is not None:
+        if timeout <= 0:
+            return pygame.event.get()
+        timeout = max(1, math.ceil(timeout))
+
+    event = _wait_event(timeout)
+    if event.type == NOEVENT:
+        return pygame.event.get()
+    return [event] + pygame.event.get()
+
+
+class EventLoop(object):
+    """Event source of a loop that draws every iteration.
+
+    Call idle() at the top of the loop and get() to read the events. The first
+    idle() returns at once; later ones block until input arrives (or for at
+    most timeout ms), since redrawing without new input would show the same
+    frame. Call wake() when the next frame should be drawn regardless, e.g.
+    while something is animating.
+
+    Parameters:
+    timeout -- default longest time (ms) idle() blocks. None blocks until an
+        event arrives
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.pending = []
+        self.awake = True
+
+    def wake(self):
+        """Do not block in the next idle()."""
+        self.awake = True
+
+    def idle(self, timeout=None):
+        """Block until input arrives, unless this is the first call or wake()
+        was called.
+
+        Parameters:
+        timeout -- longest time to block in milliseconds. Defaults to the
+            timeout of the loop
+        """
+        if self.awake or self.pending:
+            self.awake = False
+            return
+        self.pending = wait(self.timeout if timeout is None else timeout)
+
+    def get(self):
+        """Return the events received by idle() and those queued since."""
+        events = self.pending + pygame.event.get()
+        self.pending = []
+        return events
@@ -0,0 +1,278 @@
+"""Shared cache of rendered text.
+
+Tasks redraw the same strings (instructions, button labels, timers) on every
+frame or key press. render() keeps the surfaces of the most recently used
+strings in a bounded LRU cache keyed on (font, string, antialias, colour,
+background), already converted to the display's pixel format, so that each
+string is rendered once while it stays in use.
+
+layout() word-wraps paragraphs. Each word is measured once per font, lines are
+filled in a single pass over the words, and the laid-out paragraphs (lines and
+their positions, plus a composited surface per colour) are cached too.
+
+Surfaces returned by render() and Paragraph.surface() are shared: blit them,
+but do not draw on them.
+"""
+import collections
+import pygame
+
+# Surfaces kept in the cache
+MAX_SURFACES = 2048
+
+# Laid-out paragraphs kept in the cache
+MAX_PARAGRAPHS = 256
+
+# Word widths kept before the measurements are dropped
+MAX_WORDS = 16384
+
+
+class TextCache(object):
+    """LRU cache of rendered text surfaces.
+
+    Parameters:
+    max_size -- number of surfaces kept. The least recently used are dropped
+    """
+
+    def __init__(self, max_size=MAX_SURFACES):
+        self.max_size = max_size
+        self.surfaces = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias=True, colour=(0, 0, 0), background=None):
+        """Return the surface of a string, rendering it if it is not cached.
+
+        Parameters:
+        font -- pygame font object
+        text -- string to render
+        antialias -- render with antialiasing
+        colour -- (R, G, B) colour of the text
+        background -- (R, G, B) colour of the background, or None for a
+            transparent background
+        """
+        # The font object itself is part of the key (it holds the face and
+        # size), which also keeps it alive while its surfaces are cached
+        key = (
+            font,
+            text,
+            bool(antialias),
+            tuple(colour),
+            None if background is None else tuple(background),
+        )
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, colour, background)
+        try:
+            if background is None:
+                surface = surface.convert_alpha()
+            else:
+                surface = surface.convert()
+        except pygame.error:
+            pass  # No display mode set yet
+
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self):
+        """Return the number of hits, misses, cached surfaces and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.surfaces),
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+    def clear(self):
+        """Drop all cached surfaces and reset the statistics."""
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class Paragraph(object):
+    """Word-wrapped text, laid out for a font and a maximum width.
+
+    The paragraph box is as wide as its longest line; lines are aligned within
+    it, and positions holds the (x, y) of each line relative to its top left.
+
+    Parameters:
+    font -- pygame font object
+    lines -- wrapped lines of text
+    widths -- width of each line in pixels
+    line_height -- distance between the tops of consecutive lines
+    align -- "left", "center" or "right"
+    """
+
+    def __init__(self, font, lines, widths, line_height, align="left"):
+        self.font = font
+        self.lines = lines
+        self.line_height = line_height
+        self.width = max(widths) if widths else 0
+        self.height = len(lines) * line_height
+
+        offsets = {"left": 0, "center": 0.5, "right": 1}[align]
+        self.positions = [
+            (int((self.width - width) * offsets), index * line_height)
+            for index, width in enumerate(widths)
+        ]
+        self._surfaces = {}
+
+    def surface(self, colour=(0, 0, 0)):
+        """Return the whole paragraph rendered on a transparent surface.
+
+        Parameters:
+        colour -- (R, G, B) colour of the text
+        """
+        colour = tuple(colour)
+        surface = self._surfaces.get(colour)
+        if surface is None:
+            height = max(self.height, self.font.get_linesize())
+            surface = pygame.Surface((max(1, self.width), height), pygame.SRCALPHA)
+            for line, position in zip(self.lines, self.positions):
+                if line:
+                    surface.blit(render(self.font, line, True, colour), position)
+            try:
+                surface = surface.convert_alpha()
+            except pygame.error:
+                pass  # No display mode set yet
+            self._surfaces[colour] = surface
+        return surface
+
+    def blit(self, screen, x, y, colour=(0, 0, 0)):
+        """Draw the paragraph with its top left at (x, y).
+
+        Returns the y coordinate below the paragraph.
+
+        Parameters:
+        screen -- surface to draw on
+        x -- x coordinate of the paragraph box
+        y -- y coordinate of the first line
+        colour -- (R, G, B) colour of the text
+        """
+        screen.blit(self.surface(colour), (x, y))
+        return y + self.height
+
+
+class LayoutCache(object):
+    """Word wrapping with cached word measurements and paragraphs.
+
+    Parameters:
+    max_size -- number of paragraphs kept. The least recently used are dropped
+    """
+
+    def __init__(self, max_size=MAX_PARAGRAPHS):
+        self.max_size = max_size
+        self.paragraphs = collections.OrderedDict()
+        self.word_widths = {}
+
+    def _width(self, font, word):
+        key = (font, word)
+        width = self.word_widths.get(key)
+        if width is None:
+            if len(self.word_widths) >= MAX_WORDS:
+                self.word_widths.clear()
+            width = self.word_widths[key] = font.size(word)[0]
+        return width
+
+    def wrap(self, font, text, max_width):
+        """Return the lines of a text wrapped to a width, and their widths.
+
+        Words are never split: a word wider than max_width gets its own line.
+
+        Parameters:
+        font -- pygame font object
+        text -- string to wrap (runs of whitespace are collapsed)
+        max_width -- maximum line width in pixels
+        """
+        space = self._width(font, " ")
+        lines = []
+        widths = []
+        current = []
+        current_width = 0
+
+        for word in text.split():
+            word_width = self._width(font, word)
+            if not current:
+                current, current_width = [word], word_width
+            elif current_width + space + word_width <= max_width:
+                current.append(word)
+                current_width += space + word_width
+            else:
+                lines.append(" ".join(current))
+                widths.append(current_width)
+                current, current_width = [word], word_width
+
+        if current or not lines:
+            lines.append(" ".join(current))
+            widths.append(current_width)
+        return lines, widths
+
+    def layout(self, font, text, max_width, line_height=None, align="left"):
+        """Return the (cached) Paragraph of a text wrapped to a width.
+
+        Parameters:
+        font -- pygame font object
+        text -- string to wrap
+        max_width -- maximum line width in pixels
+        line_height -- distance between lines. None uses the font line size
+        align -- "left", "center" or "right"
+        """
+        if line_height is None:
+            line_height = font.get_linesize()
+
+        key = (font, text, max_width, line_height, align)
+        paragraph = self.paragraphs.get(key)
+        if paragraph is not None:
+            self.paragraphs.move_to_end(key)
+            return paragraph
+
+        lines, widths = self.wrap(font, text, max_width)
+        paragraph = Paragraph(font, lines, widths, line_height, align)
+        self.paragraphs[key] = paragraph
+        if len(self.paragraphs) > self.max_size:
+            self.paragraphs.popitem(last=False)
+        return paragraph
+
+    def clear(self):
+        """Drop all cached paragraphs and word measurements."""
+        self.paragraphs.clear()
+        self.word_widths.clear()
+
+
+# Caches shared by all tasks
+_cache = TextCache()
+_layouts = LayoutCache()
+
+
+def render(font, text, antialias=True, colour=(0, 0, 0), background=None):
+    """Return a (cached) surface of a string, see TextCache.render()."""
+    return _cache.render(font, text, antialias, colour, background)
+
+
+def wrap(font, text, max_width):
+    """Return the lines of a text wrapped to a width (see LayoutCache.wrap)."""
+    return list(_layouts.layout(font, text, max_width).lines)
+
+
+def layout(font, text, max_width, line_height=None, align="left"):
+    """Return the (cached) Paragraph of a text, see LayoutCache.layout()."""
+    return _layouts.layout(font, text, max_width, line_height, align)
+
+
+def stats():
+    """Return the statistics of the shared cache, see TextCache.stats()."""
+    return _cache.stats()
+
+
+def clear():
+    """Empty the shared caches, e.g. after the display has been closed."""
+    _cache.clear()
+    _layouts.clear()
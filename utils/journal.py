@@ -0,0 +1,329 @@
+"""Crash-safe session journal.
+
+While a session runs, every completed trial is appended as one JSON line to a
+journal file next to the final output, and flushed to disk with fsync. When a
+task finishes, its complete DataFrame is appended as well. The output (see
+utils.output) is built from the journal at the end of the session, and
+journals left behind by an interrupted session can be recovered with:
+
+    python -m utils.journal <data directory> [--format xlsx|csv|parquet|feather]
+"""
+import os
+import sys
+import json
+import atexit
+import shutil
+import queue
+import argparse
+import threading
+import collections
+import pandas as pd
+
+from utils import output
+
+JOURNAL_EXTENSION = ".journal.jsonl"
+
+# Journal of the session currently running (see start_session)
+_session = None
+
+
+def _to_builtin(value):
+    """Convert values json cannot serialise (numpy scalars, timestamps...)."""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+class JournalWriter(object):
+    """Append JSON records to a file from a background thread.
+
+    append() only puts the record on a queue, so it takes constant time and
+    never waits for the disk. The writer thread serialises the records and
+    fsyncs the file after each batch.
+
+    Parameters:
+    path -- path of the journal file. Records are appended if it exists
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._write_records, daemon=True)
+        self._thread.start()
+
+    def append(self, record):
+        """Queue a record (dict) to be written.
+
+        The record must not be modified after it has been appended.
+        """
+        self._queue.put(record)
+
+    def record(self, sheet, row):
+        """Record a completed trial.
+
+        Parameters:
+        sheet -- name of the output sheet the trial belongs to
+        row -- dict with the trial data (column -> value)
+        """
+        self.append({"type": "trial", "sheet": sheet, "row": dict(row)})
+
+    def record_sheet(self, sheet, data):
+        """Record the complete data of a sheet.
+
+        Parameters:
+        sheet -- name of the output sheet
+        data -- pandas DataFrame, or None if the task returned no data
+        """
+        if isinstance(data, pd.DataFrame):
+            self.append(
+                {
+                    "type": "sheet",
+                    "sheet": sheet,
+                    "columns": [str(column) for column in data.columns],
+                    "rows": data.values.tolist(),
+                }
+            )
+        else:
+            self.append(
+                {"type": "sheet", "sheet": sheet, "columns": None, "rows": None}
+            )
+
+    def close(self):
+        """Write all pending records and close the file."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write_records(self):
+        running = True
+        while running:
+            records = [self._queue.get()]
+
+            # Write everything that is already waiting before syncing
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for record in records:
+                if record is None:
+                    running = False
+                    break
+                self._file.write(json.dumps(record, default=_to_builtin) + "\n")
+
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+        self._file.close()
+
+
+def journal_path(output_file):
+    """Return the journal path used for an output file.
+
+    Parameters:
+    output_file -- path of the final output file (e.g. the .xlsx workbook)
+    """
+    return os.path.splitext(output_file)[0] + JOURNAL_EXTENSION
+
+
+@atexit.register
+def _flush_on_exit():
+    # The writer thread is a daemon; make sure pending records reach the disk
+    # when the battery quits (e.g. F12) in the middle of a session
+    end_session()
+
+
+def start_session(path):
+    """Open the journal of a new session. Tasks record into it from now on.
+
+    Parameters:
+    path -- path of the journal file
+    """
+    global _session
+    end_session()
+    _session = JournalWriter(path)
+    return _session
+
+
+def end_session():
+    """Flush and close the journal of the current session, if any."""
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def record(sheet, row):
+    """Record a completed trial. Does nothing if no session is running.
+
+    Parameters:
+    sheet -- name of the output sheet the trial belongs to
+    row -- dict with the trial data (column -> value)
+    """
+    if _session is not None:
+        _session.record(sheet, row)
+
+
+def record_sheet(sheet, data):
+    """Record the complete data of a sheet. Does nothing if no session is running.
+
+    Parameters:
+    sheet -- name of the output sheet
+    data -- pandas DataFrame, or None if the task returned no data
+    """
+    if _session is not None:
+        _session.record_sheet(sheet, data)
+
+
+def read(path):
+    """Rebuild the sheets of a session from its journal.
+
+    Sheets that were completed are rebuilt from their final data. Sheets of a
+    task that was interrupted are rebuilt from the trials recorded so far
+    (keeping the last record of each trial number, if the task has one).
+    Returns an ordered dict of sheet name -> DataFrame (or None).
+
+    Parameters:
+    path -- path of the journal file
+    """
+    sheets = collections.OrderedDict()
+    trials = collections.OrderedDict()
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A power cut can leave the last line half-written
+                continue
+
+            if entry["type"] == "sheet":
+                if entry["columns"] is None:
+                    sheets[entry["sheet"]] = None
+                else:
+                    sheets[entry["sheet"]] = pd.DataFrame(
+                        entry["rows"], columns=entry["columns"]
+                    )
+            elif entry["type"] == "trial":
+                trials.setdefault(entry["sheet"], []).append(entry["row"])
+
+    for sheet, rows in trials.items():
+        if sheet not in sheets:
+            partial = pd.DataFrame(rows)
+            if "trial" in partial.columns:
+                partial = partial.drop_duplicates(subset="trial", keep="last")
+            sheets[sheet] = partial.reset_index(drop=True)
+
+    return sheets
+
+
+def finalise(path, output_file, progress=None, writer=None):
+    """Build the output of a session from its journal, then delete the journal.
+
+    The output is written to a temporary path (with the same extension) and
+    moved into place once it is complete, and only then is the journal
+    deleted, so a failed export leaves no partial output behind. An existing
+    output file is never overwritten: FileExistsError is raised and the
+    journal is kept.
+
+    Parameters:
+    path -- path of the journal file
+    output_file -- path of the output file (or directory)
+    progress -- optional callable, see output.OutputWriter.write()
+    writer -- output.OutputWriter to use. Defaults to the Excel writer
+    """
+    if writer is None:
+        writer = output.get_writer()
+
+    # Never replace the output of another session
+    if os.path.exists(output_file):
+        raise FileExistsError(f"Output already exists: {output_file}")
+
+    # Keep the real extension, which the writer (e.g. pandas' Excel engine
+    # selection) may depend on
+    root, extension = os.path.splitext(output_file)
+    partial_file = root + ".part" + extension
+    try:
+        writer.write(read(path), partial_file, progress=progress)
+    except Exception:
+        if os.path.isdir(partial_file):
+            shutil.rmtree(partial_file)
+        elif os.path.exists(partial_file):
+            os.remove(partial_file)
+        raise
+    os.replace(partial_file, output_file)
+    os.remove(path)
+
+
+def recover(directory, writer=None):
+    """Rebuild the output of the journals left in a data directory.
+
+    A journal is only left behind when a session did not finish normally.
+    Its output is written next to it, with a "-recovered" suffix (numbered
+    "-recovered-2", "-recovered-3"...) if a file with the normal name already
+    exists, so earlier outputs are never overwritten. Returns the list of
+    written files.
+
+    Parameters:
+    directory -- directory containing the journals
+    writer -- output.OutputWriter to use. Defaults to the Excel writer
+    """
+    if writer is None:
+        writer = output.get_writer()
+
+    recovered = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(JOURNAL_EXTENSION):
+            continue
+
+        path = os.path.join(directory, file_name)
+        base = path[: -len(JOURNAL_EXTENSION)]
+        output_file = writer.output_path(base)
+        suffix = 1
+        while os.path.exists(output_file):
+            name = "-recovered" if suffix == 1 else f"-recovered-{suffix}"
+            output_file = writer.output_path(base + name)
+            suffix += 1
+
+        try:
+            finalise(path, output_file, writer=writer)
+        except Exception as e:
+            print(f"Error recovering {file_name}: {e}")
+        else:
+            print(f"Recovered {file_name} -> {os.path.basename(output_file)}")
+            recovered.append(output_file)
+
+    return recovered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rebuild workbooks from the journals of interrupted sessions."
+    )
+    parser.add_argument("directory", help="data directory containing the journals")
+    parser.add_argument(
+        "--format",
+        choices=list(output.WRITERS),
+        default=output.DEFAULT_FORMAT,
+        help="output format (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}")
+        return 1
+
+    recover(args.directory, output.get_writer(args.format))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""Output formats for session data.
+
+A session is a set of named sheets (pandas DataFrames): the subject "info"
+sheet plus one or more sheets per task. Each writer stores them in a
+different format:
+
+    xlsx     one Excel workbook, one worksheet per sheet
+    csv      a directory with one .csv file per sheet
+    parquet  a directory with one .parquet file per sheet
+    feather  a directory with one .feather (Arrow IPC) file per sheet
+
+Directory formats also contain a session.json file with the subject info and
+the sheet names in order. Parquet and Feather files carry the subject info in
+their schema metadata as well, so each file can be identified on its own.
+Parquet and Feather require pyarrow.
+
+The format used by the battery is set with the "outputFormat" key of the
+GeneralSettings group in battery_settings.ini.
+"""
+import os
+import re
+import json
+import collections
+import pandas as pd
+
+DEFAULT_FORMAT = "xlsx"
+
+# File listing the sheets (and the subject info) of directory formats
+SESSION_FILE = "session.json"
+
+# Keys of the subject info and sheet name in Parquet/Feather schema metadata
+INFO_METADATA_KEY = b"cognitive_battery.info"
+SHEET_METADATA_KEY = b"cognitive_battery.sheet"
+
+# Column of the placeholder sheet written for tasks that returned no data
+PLACEHOLDER_COLUMN = "note"
+
+
+def _info_records(sheets):
+    """Return the subject info as a list of dicts (empty if there is none)."""
+    info = sheets.get("info")
+    if not isinstance(info, pd.DataFrame):
+        return []
+    return json.loads(info.to_json(orient="records", date_format="iso"))
+
+
+def placeholder(sheet_name):
+    """Return the sheet written in place of a task that returned no data."""
+    return pd.DataFrame({PLACEHOLDER_COLUMN: [f"No data for {sheet_name}"]})
+
+
+def is_placeholder(df):
+    """Return True if a sheet read back is a placeholder (see placeholder())."""
+    return (
+        list(df.columns) == [PLACEHOLDER_COLUMN]
+        and len(df) == 1
+        and str(df.iloc[0, 0]).startswith("No data for ")
+    )
+
+
+class OutputWriter(object):
+    """Base class of the output formats.
+
+    Subclasses set `name` (the value used in the settings) and `extension`
+    (appended to the base name of the output), and implement write() and
+    read().
+    """
+
+    name = None
+    extension = None
+
+    def output_path(self, base):
+        """Return the output path for a base path without extension."""
+        return base + self.extension
+
+    def write(self, sheets, path, progress=None):
+        """Write the sheets of a session.
+
+        Parameters:
+        sheets -- ordered dict of sheet name -> DataFrame (or None)
+        path -- output path
+        progress -- optional callable, called as progress(done, total) after
+            each sheet is written
+        """
+        raise NotImplementedError
+
+    def read(self, path):
+        """Read the sheets of a session as an ordered dict of name -> DataFrame.
+
+        Parameters:
+        path -- path written by write()
+        """
+        raise NotImplementedError
+
+
+class ExcelWriter(OutputWriter):
+    """One Excel workbook with a worksheet per sheet (openpyxl)."""
+
+    name = "xlsx"
+    extension = ".xlsx"
+
+    def write(self, sheets, path, progress=None):
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for index, (sheet_name, df) in enumerate(sheets.items()):
+                # Verifica que df sea un DataFrame válido antes de escribir
+                if isinstance(df, pd.DataFrame):
+                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+                else:
+                    # si por alguna razón la task devolvió None, anotarlo en la hoja
+                    placeholder(sheet_name).to_excel(
+                        writer, sheet_name=sheet_name, index=False
+                    )
+
+                if progress is not None:
+                    progress(index + 1, len(sheets))
+
+    def read(self, path):
+        return collections.OrderedDict(
+            pd.read_excel(path, None, converters={"sub_num": str})
+        )
+
+
+class SheetDirectoryWriter(OutputWriter):
+    """A directory with one file per sheet and a session.json index.
+
+    Subclasses set `file_extension` and implement write_sheet() and
+    read_sheet().
+    """
+
+    file_extension = None
+
+    def file_name(self, sheet_name):
+        """Return the file name used for a sheet."""
+        return re.sub(r'[/\\:*?"<>|]', "_", sheet_name) + self.file_extension
+
+    def write(self, sheets, path, progress=None):
+        os.makedirs(path)
+        info = _info_records(sheets)
+        info_json = json.dumps(info, ensure_ascii=False)
+
+        index = collections.OrderedDict()
+        for done, (sheet_name, df) in enumerate(sheets.items()):
+            if isinstance(df, pd.DataFrame):
+                file_name = self.file_name(sheet_name)
+                df = df.rename(columns=str)
+                self.write_sheet(
+                    df, os.path.join(path, file_name), sheet_name, info_json
+                )
+                index[sheet_name] = file_name
+            else:
+                index[sheet_name] = None
+
+            if progress is not None:
+                progress(done + 1, len(sheets))
+
+        with open(os.path.join(path, SESSION_FILE), "w", encoding="utf-8") as f:
+            json.dump({"info": info, "sheets": index}, f, ensure_ascii=False, indent=2)
+
+    def read(self, path):
+        with open(os.path.join(path, SESSION_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)["sheets"]
+
+        sheets = collections.OrderedDict()
+        for sheet_name, file_name in index.items():
+            if file_name is None:
+                sheets[sheet_name] = None
+            else:
+                sheets[sheet_name] = self.read_sheet(os.path.join(path, file_name))
+        return sheets
+
+    def write_sheet(self, df, path, sheet_name, info_json):
+        """Write one sheet.
+
+        Parameters:
+        df -- DataFrame to write
+        path -- path of the sheet file
+        sheet_name -- name of the sheet
+        info_json -- subject info, serialised as JSON
+        """
+        raise NotImplementedError
+
+    def read_sheet(self, path):
+        """Read one sheet file into a DataFrame."""
+        raise NotImplementedError
+
+
+class CsvWriter(SheetDirectoryWriter):
+    """A directory with one UTF-8 .csv file per sheet."""
+
+    name = "csv"
+    extension = ".csv"
+    file_extension = ".csv"
+
+    def write_sheet(self, df, path, sheet_name, info_json):
+        df.to_csv(path, index=False, encoding="utf-8")
+
+    def read_sheet(self, path):
+        return pd.read_csv(path, converters={"sub_num": str})
+
+
+def arrow_table(df, sheet_name, info_json):
+    """Convert a DataFrame to an Arrow table tagged with the session metadata.
+
+    Task data can mix numbers and strings in one column (e.g. "NA" for
+    missing responses), which Arrow cannot store; such columns are written as
+    strings.
+    """
+    import pyarrow as pa
+
+    for column in df.columns:
+        if df[column].dtype == object:
+            try:
+                pa.array(df[column], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df = df.assign(
+                    **{column: df[column].map(lambda v: None if pd.isna(v) else str(v))}
+                )
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[INFO_METADATA_KEY] = info_json.encode("utf-8")
+    metadata[SHEET_METADATA_KEY] = sheet_name.encode("utf-8")
+    return table.replace_schema_metadata(metadata)
+
+
+class ParquetWriter(SheetDirectoryWriter):
+    """A directory with one .parquet file per sheet (pyarrow)."""
+
+    name = "parquet"
+    extension = ".parquet"
+    file_extension = ".parquet"
+
+    def write_sheet(self, df, path, sheet_name, info_json):
+        import pyarrow.parquet as pq
+
+        pq.write_table(arrow_table(df, sheet_name, info_json), path)
+
+    def read_sheet(self, path):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).to_pandas()
+
+
+class FeatherWriter(SheetDirectoryWriter):
+    """A directory with one .feather (Arrow IPC) file per sheet (pyarrow)."""
+
+    name = "feather"
+    extension = ".feather"
+    file_extension = ".feather"
+
+    def write_sheet(self, df, path, sheet_name, info_json):
+        import pyarrow.feather as feather
+
+        feather.write_feather(arrow_table(df, sheet_name, info_json), path)
+
+    def read_sheet(self, path):
+        import pyarrow.feather as feather
+
+        return feather.read_table(path).to_pandas()
+
+
+WRITERS = collections.OrderedDict(
+    (writer.name, writer)
+    for writer in (ExcelWriter, CsvWriter, ParquetWriter, FeatherWriter)
+)
+
+
+def get_writer(name=None):
+    """Return a writer for an output format name (see WRITERS).
+
+    Parameters:
+    name -- format name, e.g. "xlsx" or "parquet". Defaults to DEFAULT_FORMAT
+    """
+    name = (name or DEFAULT_FORMAT).strip().lower()
+    if name not in WRITERS:
+        raise ValueError(
+            f"Unknown output format '{name}'. Use one of: {', '.join(WRITERS)}"
+        )
+    return WRITERS[name]()
+
+
+def writer_for_path(path):
+    """Return the writer that produced a file or directory, or None."""
+    for writer in WRITERS.values():
+        if path.endswith(writer.extension):
+            return writer()
+    return None
+
+
+def read(path):
+    """Read a session written in any output format.
+
+    Returns an ordered dict of sheet name -> DataFrame.
+
+    Parameters:
+    path -- path of the session output (file or directory)
+    """
+    writer = writer_for_path(path)
+    if writer is None:
+        raise ValueError(f"Unknown output format: {path}")
+    return writer.read(path)
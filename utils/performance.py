@@ -0,0 +1,316 @@
+"""Opt-in timing-quality instrumentation of a session.
+
+While running (see start()), the following are measured:
+
+- every flip made through display.flip() or display.update(): how long it
+  took and the interval since the previous one
+- every frame presented by a FrameScheduler: how late it appeared
+- every response read by a ResponseCapture: how long it waited in the queue
+- every garbage collection: how long it paused the battery
+- optionally, the peak Python memory allocated (tracemalloc, slower)
+
+They are summarised per trial, each trial ending when the task calls
+end_trial() (next to journal.record(), in the tasks that record single
+trials). Tasks that do not are summarised as one. The summaries form the "Performance" sheet of the session, and
+report() turns it into a per-task timing-quality report, e.g.
+
+    ANT: 288 trials, 3 slow flips (>20 ms), 0 dropped frames, max schedule
+    error 4.0 ms, max event latency 0.6 ms, 41 GC pauses (longest 2.1 ms)
+
+The battery enables it with the "performanceLog" key of the GeneralSettings
+group in battery_settings.ini ("performanceAllocations" also measures
+memory). The report of a saved session is printed with:
+
+    python -m utils.performance <session file>
+"""
+import gc
+import sys
+import argparse
+import tracemalloc
+import pandas as pd
+
+from utils import output, timing
+
+# Name of the output sheet
+SHEET = "Performance"
+
+# Flips taking longer than this (ms) are reported as slow
+SLOW_FLIP_MS = 20
+
+COLUMNS = [
+    "task",
+    "sheet",
+    "trial",
+    "duration_ms",
+    "frames",
+    "flip_ms_mean",
+    "flip_ms_max",
+    "slow_flips",
+    "frame_interval_ms_max",
+    "schedule_error_ms_max",
+    "dropped_frames",
+    "event_latency_ms_max",
+    "gc_pauses",
+    "gc_ms",
+    "gc_ms_max",
+    "alloc_kb_peak",
+]
+
+
+class PerformanceMonitor(object):
+    """Collect the timing measurements of a session, summarised per trial.
+
+    Parameters:
+    allocations -- also measure the peak memory allocated by Python in each
+        trial (tracemalloc)
+    """
+
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.rows = []
+        self.task = None
+        self.trials = 0
+        self.last_flip = None
+        self._gc_start = None
+        self._reset()
+
+        gc.callbacks.append(self._gc_callback)
+        if allocations:
+            tracemalloc.start()
+
+    def _reset(self):
+        # Accumulators of the current trial
+        self.trial_start = timing.get_time_ns()
+        self.frames = 0
+        self.flip_ns = 0
+        self.flip_ns_max = 0
+        self.slow_flips = 0
+        self.interval_ns_max = None
+        self.schedule_error_ns_max = None
+        self.dropped_frames = 0
+        self.event_latency_ns_max = None
+        self.gc_pauses = 0
+        self.gc_ns = 0
+        self.gc_ns_max = 0
+        if self.allocations:
+            self.alloc_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+    def _gc_callback(self, phase, info):
+        now = timing.get_time_ns()
+        if phase == "start":
+            self._gc_start = now
+        elif self._gc_start is not None:
+            pause = now - self._gc_start
+            self._gc_start = None
+            self.gc_pauses += 1
+            self.gc_ns += pause
+            self.gc_ns_max = max(self.gc_ns_max, pause)
+
+    def flip(self, start, end):
+        """Record a flip that started and returned at two times (ns)."""
+        duration = end - start
+        self.frames += 1
+        self.flip_ns += duration
+        self.flip_ns_max = max(self.flip_ns_max, duration)
+        if duration > timing.ms_to_ns(SLOW_FLIP_MS):
+            self.slow_flips += 1
+
+        # The interval across trials (the ITI) counts towards the new trial
+        if self.last_flip is not None:
+            interval = end - self.last_flip
+            self.interval_ns_max = max(self.interval_ns_max or 0, interval)
+        self.last_flip = end
+
+    def schedule_error(self, late, dropped=0):
+        """Record how late (ns) a scheduled frame appeared, and frames dropped."""
+        self.schedule_error_ns_max = max(self.schedule_error_ns_max or 0, late)
+        self.dropped_frames += dropped
+
+    def event_latency(self, latency):
+        """Record the time (ns) a response waited in the event queue."""
+        self.event_latency_ns_max = max(self.event_latency_ns_max or 0, latency)
+
+    def start_task(self, name):
+        """Start summarising the trials of a task."""
+        self.task = name
+        self.trials = 0
+        # The first flip of a task has no interval
+        self.last_flip = None
+        self._reset()
+
+    def end_trial(self, sheet=None):
+        """Summarise the measurements since the previous trial.
+
+        Parameters:
+        sheet -- output sheet the trial belongs to
+        """
+        self.trials += 1
+
+        def ms(ns):
+            return None if ns is None else round(ns / 1e6, 3)
+
+        alloc_kb_peak = None
+        if self.allocations:
+            peak = tracemalloc.get_traced_memory()[1]
+            alloc_kb_peak = round(max(0, peak - self.alloc_start) / 1024, 1)
+
+        self.rows.append(
+            [
+                self.task,
+                sheet,
+                self.trials,
+                ms(timing.get_time_ns() - self.trial_start),
+                self.frames,
+                ms(self.flip_ns / self.frames) if self.frames else None,
+                ms(self.flip_ns_max) if self.frames else None,
+                self.slow_flips,
+                ms(self.interval_ns_max),
+                ms(self.schedule_error_ns_max),
+                self.dropped_frames,
+                ms(self.event_latency_ns_max),
+                self.gc_pauses,
+                ms(self.gc_ns),
+                ms(self.gc_ns_max),
+                alloc_kb_peak,
+            ]
+        )
+        self._reset()
+
+    def end_task(self):
+        """Summarise what is left of a task (e.g. tasks that record no trials)."""
+        if self.trials == 0 or self.frames:
+            self.end_trial()
+        self.task = None
+
+    def data(self):
+        """Return the trial summaries as a DataFrame."""
+        return pd.DataFrame(self.rows, columns=COLUMNS)
+
+    def close(self):
+        """Stop measuring."""
+        if self._gc_callback in gc.callbacks:
+            gc.callbacks.remove(self._gc_callback)
+        if self.allocations:
+            tracemalloc.stop()
+
+
+# Monitor of the running session (see start)
+_monitor = None
+
+
+def start(allocations=False):
+    """Start measuring the session.
+
+    Parameters:
+    allocations -- also measure Python memory allocations (slower)
+    """
+    global _monitor
+    stop()
+    _monitor = PerformanceMonitor(allocations)
+
+
+def stop():
+    """Stop measuring and return the Performance sheet (None if not running)."""
+    global _monitor
+    if _monitor is None:
+        return None
+    data = _monitor.data()
+    _monitor.close()
+    _monitor = None
+    return data
+
+
+def is_running():
+    """Return True if the session is being measured."""
+    return _monitor is not None
+
+
+def start_task(name):
+    """Mark the start of a task. Does nothing if not running."""
+    if _monitor is not None:
+        _monitor.start_task(name)
+
+
+def end_task():
+    """Mark the end of a task. Does nothing if not running."""
+    if _monitor is not None:
+        _monitor.end_task()
+
+
+def end_trial(sheet=None):
+    """Mark the end of a trial. Does nothing if not running."""
+    if _monitor is not None:
+        _monitor.end_trial(sheet)
+
+
+def flip(start, end):
+    """Record a flip (see PerformanceMonitor.flip). Does nothing if not running."""
+    if _monitor is not None:
+        _monitor.flip(start, end)
+
+
+def schedule_error(late, dropped=0):
+    """Record a scheduled frame's lateness. Does nothing if not running."""
+    if _monitor is not None:
+        _monitor.schedule_error(late, dropped)
+
+
+def event_latency(latency):
+    """Record a response's queue latency. Does nothing if not running."""
+    if _monitor is not None:
+        _monitor.event_latency(latency)
+
+
+def _max_ms(column):
+    # Largest value of a column in ms, or n/a if the task never measured it
+    if column.isna().all():
+        return "n/a"
+    return f"{column.max():.1f} ms"
+
+
+def report(data):
+    """Return a timing-quality summary line per task.
+
+    Measurements a task does not make (e.g. schedule errors without a
+    FrameScheduler) are reported as n/a.
+
+    Parameters:
+    data -- Performance sheet (see PerformanceMonitor.data)
+    """
+    lines = []
+    for task, trials in data.groupby("task", sort=False):
+        line = (
+            f"{task}: {len(trials)} trials, "
+            f"{int(trials['slow_flips'].sum())} slow flips (>{SLOW_FLIP_MS} ms), "
+            f"{int(trials['dropped_frames'].sum())} dropped frames, "
+            f"max schedule error {_max_ms(trials['schedule_error_ms_max'])}, "
+            f"max event latency {_max_ms(trials['event_latency_ms_max'])}, "
+            f"{int(trials['gc_pauses'].sum())} GC pauses "
+            f"(longest {trials['gc_ms_max'].max():.1f} ms)"
+        )
+        if trials["alloc_kb_peak"].notna().any():
+            line += f", peak allocations {trials['alloc_kb_peak'].max():.0f} kB"
+        lines.append(line)
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Print the timing-quality report of a saved session."
+    )
+    parser.add_argument("session", help="session output (any output format)")
+    args = parser.parse_args(argv)
+
+    sheets = output.read(args.session)
+    if not isinstance(sheets.get(SHEET), pd.DataFrame):
+        print(f"The session has no {SHEET} sheet")
+        return 1
+
+    for line in report(sheets[SHEET]):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import sys
+import pygame
+
+from pygame.locals import *
+from utils import performance, timing
+
+# Interval between polls of the event queue while waiting for a response
+POLL_INTERVAL_NS = 500000
+
+
+def event_time(event, now=None):
+    """Return the time (ns, monotonic clock) at which an event was queued.
+
+    SDL stamps events with its millisecond tick counter when they are queued.
+    Where pygame exposes that stamp, it is mapped onto the monotonic clock;
+    otherwise the time at which the event was read is used.
+
+    Parameters:
+    event -- pygame event
+    now -- time (ns) at which the event was read from the queue. Defaults to
+        the current time
+    """
+    if now is None:
+        now = timing.get_time_ns()
+
+    # SDL ticks run in real time, which a sped-up clock does not
+    ticks = getattr(event, "timestamp", None)
+    if not ticks or timing.get_speed() != 1:
+        return now
+
+    # Offset between the SDL tick counter and the monotonic clock
+    offset = now - pygame.time.get_ticks() * 1000000
+    queued = ticks * 1000000 + offset
+
+    # Ignore stamps that cannot belong to this clock
+    if queued > now or now - queued > 1000000000:
+        return now
+    return queued
+
+
+def rt(onset, timestamp):
+    """Return the reaction time in milliseconds between two timestamps.
+
+    Parameters:
+    onset -- stimulus onset (ns), e.g. as returned by FrameScheduler.flip()
+    timestamp -- response time (ns), as stored by ResponseCapture
+    """
+    return round((timestamp - onset) / 1e6, 2)
+
+
+class ResponseCapture(object):
+    """Collect key presses and mouse clicks with high-resolution timestamps.
+
+    While waiting, the event queue is polled every POLL_INTERVAL_NS (sleeping
+    in between), so each response is stamped within a fraction of a
+    millisecond of being queued instead of whenever the task loop gets round
+    to reading it. F12 quits the battery, as everywhere else.
+
+    Parameters:
+    keys -- dict mapping pygame key constants to the recorded response value
+    buttons -- dict mapping mouse buttons to the recorded response value
+    """
+
+    def __init__(self, keys=None, buttons=None):
+        self.keys = keys or {}
+        self.buttons = buttons or {}
+
+        # Buffered (response value, timestamp in ns) tuples, oldest first
+        self.responses = []
+
+    def clear(self):
+        """Discard pending events and buffered responses."""
+        pygame.event.clear()
+        self.responses = []
+
+    def poll(self):
+        """Read the event queue and buffer any mapped responses.
+
+        Returns the list of (value, timestamp) tuples added by this call.
+        """
+        new = []
+        for event in pygame.event.get():
+            now = timing.get_time_ns()
+            value = None
+            if event.type == KEYDOWN:
+                if event.key == K_F12:
+                    sys.exit(0)
+                value = self.keys.get(event.key)
+            elif event.type == MOUSEBUTTONDOWN:
+                value = self.buttons.get(event.button)
+
+            if value is not None:
+                timestamp = event_time(event, now)
+                new.append((value, timestamp))
+                performance.event_latency(now - timestamp)
+
+        self.responses.extend(new)
+        return new
+
+    def pop(self):
+        """Return and clear the buffered responses."""
+        responses = self.responses
+        self.responses = []
+        return responses
+
+    def wait(self, deadline, stop=True):
+        """Collect responses until a deadline.
+
+        Returns the first buffered (value, timestamp) tuple, or None if there
+        was no response.
+
+        Parameters:
+        deadline -- time (ns) at which to stop waiting
+        stop -- return as soon as a response is buffered. If False, keep
+            collecting until the deadline
+        """
+        while True:
+            self.poll()
+            if stop and self.responses:
+                break
+
+            remaining = deadline - timing.get_time_ns()
+            if remaining <= 0:
+                break
+            timing.pause(min(remaining, POLL_INTERVAL_NS))
+
+        return self.responses[0] if self.responses else None
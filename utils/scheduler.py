@@ -0,0 +1,120 @@
+import pygame
+
+from utils import display, performance, timing
+
+# Assumed refresh rate when it cannot be queried or measured
+DEFAULT_REFRESH_RATE = 60
+
+
+def get_refresh_rate():
+    """Return the refresh rate (Hz) of the current display.
+
+    The rate reported by SDL is used when available. Otherwise, if the display
+    is synchronised to the refresh, it is estimated from a few flips.
+    """
+    try:
+        rate = pygame.display.get_current_refresh_rate()
+    except (AttributeError, pygame.error):
+        rate = 0
+
+    if rate > 0:
+        return rate
+
+    if display.has_vsync():
+        intervals = []
+        last = None
+        for _ in range(12):
+            pygame.display.flip()
+            now = timing.get_time_ns()
+            if last is not None:
+                intervals.append(now - last)
+            last = now
+        intervals.sort()
+        median = intervals[len(intervals) // 2]
+        if median > 0:
+            return int(round(1e9 / median))
+
+    return DEFAULT_REFRESH_RATE
+
+
+class FrameScheduler(object):
+    """Present stimuli on screen refreshes and measure when they appeared.
+
+    Durations are quantised to whole refreshes. Each flip is time-stamped
+    right after it returns, which with vsync is the start of the refresh that
+    shows the new frame. Flips that land one or more refreshes after their
+    scheduled deadline are counted as dropped frames.
+    """
+
+    def __init__(self, refresh_rate=None):
+        self.refresh_rate = refresh_rate or get_refresh_rate()
+        self.frame_ns = int(round(1e9 / self.refresh_rate))
+        self.vsync = display.has_vsync()
+
+        # Reference for the millisecond timestamps stored in the task data
+        self.start = timing.get_time_ns()
+        self.deadline = None
+        self.dropped_frames = 0
+
+    def frames(self, duration):
+        """Return the number of refreshes closest to a duration (minimum 1).
+
+        Parameters:
+        duration -- duration in milliseconds
+        """
+        return max(1, int(round(duration * self.refresh_rate / 1000.0)))
+
+    def flip(self):
+        """Flip the display and return the onset time of the new frame (ns)."""
+        display.flip()
+        onset = timing.get_time_ns()
+
+        if self.deadline is not None:
+            late = onset - self.deadline
+            dropped = 0
+            if late > self.frame_ns // 2:
+                dropped = int(round(late / float(self.frame_ns)))
+                self.dropped_frames += dropped
+            performance.schedule_error(max(0, late), dropped)
+            self.deadline = None
+
+        return onset
+
+    def schedule(self, onset, duration):
+        """Schedule the end of the current frame after a duration.
+
+        Returns the time (ns) from which the next frame should be drawn and
+        flipped so that it appears on the scheduled refresh.
+
+        Parameters:
+        onset -- onset of the current frame (ns), as returned by flip()
+        duration -- duration in milliseconds, rounded to whole refreshes
+        """
+        self.deadline = onset + self.frames(duration) * self.frame_ns
+
+        # With vsync the next flip blocks until the refresh itself, so release
+        # half a frame early to leave time for drawing
+        if self.vsync:
+            return self.deadline - self.frame_ns // 2
+        return self.deadline
+
+    def hold(self, onset, duration):
+        """Keep the current frame on screen for a duration.
+
+        Returns just before the refresh on which the next frame should
+        appear, so that the caller can draw it and call flip().
+
+        Parameters:
+        onset -- onset of the current frame (ns), as returned by flip()
+        duration -- duration in milliseconds, rounded to whole refreshes
+        """
+        release = self.schedule(onset, duration)
+        timing.sleep_until(release, poll=display.check_quit)
+
+    def elapsed_ms(self, timestamp):
+        """Convert a timestamp (ns) to milliseconds since the scheduler start.
+
+        Parameters:
+        timestamp -- time in nanoseconds, as returned by flip()
+        """
+        return round((timestamp - self.start) / 1e6, 2)
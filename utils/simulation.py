@@ -0,0 +1,739 @@
+"""Run tasks headless with a simulated participant.
+
+Tasks are run under SDL's dummy video and audio drivers, so no window is
+opened, and a SimulatedParticipant answers them by posting synthetic key
+presses and mouse clicks to the pygame event queue:
+
+- every new frame is a new screen, to which the participant responds after
+  a reaction time drawn from the ResponseModel (or not at all, with the
+  model's omission rate). Screens that change before the response replace it
+- when nothing happens for a while (an instruction screen waiting for a key),
+  the participant tries to move on, usually with space or enter
+
+The participant does not see the stimuli, so choices between the responses
+of a task (see TASK_RESPONSES) are random. Clicks land on something drawn on
+the screen, or on the controls the task exposes in its hit_rects (see
+Target). The clock of utils.timing is sped up, so trials and timeouts take a
+fraction of their real duration.
+
+Each run reports its frame times, number of responses and, optionally, peak
+memory, and checks that the output sheets have the same columns as the
+reference schema (the first run, or a schema file saved earlier):
+
+    python -m utils.simulation ANT SART MRT D2 --runs 100 --speed 20
+        [--seed N] [--report FILE] [--schema FILE] [--save-schema FILE]
+        [--memory]
+
+Tasks can be given by task list name or output sheet name.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+import collections
+import pandas as pd
+import pygame
+
+from pygame.locals import *
+from utils import display, timing
+from tasks import registry
+
+# Default battery screen size (see BatteryWindow.set_default_settings)
+SCREEN_SIZE = (1280, 1024)
+
+# Interval between polls of the event queue in a simulated pygame.event.wait()
+WAIT_POLL_NS = 1000000
+
+# Random points tried when looking for something to click on
+CLICK_TRIES = 50
+
+
+class SimulationTimeout(Exception):
+    """Raised when a simulated task runs longer than its timeout."""
+
+
+class Key(object):
+    """A key press (KEYDOWN followed by KEYUP).
+
+    Parameters:
+    key -- pygame key constant
+    unicode -- text the key produces
+    """
+
+    def __init__(self, key, unicode=""):
+        self.key = key
+        self.unicode = unicode
+
+    def events(self, screen, rng, targets):
+        """Return the pygame events of the action.
+
+        Parameters:
+        screen -- pygame display surface the task draws on
+        rng -- random.Random of the participant
+        targets -- hit_rects of the task (see Target)
+        """
+        attributes = {"key": self.key, "mod": 0, "scancode": 0}
+        return [
+            pygame.event.Event(KEYDOWN, unicode=self.unicode, **attributes),
+            pygame.event.Event(KEYUP, **attributes),
+        ]
+
+
+def drawn_point(screen, rng):
+    """Return a random point of the screen that is not background.
+
+    The colour of the top left pixel is taken as the background. A random
+    point is returned if nothing else is found after CLICK_TRIES tries.
+    """
+    width, height = screen.get_size()
+    background = screen.get_at((0, 0))
+    for _ in range(CLICK_TRIES):
+        pos = (rng.randrange(width), rng.randrange(height))
+        if screen.get_at(pos) != background:
+            break
+    return pos
+
+
+def _click_events(pos, button):
+    return [
+        pygame.event.Event(MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)),
+        pygame.event.Event(MOUSEBUTTONDOWN, pos=pos, button=button),
+        pygame.event.Event(MOUSEBUTTONUP, pos=pos, button=button),
+    ]
+
+
+class Click(object):
+    """A mouse click on something drawn on the screen.
+
+    Parameters:
+    button -- mouse button (1 = left)
+    """
+
+    def __init__(self, button=1):
+        self.button = button
+
+    def events(self, screen, rng, targets):
+        return _click_events(drawn_point(screen, rng), self.button)
+
+
+class Target(object):
+    """A mouse click on one of the controls a task exposes.
+
+    Tasks whose controls cannot be found by clicking what is drawn set a
+    hit_rects attribute: a dict of control name -> list of the pygame.Rect of
+    the controls of that kind on the current screen. The click lands near the
+    centre of one of them, chosen at random. Nothing is clicked if the screen
+    has no such control.
+
+    Parameters:
+    name -- name of the controls in hit_rects
+    button -- mouse button (1 = left)
+    """
+
+    def __init__(self, name, button=1):
+        self.name = name
+        self.button = button
+
+    def events(self, screen, rng, targets):
+        rects = [rect for rect in targets.get(self.name, ()) if rect.w and rect.h]
+        if not rects:
+            return []
+        rect = rng.choice(rects)
+        pos = (
+            rect.x + rect.w // 4 + rng.randrange(max(1, rect.w // 2)),
+            rect.y + rect.h // 4 + rng.randrange(max(1, rect.h // 2)),
+        )
+        return _click_events(pos, self.button)
+
+
+class Sequence(object):
+    """Several actions given at once (e.g. an answer and its confirmation).
+
+    Parameters:
+    actions -- the actions, in order
+    """
+
+    def __init__(self, *actions):
+        self.actions = actions
+
+    def events(self, screen, rng, targets):
+        return [
+            event
+            for action in self.actions
+            for event in action.events(screen, rng, targets)
+        ]
+
+
+class Drag(object):
+    """A horizontal drag with the left mouse button.
+
+    Parameters:
+    distance -- longest drag distance in pixels, in either direction
+    """
+
+    def __init__(self, distance=200):
+        self.distance = distance
+
+    def events(self, screen, rng, targets):
+        width, height = screen.get_size()
+        start = (width // 2, height // 2)
+        end = (start[0] + rng.randint(-self.distance, self.distance), start[1])
+        return [
+            pygame.event.Event(MOUSEBUTTONDOWN, pos=start, button=1),
+            pygame.event.Event(
+                MOUSEMOTION,
+                pos=end,
+                rel=(end[0] - start[0], 0),
+                buttons=(1, 0, 0),
+            ),
+            pygame.event.Event(MOUSEBUTTONUP, pos=end, button=1),
+        ]
+
+
+SPACE = Key(K_SPACE, " ")
+RETURN = Key(K_RETURN, "\r")
+DIGITS = [Key(getattr(pygame, f"K_{digit}"), str(digit)) for digit in range(10)]
+CLICK = Click()
+
+# Key pressed by mistake (see ResponseModel.error_rate)
+SLIP = Key(K_x, "x")
+
+
+class ResponseSet(object):
+    """The responses a simulated participant gives to a task.
+
+    Parameters:
+    respond -- actions to choose from when a new frame is shown. Repeat an
+        action to make it more likely
+    advance -- actions to choose from when the screen has been waiting for a
+        while (e.g. to leave an instruction screen)
+    """
+
+    def __init__(self, respond, advance=(SPACE, RETURN)):
+        self.respond = list(respond)
+        self.advance = list(advance)
+
+
+def answers(keys):
+    """Return a ResponseSet that presses one of the keys, then space.
+
+    For questionnaires, where a key chooses an answer (redrawing the item)
+    and space confirms it. The same answers are given to advance, since
+    space alone does not leave an unanswered item.
+    """
+    actions = [Sequence(key, SPACE) for key in keys]
+    return ResponseSet(actions, actions)
+
+
+# Responses of the battery tasks, by task list name
+TASK_RESPONSES = {
+    "Attention Network Test (ANT)": ResponseSet([Key(K_LEFT), Key(K_RIGHT)]),
+    "Digit Span (backwards)": ResponseSet(DIGITS + [RETURN]),
+    "Digits Memorization": ResponseSet(DIGITS),
+    "Eriksen Flanker Task": ResponseSet([Key(K_LEFT), Key(K_RIGHT)]),
+    "Mental Rotation Task": ResponseSet(
+        [Target("answers")] * 6
+        + [Target("previous"), Target("next"), Target("finish"), SPACE]
+    ),
+    "Raven's Progressive Matrices": ResponseSet([CLICK]),
+    "Sternberg Task": ResponseSet([Key(K_LEFT), Key(K_RIGHT)]),
+    "Sustained Attention to Response Task (SART)": ResponseSet([SPACE]),
+    "NEO-PI-R": answers(DIGITS[1:6]),
+    "D2 (Test de atención y concentración)": ResponseSet([CLICK]),
+    "Dual Task": ResponseSet([Key(K_a, "a")]),
+    "Relative Verticality Perception (PVR)": ResponseSet([Drag(), Drag(), RETURN]),
+    "ACS": answers(DIGITS[1:5]),
+    "RIASEC": answers(DIGITS[1:4]),
+    "Inteligencia Multiple": answers(DIGITS[1:4]),
+    "SRQ20": answers([Key(K_s, "s"), Key(K_n, "n")]),
+    "Ikigai": ResponseSet([Target("options")], [SPACE, RETURN, Target("options")]),
+    "FourFigures": ResponseSet([Target("responses")], [SPACE, Target("responses")]),
+}
+
+# Responses to tasks not listed in TASK_RESPONSES (e.g. plugin tasks)
+DEFAULT_RESPONSES = ResponseSet([SPACE, RETURN, CLICK])
+
+
+class ResponseModel(object):
+    """Response behaviour of a simulated participant.
+
+    Reaction times follow an ex-Gaussian distribution (a Gaussian plus an
+    exponential component), the usual shape of human RT distributions.
+
+    Parameters:
+    rt_mu -- mean of the Gaussian component (ms)
+    rt_sigma -- SD of the Gaussian component (ms)
+    rt_tau -- mean of the exponential component (ms)
+    error_rate -- probability that a response is a slip: a key press the
+        task does not use
+    omission_rate -- probability of not responding to a new screen
+    patience -- time (ms) without a new frame or response after which the
+        participant tries to advance the screen
+    min_rt -- shortest reaction time (ms)
+    """
+
+    def __init__(
+        self,
+        rt_mu=450,
+        rt_sigma=80,
+        rt_tau=120,
+        error_rate=0.05,
+        omission_rate=0.02,
+        patience=2000,
+        min_rt=150,
+    ):
+        self.rt_mu = rt_mu
+        self.rt_sigma = rt_sigma
+        self.rt_tau = rt_tau
+        self.error_rate = error_rate
+        self.omission_rate = omission_rate
+        self.patience = patience
+        self.min_rt = min_rt
+
+    def rt(self, rng):
+        """Draw a reaction time (ms)."""
+        rt = rng.gauss(self.rt_mu, self.rt_sigma) + rng.expovariate(1.0 / self.rt_tau)
+        return max(self.min_rt, rt)
+
+
+class SimulatedParticipant(object):
+    """Answer a running task by posting events to the pygame event queue.
+
+    While attached (see attach()), pygame.display.flip/update and
+    pygame.event.get/poll/wait are wrapped: flips schedule a response to the
+    new frame, and scheduled responses are posted once they are due, when
+    the task next reads the event queue. pygame.mouse.get_pos is wrapped too,
+    as the dummy video driver does not move the cursor, and returns the
+    position of the last posted mouse event.
+
+    Parameters:
+    screen -- pygame display surface the task draws on
+    responses -- ResponseSet of the task
+    model -- ResponseModel
+    seed -- seed of the participant's random choices
+    timeout -- longest clock time (s) a task may run, or None
+    task -- the running task, whose hit_rects Target actions click on
+    """
+
+    def __init__(
+        self, screen, responses, model=None, seed=None, timeout=None, task=None
+    ):
+        self.screen = screen
+        self.responses = responses
+        self.model = model or ResponseModel()
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.task = task
+        self.mouse_pos = (0, 0)
+
+        self._originals = {}
+        self.reset()
+
+    def reset(self):
+        """Clear the scheduled response and the statistics."""
+        now = timing.get_time_ns()
+        self.start = now
+        self.idle_since = now
+
+        # (due time, time first scheduled, action) of the next response
+        self.pending = None
+
+        self.actions = 0
+        self.frame_times = []
+
+    def _schedule(self, actions, now, scheduled=None):
+        if self.rng.random() < self.model.error_rate:
+            action = SLIP
+        else:
+            action = self.rng.choice(actions)
+        due = now + timing.ms_to_ns(self.model.rt(self.rng))
+        self.pending = (due, now if scheduled is None else scheduled, action)
+
+    def frame(self):
+        """Respond to a new frame."""
+        self.frame_times.append(time.perf_counter_ns())
+        now = timing.get_time_ns()
+        self.idle_since = now
+
+        if self.pending is not None:
+            # The screen changed before the response: respond to the new one,
+            # unless the response has been put off for too long (animations)
+            _, scheduled, _ = self.pending
+            if now - scheduled >= timing.ms_to_ns(self.model.patience):
+                return
+            self._schedule(self.responses.respond, now, scheduled)
+        elif self.rng.random() >= self.model.omission_rate:
+            self._schedule(self.responses.respond, now)
+
+    def release(self):
+        """Post the scheduled response if it is due."""
+        now = timing.get_time_ns()
+        if self.timeout is not None and now - self.start > self.timeout * 1e9:
+            raise SimulationTimeout(f"the task ran for more than {self.timeout} s")
+
+        if self.pending is None:
+            if now - self.idle_since >= timing.ms_to_ns(self.model.patience):
+                self._schedule(self.responses.advance, now)
+            return
+
+        due, _, action = self.pending
+        if now >= due:
+            self.pending = None
+            self.idle_since = now
+            targets = getattr(self.task, "hit_rects", None) or {}
+            events = action.events(self.screen, self.rng, targets)
+            if events:
+                self.actions += 1
+            for event in events:
+                if hasattr(event, "pos"):
+                    self.mouse_pos = event.pos
+                pygame.event.post(event)
+
+    def _wrap(self, module, name, wrapper):
+        self._originals[(module, name)] = getattr(module, name)
+        setattr(module, name, wrapper)
+
+    def attach(self):
+        """Start answering: wrap the pygame display, event and mouse functions."""
+        flip = pygame.display.flip
+        update = pygame.display.update
+        get = pygame.event.get
+        poll = pygame.event.poll
+
+        def flip_wrapper(*args, **kwargs):
+            result = flip(*args, **kwargs)
+            self.frame()
+            return result
+
+        def update_wrapper(*args, **kwargs):
+            result = update(*args, **kwargs)
+            self.frame()
+            return result
+
+        def get_wrapper(*args, **kwargs):
+            self.release()
+            return get(*args, **kwargs)
+
+        def poll_wrapper():
+            self.release()
+            return poll()
+
+        def wait_wrapper(timeout=0):
+            # Wait in clock time, so that a sped-up clock also speeds up waits
+            deadline = None
+            if timeout:
+                deadline = timing.get_time_ns() + timing.ms_to_ns(timeout)
+            while True:
+                self.release()
+                event = poll()
+                if event.type != NOEVENT:
+                    return event
+                if deadline is not None and timing.get_time_ns() >= deadline:
+                    return event
+                timing.pause(WAIT_POLL_NS)
+
+        self._wrap(pygame.display, "flip", flip_wrapper)
+        self._wrap(pygame.display, "update", update_wrapper)
+        self._wrap(pygame.event, "get", get_wrapper)
+        self._wrap(pygame.event, "poll", poll_wrapper)
+        self._wrap(pygame.event, "wait", wait_wrapper)
+        self._wrap(pygame.mouse, "get_pos", lambda: self.mouse_pos)
+        self.reset()
+
+    def detach(self):
+        """Stop answering and restore the pygame functions."""
+        for (module, name), function in self._originals.items():
+            setattr(module, name, function)
+        self._originals = {}
+
+    def frame_stats(self):
+        """Return the mean, 95th percentile and longest frame time (real ms)."""
+        intervals = sorted(
+            (b - a) / 1e6 for a, b in zip(self.frame_times, self.frame_times[1:])
+        )
+        if not intervals:
+            return None, None, None
+        p95 = intervals[min(len(intervals) - 1, int(len(intervals) * 0.95))]
+        return sum(intervals) / len(intervals), p95, intervals[-1]
+
+
+class SimulationSettings(object):
+    """Battery settings used by simulated tasks (see BatteryWindow.get_settings).
+
+    Defaults are those of a new battery_settings.ini. Any attribute can be
+    overridden with a keyword argument.
+    """
+
+    def __init__(self, **overrides):
+        self.ant_blocks = 3
+        self.flanker_dark_mode = False
+        self.flanker_sets_practice = 3
+        self.flanker_sets_main = 25
+        self.flanker_blocks_compat = 1
+        self.flanker_blocks_incompat = 0
+        self.flanker_block_order = "compatible"
+        self.ravens_start = 13
+        self.ravens_trials = 12
+        self.sternberg_blocks = 2
+        for name, value in overrides.items():
+            setattr(self, name, value)
+
+
+def find_task(name):
+    """Return the spec of a task by task list name or output sheet name.
+
+    Names are matched case-insensitively. Raises KeyError if there is no such
+    task.
+    """
+    for spec in registry.get_tasks():
+        names = [spec.name] + spec.sheets
+        if name.lower() in (n.lower() for n in names):
+            return spec
+    raise KeyError(name)
+
+
+def schema(data):
+    """Return the columns of each output sheet (None if it has no data)."""
+    return collections.OrderedDict(
+        (
+            sheet,
+            [str(column) for column in df.columns]
+            if isinstance(df, pd.DataFrame)
+            else None,
+        )
+        for sheet, df in data.items()
+    )
+
+
+def check_schema(data, reference):
+    """Return a list of differences between the output of a run and a schema.
+
+    Parameters:
+    data -- ordered dict of sheet name -> DataFrame returned by the task
+    reference -- dict of sheet name -> columns (see schema())
+    """
+    problems = []
+    for sheet, columns in schema(data).items():
+        if columns is None:
+            problems.append(f"{sheet}: no data")
+        elif not len(data[sheet]):
+            problems.append(f"{sheet}: no rows")
+        if sheet not in reference:
+            continue
+        if columns != reference[sheet]:
+            missing = [c for c in reference[sheet] or [] if c not in (columns or [])]
+            extra = [c for c in columns or [] if c not in (reference[sheet] or [])]
+            problems.append(
+                f"{sheet}: columns differ (missing {missing}, unexpected {extra})"
+            )
+    for sheet in reference:
+        if sheet not in data:
+            problems.append(f"{sheet}: sheet missing")
+    return problems
+
+
+def run_task(spec, screen, background, participant, settings=None, memory=False):
+    """Run one task with a simulated participant.
+
+    Returns the task data (ordered dict of sheet -> DataFrame) and a dict of
+    run statistics.
+
+    Parameters:
+    spec -- TaskSpec of the task
+    screen -- pygame display surface
+    background -- background surface
+    participant -- SimulatedParticipant answering the task
+    settings -- SimulationSettings. Defaults to the battery defaults
+    memory -- measure the peak memory allocated by Python (slower)
+    """
+    if memory:
+        tracemalloc.start()
+
+    real_start = time.perf_counter_ns()
+    clock_start = timing.get_time_ns()
+    participant.attach()
+    try:
+        participant.task = spec.create(
+            screen, background, settings or SimulationSettings()
+        )
+        data = spec.collect(participant.task.run())
+    finally:
+        participant.detach()
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+
+    frame_mean, frame_p95, frame_max = participant.frame_stats()
+    stats = {
+        "real_s": (time.perf_counter_ns() - real_start) / 1e9,
+        "clock_s": (timing.get_time_ns() - clock_start) / 1e9,
+        "frames": len(participant.frame_times),
+        "frame_ms_mean": frame_mean,
+        "frame_ms_p95": frame_p95,
+        "frame_ms_max": frame_max,
+        "responses": participant.actions,
+        "peak_memory_kb": None if peak is None else peak / 1024,
+    }
+    return data, stats
+
+
+def simulate(
+    task_names,
+    runs=1,
+    speed=20,
+    seed=0,
+    model=None,
+    reference=None,
+    memory=False,
+    timeout=3600,
+):
+    """Run tasks repeatedly with simulated participants.
+
+    Returns a DataFrame with one row of statistics per task run, and the
+    schema of each task's output (the reference or the first run's).
+
+    Parameters:
+    task_names -- task list or output sheet names of the tasks to run
+    runs -- number of runs of each task
+    speed -- clock speed relative to real time (see timing.set_speed)
+    seed -- seed of the first run. Run i uses seed + i for both the task's
+        random trial orders and the participant
+    model -- ResponseModel of the participants
+    reference -- dict of task name -> schema to check the outputs against
+    memory -- measure the peak memory of each run (see run_task)
+    timeout -- longest clock time (s) of one task run
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+
+    specs = [find_task(name) for name in task_names]
+    reference = dict(reference or {})
+
+    screen = display.set_mode(SCREEN_SIZE)
+    background = pygame.Surface(screen.get_size()).convert()
+
+    results = []
+    timing.set_speed(speed)
+    try:
+        for spec in specs:
+            responses = TASK_RESPONSES.get(spec.name, DEFAULT_RESPONSES)
+            for run in range(runs):
+                random.seed(seed + run)
+                background.fill((255, 255, 255))
+                participant = SimulatedParticipant(
+                    screen, responses, model, seed=seed + run, timeout=timeout
+                )
+
+                row = {"task": spec.name, "run": run, "seed": seed + run}
+                try:
+                    data, stats = run_task(
+                        spec, screen, background, participant, memory=memory
+                    )
+                except (Exception, SystemExit) as e:
+                    row["error"] = f"{type(e).__name__}: {e}"
+                    print(f"{spec.name} #{run}: {row['error']}")
+                    results.append(row)
+                    continue
+
+                row.update(stats)
+                row.update(
+                    ("rows:" + sheet, len(df) if isinstance(df, pd.DataFrame) else 0)
+                    for sheet, df in data.items()
+                )
+                if spec.name not in reference:
+                    reference[spec.name] = schema(data)
+                problems = check_schema(data, reference[spec.name])
+                row["schema_ok"] = not problems
+                for problem in problems:
+                    print(f"{spec.name} #{run}: {problem}")
+
+                print(
+                    "{} #{}: {:.1f} s ({:.1f} s simulated), {} frames".format(
+                        spec.name, run, row["real_s"], row["clock_s"], row["frames"]
+                    )
+                )
+                results.append(row)
+    finally:
+        timing.set_speed(1)
+        pygame.quit()
+
+    return pd.DataFrame(results), reference
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run tasks headless with simulated participants."
+    )
+    parser.add_argument("tasks", nargs="+", help="task list or output sheet names")
+    parser.add_argument("--runs", type=int, default=1, help="runs of each task")
+    parser.add_argument(
+        "--speed", type=float, default=20, help="clock speed relative to real time"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run")
+    parser.add_argument(
+        "--timeout", type=float, default=3600, help="longest simulated run (s)"
+    )
+    parser.add_argument("--rt-mu", type=float, default=450, help="RT mu (ms)")
+    parser.add_argument("--rt-sigma", type=float, default=80, help="RT sigma (ms)")
+    parser.add_argument("--rt-tau", type=float, default=120, help="RT tau (ms)")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.05, help="probability of a slip"
+    )
+    parser.add_argument(
+        "--omission-rate", type=float, default=0.02, help="probability of no response"
+    )
+    parser.add_argument("--report", default=None, help="save the run statistics (csv)")
+    parser.add_argument("--schema", default=None, help="schema file to check against")
+    parser.add_argument(
+        "--save-schema", default=None, help="save the output schemas (json)"
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="measure peak memory (slower)"
+    )
+    args = parser.parse_args(argv)
+
+    reference = None
+    if args.schema is not None:
+        with open(args.schema, "r", encoding="utf-8") as f:
+            reference = json.load(f)
+
+    model = ResponseModel(
+        rt_mu=args.rt_mu,
+        rt_sigma=args.rt_sigma,
+        rt_tau=args.rt_tau,
+        error_rate=args.error_rate,
+        omission_rate=args.omission_rate,
+    )
+
+    try:
+        results, schemas = simulate(
+            args.tasks,
+            runs=args.runs,
+            speed=args.speed,
+            seed=args.seed,
+            model=model,
+            reference=reference,
+            memory=args.memory,
+            timeout=args.timeout,
+        )
+    except KeyError as e:
+        print(f"Unknown task: {e}")
+        return 1
+
+    if args.report is not None:
+        results.to_csv(args.report, index=False)
+    if args.save_schema is not None:
+        with open(args.save_schema, "w", encoding="utf-8") as f:
+            json.dump(schemas, f, ensure_ascii=False, indent=2)
+
+    failed = "error" in results and results["error"].notna().any()
+    mismatched = "schema_ok" in results and not results["schema_ok"].fillna(True).all()
+    return 1 if failed or mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
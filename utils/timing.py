@@ -0,0 +1,106 @@
+import time
+
+# Sleep coarsely until this close to a deadline, then spin for the remainder
+SPIN_THRESHOLD_NS = 2000000
+# Longest single sleep, so that pending events are still serviced regularly
+MAX_SLEEP_NS = 10000000
+
+# Clock speed relative to real time, and the real and clock times at which it
+# was last set (see set_speed)
+_speed = 1
+_origin_ns = 0
+_offset_ns = 0
+
+
+def get_time_ns():
+    """Return the current time of the monotonic high-resolution clock.
+
+    Only differences between two readings are meaningful.
+    """
+    elapsed = time.perf_counter_ns() - _origin_ns
+    if _speed != 1:
+        elapsed = int(elapsed * _speed)
+    return _offset_ns + elapsed
+
+
+def set_speed(speed):
+    """Run the clock faster (or slower) than real time.
+
+    Only meant for simulated sessions (see utils.simulation): every time read
+    or waited for through this module is scaled, so tasks run `speed` times
+    faster. The clock stays monotonic when the speed changes.
+
+    Parameters:
+    speed -- clock seconds per real second. 1 restores real time
+    """
+    global _speed, _origin_ns, _offset_ns
+    _offset_ns = get_time_ns()
+    _origin_ns = time.perf_counter_ns()
+    _speed = speed
+
+
+def get_speed():
+    """Return the clock speed relative to real time (see set_speed)."""
+    return _speed
+
+
+def pause(duration):
+    """Suspend the thread for a duration of clock time, without spinning.
+
+    Parameters:
+    duration -- duration in nanoseconds
+    """
+    if duration > 0:
+        time.sleep(duration / 1e9 / _speed)
+
+
+def get_time():
+    """Return the current monotonic time in seconds (float)."""
+    return get_time_ns() / 1e9
+
+
+def get_time_ms():
+    """Return the current monotonic time in whole milliseconds."""
+    return get_time_ns() // 1000000
+
+
+def ms_to_ns(duration):
+    """Convert a duration in milliseconds to nanoseconds.
+
+    Parameters:
+    duration -- duration in milliseconds (int or float)
+    """
+    return int(round(duration * 1000000))
+
+
+def sleep_until(deadline, poll=None):
+    """Block until the monotonic clock reaches a deadline.
+
+    The thread sleeps until roughly SPIN_THRESHOLD_NS before the deadline and
+    spins only for the last stretch, which keeps CPU usage low while still
+    releasing at sub-millisecond precision.
+
+    Parameters:
+    deadline -- target time in nanoseconds, as returned by get_time_ns()
+    poll -- optional callable run between sleeps (e.g. to service the event
+        queue). It is not called during the final spin.
+    """
+    while True:
+        remaining = deadline - get_time_ns()
+        if remaining <= 0:
+            return
+
+        if remaining > SPIN_THRESHOLD_NS:
+            if poll is not None:
+                poll()
+            pause(min(remaining - SPIN_THRESHOLD_NS, MAX_SLEEP_NS))
+
+
+def sleep(duration, poll=None):
+    """Block for a duration using the hybrid sleep-then-spin strategy.
+
+    Parameters:
+    duration -- duration in milliseconds (int or float)
+    poll -- optional callable run between sleeps, see sleep_until()
+    """
+    sleep_until(get_time_ns() + ms_to_ns(duration), poll=poll)
@@ -0,0 +1,314 @@
+"""Consolidate the sessions of a data folder into a partitioned Parquet dataset.
+
+The warehouse directory contains:
+
+    trials/task=<task>/condition=<condition>/date=<YYYY-MM-DD>/<session>.parquet
+        one row per trial (or response) of each task sheet, with the sheet's
+        own columns plus sub_num and session
+    subjects/<session>.parquet
+        the info sheet of each session, plus session and source
+    manifest.json
+        the sessions already imported, with the size and modification time
+        of their source file
+
+Partitions follow the Hive convention, so the trial table of a task can be
+scanned with any Arrow/Parquet reader (see read_trials()). Running the
+command again only imports new or modified sessions, and removes the sessions
+whose source is no longer in the data folder:
+
+    python -m utils.warehouse <data directory> <warehouse directory>
+
+Requires pyarrow.
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+import collections
+import urllib.parse
+import pandas as pd
+
+from utils import journal, output
+
+MANIFEST_FILE = "manifest.json"
+TRIALS_DIR = "trials"
+SUBJECTS_DIR = "subjects"
+
+
+def session_id(source):
+    """Return the identifier of the session stored in a data file or directory.
+
+    Parameters:
+    source -- file (or directory) name of the session in the data folder
+    """
+    return hashlib.sha1(os.path.basename(source).encode("utf-8")).hexdigest()[:16]
+
+
+def _partition(name, value):
+    # Hive partition directory, with the value escaped for the file system
+    value = "__HIVE_DEFAULT_PARTITION__" if value in (None, "") else str(value)
+    return f"{name}={urllib.parse.quote(value, safe='')}"
+
+
+def _source_stat(path):
+    # Size and modification time of a session file or directory
+    if os.path.isdir(path):
+        stats = [os.stat(os.path.join(path, f)) for f in sorted(os.listdir(path))]
+        return sum(s.st_size for s in stats), max(
+            [s.st_mtime_ns for s in stats] or [os.stat(path).st_mtime_ns]
+        )
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _normalise(df):
+    """Give a sheet stable column types across sessions.
+
+    Integer columns become float64 (they turn into floats as soon as one
+    session has a missing value), so every file of a task has the same schema.
+    """
+    df = df.rename(columns=str)
+    for column in df.columns:
+        if pd.api.types.is_integer_dtype(df[column]):
+            df[column] = df[column].astype("float64")
+    return df
+
+
+def find_sessions(data_dir):
+    """Return the paths of the session outputs in a data folder, sorted."""
+    sessions = []
+    for name in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, name)
+        if name.startswith("~$") or name.endswith(journal.JOURNAL_EXTENSION):
+            continue
+        writer = output.writer_for_path(name)
+        if writer is None:
+            continue
+        # Directory formats are directories, Excel workbooks are files
+        if os.path.isdir(path) != isinstance(writer, output.SheetDirectoryWriter):
+            continue
+        sessions.append(path)
+    return sessions
+
+
+def read_manifest(warehouse_dir):
+    """Return the manifest of a warehouse (session id -> entry)."""
+    path = os.path.join(warehouse_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(warehouse_dir, manifest):
+    path = os.path.join(warehouse_dir, MANIFEST_FILE)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(path + ".part", path)
+
+
+def import_session(source, warehouse_dir):
+    """Write the trials and subject info of one session to the warehouse.
+
+    Returns the manifest entry of the session.
+
+    Parameters:
+    source -- path of the session output (any utils.output format)
+    warehouse_dir -- warehouse directory
+    """
+    import pyarrow.parquet as pq
+
+    session = session_id(source)
+    sheets = output.read(source)
+
+    info = sheets.get("info")
+    if not isinstance(info, pd.DataFrame) or info.empty:
+        raise ValueError("the session has no info sheet")
+    info = info.rename(columns=str)
+    sub_num = str(info.loc[0, "sub_num"])
+    condition = info.loc[0, "condition"] if "condition" in info else None
+    date = str(info.loc[0, "datetime"])[:10] if "datetime" in info else None
+    info_json = info.to_json(orient="records", date_format="iso")
+
+    # Subject table
+    subject = info.assign(session=session, source=os.path.basename(source))
+    subject_path = os.path.join(warehouse_dir, SUBJECTS_DIR, session + ".parquet")
+    os.makedirs(os.path.dirname(subject_path), exist_ok=True)
+    pq.write_table(
+        output.arrow_table(_normalise(subject), "info", info_json), subject_path
+    )
+
+    # Trial table, partitioned by task / condition / date
+    parts = [os.path.relpath(subject_path, warehouse_dir)]
+    for sheet_name, df in sheets.items():
+        if sheet_name == "info" or not isinstance(df, pd.DataFrame) or df.empty:
+            continue
+        if output.is_placeholder(df):
+            continue  # Task without data (see output.placeholder)
+
+        df = _normalise(df).assign(sub_num=sub_num, session=session)
+        directory = os.path.join(
+            warehouse_dir,
+            TRIALS_DIR,
+            _partition("task", sheet_name),
+            _partition("condition", condition),
+            _partition("date", date),
+        )
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, session + ".parquet")
+        pq.write_table(output.arrow_table(df, sheet_name, info_json), path)
+        parts.append(os.path.relpath(path, warehouse_dir))
+
+    size, mtime_ns = _source_stat(source)
+    return {
+        "source": os.path.basename(source),
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "sub_num": sub_num,
+        "parts": parts,
+    }
+
+
+def remove_session(warehouse_dir, entry):
+    """Delete the files of an imported session (see import_session)."""
+    for part in entry.get("parts", []):
+        path = os.path.join(warehouse_dir, part)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def update(data_dir, warehouse_dir):
+    """Import the new or modified sessions of a data folder into a warehouse.
+
+    Sessions whose source was deleted from the data folder are removed.
+    Returns the list of imported session sources.
+
+    Parameters:
+    data_dir -- data folder of a project
+    warehouse_dir -- warehouse directory. It is created if needed
+    """
+    os.makedirs(warehouse_dir, exist_ok=True)
+    manifest = read_manifest(warehouse_dir)
+
+    sources = find_sessions(data_dir)
+    current = set(session_id(source) for source in sources)
+    for session in sorted(set(manifest) - current):
+        entry = manifest.pop(session)
+        remove_session(warehouse_dir, entry)
+        write_manifest(warehouse_dir, manifest)
+        print(f"Removed {entry['source']}")
+
+    imported = []
+    for source in sources:
+        session = session_id(source)
+        entry = manifest.get(session)
+        size, mtime_ns = _source_stat(source)
+        if entry is not None and (entry["size"], entry["mtime_ns"]) == (size, mtime_ns):
+            continue
+
+        try:
+            if entry is not None:
+                remove_session(warehouse_dir, entry)
+                del manifest[session]
+            manifest[session] = import_session(source, warehouse_dir)
+        except Exception as e:
+            print(f"Error importing {os.path.basename(source)}: {e}")
+            continue
+        finally:
+            write_manifest(warehouse_dir, manifest)
+
+        print(f"Imported {os.path.basename(source)}")
+        imported.append(source)
+
+    return imported
+
+
+def _numeric(type_):
+    import pyarrow as pa
+
+    return pa.types.is_integer(type_) or pa.types.is_floating(type_)
+
+
+def trial_schema(paths):
+    """Return a schema covering the columns of every trial file of a task.
+
+    Columns missing from some sessions are kept, a column that is null in
+    one session takes its type from the others, and a column saved with
+    different types becomes float64 (if they are all numeric) or string.
+
+    Parameters:
+    paths -- Parquet files of the task's trial table
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = collections.OrderedDict()
+    for path in paths:
+        for field in pq.read_schema(path):
+            current = types.get(field.name)
+            if current is None or pa.types.is_null(current):
+                types[field.name] = field.type
+            elif pa.types.is_null(field.type) or field.type == current:
+                continue
+            elif _numeric(field.type) and _numeric(current):
+                types[field.name] = pa.float64()
+            else:
+                types[field.name] = pa.string()
+    return pa.schema(list(types.items()))
+
+
+def read_trials(warehouse_dir, task, columns=None, filter=None):
+    """Read the trial table of a task as a DataFrame.
+
+    Parameters:
+    warehouse_dir -- warehouse directory
+    task -- task sheet name, e.g. "ANT"
+    columns -- columns to read (None for all). Partition columns (condition,
+        date) can be included
+    filter -- optional pyarrow.dataset expression, e.g.
+        pyarrow.dataset.field("condition") == "1"
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    directory = os.path.join(warehouse_dir, TRIALS_DIR, _partition("task", task))
+    partitions = pa.schema([("condition", pa.string()), ("date", pa.string())])
+    partitioning = ds.partitioning(partitions, flavor="hive")
+
+    # Without a schema, pyarrow would take the columns of the first file
+    files = ds.dataset(directory, format="parquet", partitioning=partitioning).files
+    schema = pa.unify_schemas([trial_schema(files), partitions])
+    dataset = ds.dataset(
+        directory, schema=schema, format="parquet", partitioning=partitioning
+    )
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+
+def read_subjects(warehouse_dir):
+    """Read the subject table (one row per session) as a DataFrame."""
+    import pyarrow.dataset as ds
+
+    directory = os.path.join(warehouse_dir, SUBJECTS_DIR)
+    return ds.dataset(directory, format="parquet").to_table().to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Import the sessions of a data folder into a Parquet warehouse."
+    )
+    parser.add_argument("data_dir", help="data folder of the project")
+    parser.add_argument("warehouse_dir", help="warehouse directory")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.data_dir):
+        print(f"Not a directory: {args.data_dir}")
+        return 1
+
+    imported = update(args.data_dir, args.warehouse_dir)
+    print(f"{len(imported)} sessions imported")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())